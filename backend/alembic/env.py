@@ -20,6 +20,10 @@ from ..database import Base  # type: ignore
 
 target_metadata = Base.metadata
 
+# Same database as the app when ZIRIS_DATABASE_URL is set (see backend/db_engine.py)
+if os.getenv("ZIRIS_DATABASE_URL"):
+    config.set_main_option("sqlalchemy.url", os.environ["ZIRIS_DATABASE_URL"].replace("%", "%%"))
+
 # other values from the config, defined by the needs of env.py, can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
 # ... etc.
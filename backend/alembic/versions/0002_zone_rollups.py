@@ -0,0 +1,49 @@
+"""
+Per-zone rollups for the dashboard
+
+Revision ID: 0002_zone_rollups
+Revises: 0001_initial
+Create Date: 2025-09-15 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0002_zone_rollups'
+down_revision = '0001_initial'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'zone_rollups',
+        sa.Column('zone', sa.String(), primary_key=True),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('anomalies', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sum_temp', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('sum_press', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('sum_vib', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('sum_fumee', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('last_ts', sa.DateTime(), nullable=True),
+    )
+    # Backfill from existing raw rows in a single aggregate pass
+    op.execute(
+        """
+        INSERT INTO zone_rollups (zone, total, anomalies, sum_temp, sum_press, sum_vib, sum_fumee, last_ts)
+        SELECT COALESCE(zone, 'Unknown'),
+               COUNT(id),
+               SUM(CASE WHEN anomaly THEN 1 ELSE 0 END),
+               COALESCE(SUM(temperature), 0),
+               COALESCE(SUM(pression), 0),
+               COALESCE(SUM(vibration), 0),
+               COALESCE(SUM(fumee), 0),
+               MAX(timestamp)
+        FROM sensor_data
+        GROUP BY COALESCE(zone, 'Unknown')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('zone_rollups')
@@ -0,0 +1,26 @@
+"""
+Time-ordered indexes on sensor_data
+
+Revision ID: 0003_sensor_data_time_indexes
+Revises: 0002_zone_rollups
+Create Date: 2025-09-22 09:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0003_sensor_data_time_indexes'
+down_revision = '0002_zone_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # ORDER BY timestamp DESC LIMIT n (recommendations, metrics, suggestions)
+    op.create_index('ix_sensor_data_timestamp', 'sensor_data', ['timestamp'])
+    # Per-zone recent windows and time-range scans
+    op.create_index('ix_sensor_data_zone_timestamp', 'sensor_data', ['zone', 'timestamp'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensor_data_zone_timestamp', table_name='sensor_data')
+    op.drop_index('ix_sensor_data_timestamp', table_name='sensor_data')
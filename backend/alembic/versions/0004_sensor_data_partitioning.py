@@ -0,0 +1,126 @@
+"""
+Optional monthly range partitioning of sensor_data (PostgreSQL)
+
+Only applied when ZIRIS_PARTITION_SENSOR_DATA=1 is set while running the
+upgrade; otherwise this revision is a no-op so plain installs keep a regular
+table. Monthly partitions ahead of time are then created by the backend at
+startup (see backend/partitions.py).
+
+Revision ID: 0004_sensor_data_partitioning
+Revises: 0003_sensor_data_time_indexes
+Create Date: 2025-09-22 09:30:00
+"""
+import os
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0004_sensor_data_partitioning'
+down_revision = '0003_sensor_data_time_indexes'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'ix_sensor_data_id': '(id)',
+    'ix_sensor_data_zone': '(zone)',
+    'ix_sensor_data_timestamp': '(timestamp)',
+    'ix_sensor_data_zone_timestamp': '(zone, timestamp)',
+}
+
+
+def _enabled() -> bool:
+    return op.get_bind().dialect.name == 'postgresql' and os.getenv('ZIRIS_PARTITION_SENSOR_DATA', '0') == '1'
+
+
+def _is_partitioned() -> bool:
+    row = op.get_bind().exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'sensor_data'"
+    ).first()
+    return row is not None
+
+
+def upgrade() -> None:
+    if not _enabled() or _is_partitioned():
+        return
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.execute('ALTER TABLE sensor_data RENAME TO sensor_data_legacy')
+    op.execute('ALTER TABLE sensor_data_legacy RENAME CONSTRAINT sensor_data_pkey TO sensor_data_legacy_pkey')
+    op.execute('ALTER SEQUENCE sensor_data_id_seq OWNED BY NONE')
+    # The partition key must be part of the primary key
+    op.execute(
+        """
+        CREATE TABLE sensor_data (
+            id integer NOT NULL DEFAULT nextval('sensor_data_id_seq'),
+            timestamp timestamp NOT NULL DEFAULT now(),
+            zone varchar NOT NULL,
+            temperature double precision NOT NULL,
+            pression double precision NOT NULL,
+            vibration double precision NOT NULL,
+            fumee double precision NOT NULL,
+            flamme boolean NOT NULL,
+            anomaly boolean NOT NULL DEFAULT FALSE,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+        """
+    )
+    op.execute('CREATE TABLE sensor_data_default PARTITION OF sensor_data DEFAULT')
+    # One partition per month from the oldest reading up to two months ahead
+    op.execute(
+        """
+        DO $$
+        DECLARE m date;
+        BEGIN
+            FOR m IN SELECT generate_series(
+                date_trunc('month', COALESCE((SELECT min(timestamp) FROM sensor_data_legacy), now())),
+                date_trunc('month', now()) + interval '2 months',
+                interval '1 month')::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE IF NOT EXISTS %I PARTITION OF sensor_data FOR VALUES FROM (%L) TO (%L)',
+                    'sensor_data_p' || to_char(m, 'YYYY_MM'), m, (m + interval '1 month')::date);
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO sensor_data (id, timestamp, zone, temperature, pression, vibration, fumee, flamme, anomaly)
+        SELECT id, COALESCE(timestamp, now()), zone, temperature, pression, vibration, fumee, flamme, anomaly
+        FROM sensor_data_legacy
+        """
+    )
+    op.execute('DROP TABLE sensor_data_legacy')
+    op.execute('ALTER SEQUENCE sensor_data_id_seq OWNED BY sensor_data.id')
+    for name, cols in INDEXES.items():
+        op.execute(f'CREATE INDEX {name} ON sensor_data {cols}')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql' or not _is_partitioned():
+        return
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
+    op.execute('ALTER TABLE sensor_data RENAME TO sensor_data_partitioned')
+    op.execute('ALTER TABLE sensor_data_partitioned RENAME CONSTRAINT sensor_data_pkey TO sensor_data_partitioned_pkey')
+    op.execute('ALTER SEQUENCE sensor_data_id_seq OWNED BY NONE')
+    op.execute(
+        """
+        CREATE TABLE sensor_data (
+            id integer PRIMARY KEY DEFAULT nextval('sensor_data_id_seq'),
+            timestamp timestamp DEFAULT now(),
+            zone varchar NOT NULL,
+            temperature double precision NOT NULL,
+            pression double precision NOT NULL,
+            vibration double precision NOT NULL,
+            fumee double precision NOT NULL,
+            flamme boolean NOT NULL,
+            anomaly boolean NOT NULL DEFAULT FALSE
+        )
+        """
+    )
+    op.execute('INSERT INTO sensor_data SELECT id, timestamp, zone, temperature, pression, vibration, fumee, flamme, anomaly FROM sensor_data_partitioned')
+    op.execute('DROP TABLE sensor_data_partitioned CASCADE')
+    op.execute('ALTER SEQUENCE sensor_data_id_seq OWNED BY sensor_data.id')
+    for name, cols in INDEXES.items():
+        op.execute(f'CREATE INDEX {name} ON sensor_data {cols}')
@@ -0,0 +1,47 @@
+"""
+Downsampled sensor rollups for retention
+
+Revision ID: 0005_sensor_rollups
+Revises: 0004_sensor_data_partitioning
+Create Date: 2025-09-29 14:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0005_sensor_rollups'
+down_revision = '0004_sensor_data_partitioning'
+branch_labels = None
+depends_on = None
+
+METRICS = ('temp', 'press', 'vib', 'fumee')
+
+
+def upgrade() -> None:
+    cols = [
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('zone', sa.String(), nullable=False),
+        sa.Column('granularity', sa.String(), nullable=False),
+        sa.Column('bucket_start', sa.DateTime(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('anomalies', sa.Integer(), nullable=False, server_default='0'),
+    ]
+    for m in METRICS:
+        cols += [
+            sa.Column(f'{m}_min', sa.Float(), nullable=True),
+            sa.Column(f'{m}_max', sa.Float(), nullable=True),
+            sa.Column(f'{m}_sum', sa.Float(), nullable=True, server_default='0'),
+        ]
+    op.create_table(
+        'sensor_rollups',
+        *cols,
+        sa.UniqueConstraint('zone', 'granularity', 'bucket_start', name='uq_sensor_rollups_bucket'),
+    )
+    op.create_index('ix_sensor_rollups_id', 'sensor_rollups', ['id'])
+    op.create_index('ix_sensor_rollups_bucket_start', 'sensor_rollups', ['bucket_start'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensor_rollups_bucket_start', table_name='sensor_rollups')
+    op.drop_index('ix_sensor_rollups_id', table_name='sensor_rollups')
+    op.drop_table('sensor_rollups')
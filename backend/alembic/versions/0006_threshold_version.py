@@ -0,0 +1,23 @@
+"""
+Version column on thresholds for cache revalidation
+
+Revision ID: 0006_threshold_version
+Revises: 0005_sensor_rollups
+Create Date: 2025-09-30 10:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0006_threshold_version'
+down_revision = '0005_sensor_rollups'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('thresholds', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+
+
+def downgrade() -> None:
+    op.drop_column('thresholds', 'version')
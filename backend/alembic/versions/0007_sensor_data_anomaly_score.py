@@ -0,0 +1,28 @@
+"""
+Anomaly score column and partial index on unscored readings
+
+Revision ID: 0007_sensor_data_anomaly_score
+Revises: 0006_threshold_version
+Create Date: 2025-10-01 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0007_sensor_data_anomaly_score'
+down_revision = '0006_threshold_version'
+branch_labels = None
+depends_on = None
+
+UNSCORED = sa.text('anomaly_score IS NULL')
+
+
+def upgrade() -> None:
+    op.add_column('sensor_data', sa.Column('anomaly_score', sa.Float(), nullable=True))
+    # Existing rows start unscored; the scorer works through them in batches
+    op.create_index('ix_sensor_data_unscored', 'sensor_data', ['id'], postgresql_where=UNSCORED, sqlite_where=UNSCORED)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_sensor_data_unscored', table_name='sensor_data')
+    op.drop_column('sensor_data', 'anomaly_score')
@@ -0,0 +1,38 @@
+"""
+Per-zone threshold profiles
+
+Revision ID: 0009_threshold_profiles
+Revises: 0008_jobs
+Create Date: 2025-10-03 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0009_threshold_profiles'
+down_revision = '0008_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'threshold_profiles',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('zone', sa.String(), nullable=False),
+        sa.Column('sensor_type', sa.String(), nullable=True),
+        sa.Column('temp', sa.Float(), nullable=True),
+        sa.Column('press', sa.Float(), nullable=True),
+        sa.Column('vib', sa.Float(), nullable=True),
+        sa.Column('fumee', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.UniqueConstraint('zone', 'sensor_type', name='uq_threshold_profiles_zone_sensor_type'),
+    )
+    op.create_index('ix_threshold_profiles_id', 'threshold_profiles', ['id'])
+    op.create_index('ix_threshold_profiles_zone', 'threshold_profiles', ['zone'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_threshold_profiles_zone', table_name='threshold_profiles')
+    op.drop_index('ix_threshold_profiles_id', table_name='threshold_profiles')
+    op.drop_table('threshold_profiles')
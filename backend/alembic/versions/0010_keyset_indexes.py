@@ -0,0 +1,31 @@
+"""
+Composite (sort key, id) indexes for keyset pagination
+
+Revision ID: 0010_keyset_indexes
+Revises: 0009_threshold_profiles
+Create Date: 2025-10-06 09:00:00
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '0010_keyset_indexes'
+down_revision = '0009_threshold_profiles'
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    ('ix_users_created_at_id', 'users', ['created_at', 'id']),
+    ('ix_audit_logs_ts_id', 'audit_logs', ['ts', 'id']),
+    ('ix_suggestions_created_at_id', 'suggestions', ['created_at', 'id']),
+    ('ix_suggestions_updated_at_id', 'suggestions', ['updated_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    for name, table, cols in INDEXES:
+        op.create_index(name, table, cols)
+
+
+def downgrade() -> None:
+    for name, table, _ in INDEXES:
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,39 @@
+"""
+One zone-wide threshold profile per zone
+
+Revision ID: 0012_threshold_profile_zone_unique
+Revises: 0011_refresh_tokens
+Create Date: 2025-10-08 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0012_threshold_profile_zone_unique'
+down_revision = '0011_refresh_tokens'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Keep the most recently written zone-wide profile of each zone
+    op.execute(
+        """
+        DELETE FROM threshold_profiles
+        WHERE sensor_type IS NULL
+          AND id NOT IN (
+            SELECT id FROM (
+              SELECT id, ROW_NUMBER() OVER (PARTITION BY zone ORDER BY updated_at DESC NULLS LAST, id DESC) AS rn
+              FROM threshold_profiles WHERE sensor_type IS NULL
+            ) ranked WHERE rn = 1
+          )
+        """
+    )
+    op.create_index(
+        'uq_threshold_profiles_zone_general', 'threshold_profiles', ['zone'], unique=True,
+        postgresql_where=sa.text('sensor_type IS NULL'), sqlite_where=sa.text('sensor_type IS NULL'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('uq_threshold_profiles_zone_general', table_name='threshold_profiles')
@@ -0,0 +1,38 @@
+"""
+Keyset indexes on COALESCE(sort key, '0001-01-01'), id
+
+Keyset pagination sorts NULL timestamps of legacy rows as the oldest, so the
+indexes of 0010_keyset_indexes are rebuilt on the expression it orders by.
+
+Revision ID: 0013_keyset_null_sort_keys
+Revises: 0012_threshold_profile_zone_unique
+Create Date: 2025-10-09 09:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '0013_keyset_null_sort_keys'
+down_revision = '0012_threshold_profile_zone_unique'
+branch_labels = None
+depends_on = None
+
+NULL_SORT_TIME_SQL = "'0001-01-01 00:00:00.000000'"  # database.NULL_SORT_TIME_SQL
+INDEXES = (
+    ('ix_users_created_at_id', 'users', 'created_at'),
+    ('ix_audit_logs_ts_id', 'audit_logs', 'ts'),
+    ('ix_suggestions_created_at_id', 'suggestions', 'created_at'),
+    ('ix_suggestions_updated_at_id', 'suggestions', 'updated_at'),
+)
+
+
+def upgrade() -> None:
+    for name, table, col in INDEXES:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, [sa.text(f'COALESCE({col}, {NULL_SORT_TIME_SQL})'), 'id'])
+
+
+def downgrade() -> None:
+    for name, table, col in INDEXES:
+        op.drop_index(name, table_name=table)
+        op.create_index(name, table, [col, 'id'])
@@ -1,32 +1,27 @@
-from sklearn.ensemble import IsolationForest
-import pandas as pd
+"""Compatibility wrappers around the persistent scorer in ``backend/scoring.py``.
+
+The previous implementation refit an IsolationForest on the whole table and
+rewrote every ``anomaly`` flag; these now only score rows not yet scored.
+"""
+from typing import Dict
+
 from sqlalchemy.orm import Session
-from database import SensorDataDB
-from typing import List
 
-def detect_anomalies(db: Session) -> List[int]:
-    data = db.query(SensorDataDB).all()
-    if not data:
-        return []
+from .scoring import scorer
 
-    df = pd.DataFrame([
-        {
-            "temperature": d.temperature,
-            "pression": d.pression,
-            "vibration": d.vibration,
-            "fumee": d.fumee
-        }
-        for d in data
-    ])
 
-    model = IsolationForest(contamination=0.1, random_state=42)
-    predictions = model.fit_predict(df)
+def detect_anomalies(db: Session) -> Dict[str, int]:
+    """Score every pending reading; returns newly flagged rows per zone."""
+    flagged: Dict[str, int] = {}
+    if scorer.ensure_model(db) is None:
+        return flagged
+    while True:
+        n, newly = scorer.score_pending(db)
+        for zone, count in newly.items():
+            flagged[zone] = flagged.get(zone, 0) + count
+        if n == 0:
+            return flagged
 
-    anomaly_ids = [data[i].id for i, pred in enumerate(predictions) if pred == -1]
-    return anomaly_ids
 
-def update_anomalies_in_db(db: Session):
-    anomaly_ids = detect_anomalies(db)
-    for data in db.query(SensorDataDB).all():
-        data.anomaly = data.id in anomaly_ids
-    db.commit()
\ No newline at end of file
+def update_anomalies_in_db(db: Session) -> int:
+    return sum(detect_anomalies(db).values())
@@ -0,0 +1,158 @@
+"""Buffered audit log writer.
+
+Request handlers hand entries to :meth:`AuditWriter.record`, which only
+appends to an in-process buffer. A background thread writes them to
+``audit_logs`` in batches (one multi-row ``INSERT`` and one commit per batch)
+once ``ZIRIS_AUDIT_BATCH`` entries are waiting or every
+``ZIRIS_AUDIT_FLUSH_MS`` milliseconds, and once more on shutdown. The buffer
+holds at most ``ZIRIS_AUDIT_BUFFER`` entries; past that new entries are
+dropped and counted rather than slowing requests down. A failed batch is put
+back at the head of the buffer (as far as it fits) and retried on the next
+flush.
+"""
+import json
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .database import AuditLog
+
+AUDIT_BUFFER = int(os.getenv("ZIRIS_AUDIT_BUFFER", "10000"))
+AUDIT_BATCH = int(os.getenv("ZIRIS_AUDIT_BATCH", "500"))
+AUDIT_FLUSH_MS = int(os.getenv("ZIRIS_AUDIT_FLUSH_MS", "1000"))
+
+
+def entry(action: str, user_id: Optional[int] = None, details: Optional[dict] = None) -> Dict[str, Any]:
+    """Row values for one audit entry, timestamped now."""
+    return {
+        "ts": datetime.utcnow(),
+        "user_id": user_id,
+        "action": action,
+        "details": json.dumps(details or {}, ensure_ascii=False),
+    }
+
+
+class AuditWriter:
+    """Bounded buffer of audit entries drained by one writer thread."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_buffer: int = AUDIT_BUFFER,
+        batch_size: int = AUDIT_BATCH,
+        flush_ms: int = AUDIT_FLUSH_MS,
+    ):
+        self.session_factory = session_factory
+        self.max_buffer = max(1, max_buffer)
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = max(1, flush_ms) / 1000.0
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.flushes = 0
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def record(self, action: str, user_id: Optional[int] = None, details: Optional[dict] = None) -> bool:
+        """Queue one entry without touching the database; False if it was dropped."""
+        row = entry(action, user_id, details)
+        with self._lock:
+            if len(self._buffer) >= self.max_buffer:
+                self.dropped += 1
+                return False
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full:
+            self._wake.set()
+        return True
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            n = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(n)]
+
+    def _requeue(self, rows: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            room = self.max_buffer - len(self._buffer)
+            keep = rows[:max(0, room)]
+            self.dropped += len(rows) - len(keep)
+            self._buffer.extendleft(reversed(keep))
+
+    def _write(self, rows: List[Dict[str, Any]]) -> None:
+        db = self.session_factory()
+        try:
+            db.execute(insert(AuditLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def flush(self) -> int:
+        """Write everything buffered so far; returns the number of rows written."""
+        total = 0
+        with self._flush_lock:
+            while True:
+                rows = self._take()
+                if not rows:
+                    return total
+                try:
+                    self._write(rows)
+                except Exception:
+                    self.errors += 1
+                    self._requeue(rows)
+                    return total
+                total += len(rows)
+                self.written += len(rows)
+                self.flushes += 1
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the writer thread and flush what is left."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "running": self.running,
+            "buffered": buffered,
+            "written": self.written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "flushes": self.flushes,
+        }
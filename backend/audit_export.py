@@ -0,0 +1,180 @@
+"""Streaming export of the audit log.
+
+Rows are read through a server-side cursor (``yield_per``; a named cursor on
+PostgreSQL) and encoded batch by batch, so an export of tens of millions of
+rows holds one batch in memory at a time. Formats: ``csv``, ``ndjson`` and
+``parquet`` (needs the optional ``pyarrow``, one row group per batch). CSV
+and NDJSON can be gzip-compressed on the fly.
+"""
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from sqlalchemy.orm import Query, Session
+
+from .database import AuditLog
+
+EXPORT_BATCH = int(os.getenv("ZIRIS_AUDIT_EXPORT_BATCH", "5000"))
+FORMATS = ("csv", "ndjson", "parquet")
+COLUMNS = ("id", "ts", "user_id", "action", "details")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+
+def filter_audit(
+    q: Query,
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+) -> Query:
+    """Filters shared by ``/admin/audit`` and its export; unparseable dates are ignored."""
+    if action:
+        q = q.filter(AuditLog.action == action)
+    if user_id:
+        q = q.filter(AuditLog.user_id == user_id)
+    # date filters (ISO8601)
+    try:
+        if date_from:
+            q = q.filter(AuditLog.ts >= datetime.fromisoformat(date_from))
+        if date_to:
+            q = q.filter(AuditLog.ts <= datetime.fromisoformat(date_to))
+    except ValueError:
+        pass
+    return q
+
+
+def iter_batches(q: Query, batch_size: int = EXPORT_BATCH) -> Iterator[List[tuple]]:
+    """Yield lists of ``COLUMNS`` tuples read through a server-side cursor."""
+    cols = [getattr(AuditLog, c) for c in COLUMNS]
+    result = q.with_entities(*cols).execution_options(yield_per=batch_size)
+    batch: List[tuple] = []
+    for row in result:
+        batch.append(tuple(row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _csv(batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(COLUMNS)
+    for batch in batches:
+        for id_, ts, user_id, action, details in batch:
+            writer.writerow([id_, ts.isoformat() if ts else "", user_id or "", action, details or ""])
+        yield buf.getvalue().encode("utf-8")
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def _ndjson(batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    for batch in batches:
+        lines = [
+            json.dumps({"id": id_, "ts": ts.isoformat() if ts else None, "user_id": user_id, "action": action, "details": details}, ensure_ascii=False)
+            for id_, ts, user_id, action, details in batch
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _Sink(io.RawIOBase):
+    """Write-only file that hands its bytes back to the generator after each row group."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.size = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self.chunks.append(data)
+        self.size += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.size
+
+    def drain(self) -> bytes:
+        out, self.chunks = b"".join(self.chunks), []
+        return out
+
+
+def _parquet(batches: Iterable[List[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("ts", pa.timestamp("us")),
+        ("user_id", pa.int64()),
+        ("action", pa.string()),
+        ("details", pa.string()),
+    ])
+    sink = _Sink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for batch in batches:
+            columns = list(zip(*batch))
+            writer.write_table(pa.Table.from_arrays([pa.array(c, type=f.type) for c, f in zip(columns, schema)], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+    for chunk in chunks:
+        out = z.compress(chunk)
+        if out:
+            yield out
+    yield z.flush()
+
+
+def check_format(fmt: str, gzip: bool = False) -> None:
+    """Raise ``ValueError`` for an unsupported format/compression combination."""
+    if fmt not in FORMATS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    if fmt == "parquet":
+        if gzip:
+            raise ValueError("parquet is already compressed; gzip applies to csv and ndjson")
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("parquet export requires pyarrow")
+
+
+def filename(fmt: str, gzip: bool = False) -> str:
+    return f"audit-{datetime.utcnow():%Y%m%dT%H%M%S}.{fmt}" + (".gz" if gzip else "")
+
+
+def stream_audit(
+    session_factory: Callable[[], Session],
+    fmt: str = "csv",
+    gzip: bool = False,
+    batch_size: int = EXPORT_BATCH,
+    descending: bool = True,
+    limit: Optional[int] = None,
+    **filters,
+) -> Iterator[bytes]:
+    """Encoded export as a byte stream; owns its session for the whole stream."""
+    db = session_factory()
+    try:
+        q = filter_audit(db.query(AuditLog), **filters)
+        q = q.order_by(AuditLog.ts.desc(), AuditLog.id.desc()) if descending else q.order_by(AuditLog.ts.asc(), AuditLog.id.asc())
+        if limit:
+            q = q.limit(limit)
+        encode = {"csv": _csv, "ndjson": _ndjson, "parquet": _parquet}[fmt]
+        chunks = encode(iter_batches(q, max(1, batch_size)))
+        yield from _gzip(chunks) if gzip else chunks
+    finally:
+        db.close()
@@ -0,0 +1,73 @@
+"""Compare ingestion throughput of /sensor-data/ingest and /sensor-data/ingest/bulk.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.bench_ingest --rows 20000 --batch 10000
+
+By default a throw-away SQLite file is used; set ZIRIS_BENCH_DATABASE_URL to
+point at a scratch PostgreSQL database to measure the COPY path.
+"""
+import argparse
+import os
+import tempfile
+import time
+from datetime import datetime
+from typing import List
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..data_generator import generate_columns
+from ..database import Base, User
+from .. import main
+
+
+def _payload(n: int, rng: np.random.Generator) -> List[dict]:
+    cols = generate_columns(n, rng=rng, end=datetime.utcnow())
+    cols["anomaly"][:] = False
+    cols["timestamp"] = np.array([t.isoformat() for t in cols["timestamp"]], dtype=object)
+    keys = list(cols)
+    return [dict(zip(keys, values)) for values in zip(*(cols[k].tolist() for k in keys))]
+
+
+def _client(url: str) -> TestClient:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def _db():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    admin = User(id=1, username="bench", role="admin", is_active=True)
+    main.app.dependency_overrides[main.get_db] = _db
+    main.app.dependency_overrides[main.get_current_user] = lambda: admin
+    return TestClient(main.app)
+
+
+def run(rows: int, batch: int, url: str) -> None:
+    client = _client(url)
+    rng = np.random.default_rng(42)
+    batches = [_payload(min(batch, rows - i), rng) for i in range(0, rows, batch)]
+    print(f"{rows} rows in batches of {batch} on {url.split('@')[-1]}")
+    for path in ("/sensor-data/ingest", "/sensor-data/ingest/bulk"):
+        t = time.perf_counter()
+        for b in batches:
+            r = client.post(path, json=b)
+            r.raise_for_status()
+        dt = time.perf_counter() - t
+        print(f"  {path:<28} {dt:8.2f}s  {rows / dt:12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=10000)
+    args = parser.parse_args()
+    url = os.getenv("ZIRIS_BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+    run(args.rows, args.batch, url)
@@ -0,0 +1,42 @@
+"""Password verification throughput (logins/s) by bcrypt cost and worker count.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.login_throughput --costs 10 11 12 --workers 1 2 4 --logins 64
+
+Each run verifies ``--logins`` passwords on a pool of ``--workers`` threads,
+the way ``/auth/login`` does on the ``ZIRIS_HASH_WORKERS`` pool. Use it to
+pick ``ZIRIS_BCRYPT_ROUNDS``: the login rate one worker process can sustain
+is roughly the figure for its ``ZIRIS_HASH_WORKERS``.
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .. import passwords
+
+
+def run(costs, workers, logins: int) -> None:
+    print(f"{logins} logins per run, {os.cpu_count()} CPU(s)")
+    print(f"  {'cost':>4} {'workers':>7} {'ms/login':>9} {'logins/s':>9}")
+    for cost in costs:
+        hashed = passwords._hash("correct horse", cost)
+        for n in workers:
+            with ThreadPoolExecutor(max_workers=n) as pool:
+                t0 = time.perf_counter()
+                ok = list(pool.map(lambda _: passwords._verify("correct horse", hashed), range(logins)))
+                elapsed = time.perf_counter() - t0
+            assert all(ok)
+            print(f"  {cost:>4} {n:>7} {elapsed / logins * 1000 * n:>9.1f} {logins / elapsed:>9.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--costs", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--logins", type=int, default=32)
+    args = parser.parse_args()
+    if not passwords.available:
+        raise SystemExit("bcrypt is not installed")
+    run(args.costs, args.workers, args.logins)
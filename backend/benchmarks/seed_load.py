@@ -0,0 +1,49 @@
+"""Generate a synthetic load-test dataset directly into a database.
+
+Run from the repository root:
+
+    python -m backend.benchmarks.seed_load --rows 10000000 --batch 50000
+
+Uses the same batched pipeline as the seed job (``backend/seeding.py``).
+Rows are spread ``--interval`` seconds apart, ending now. Set
+ZIRIS_BENCH_DATABASE_URL to the target database (tables are created if
+missing); by default a throw-away SQLite file is used.
+"""
+import argparse
+import os
+import tempfile
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from ..database import Base
+from ..data_generator import SCENARIOS
+from ..seeding import SEED_BATCH, ProgressThrottle, seed
+
+
+def run(rows: int, batch: int, contamination: float, interval: float, scenario: str, url: str) -> None:
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    print(f"{rows:,} rows ({scenario}) in batches of {batch:,} on {url.split('@')[-1]}")
+
+    def report(done: int, total: int) -> None:
+        print(f"  {done:>12,} / {total:,}")
+
+    try:
+        result = seed(db, rows, batch_size=batch, contamination=contamination, seed=42, interval_seconds=interval, profiles=SCENARIOS[scenario], progress=ProgressThrottle(report, every_ms=5000))
+    finally:
+        db.close()
+    print(f"  {result['seconds']:8.2f}s  {result['rows_per_second']:12,} rows/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch", type=int, default=SEED_BATCH)
+    parser.add_argument("--contamination", type=float, default=0.1)
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="normal")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between consecutive readings")
+    args = parser.parse_args()
+    url = os.getenv("ZIRIS_BENCH_DATABASE_URL") or f"sqlite:///{tempfile.mkdtemp()}/seed.db"
+    run(args.rows, args.batch, args.contamination, args.interval, args.scenario, url)
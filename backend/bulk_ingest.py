@@ -0,0 +1,166 @@
+"""Bulk ingestion helpers for sensor readings.
+
+A batch is validated column-wise with NumPy (one pass per column rather than
+one try/except per row) and written with PostgreSQL ``COPY`` or, on other
+dialects, a single executemany ``INSERT``. Invalid rows are reported back
+with their index and reason instead of being dropped silently.
+"""
+import csv
+import io
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from .database import SensorData
+
+METRICS = ("temperature", "pression", "vibration", "fumee")
+FLAGS = ("flamme", "anomaly")
+COLUMNS = ("timestamp", "zone") + METRICS + FLAGS
+
+Columns = Dict[str, np.ndarray]
+
+
+def _to_float(values: List[Any]) -> np.ndarray:
+    try:
+        # Fast path: numbers and None (-> nan) convert in one C-level pass
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        out = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v) if v is not None else np.nan
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+_TRUE = {"1", "true", "t", "yes", "y", "on"}
+_FALSE = {"0", "false", "f", "no", "n", "off", ""}
+
+
+def _to_bool(values: List[Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (values, invalid_mask); None counts as False like SensorItem defaults."""
+    out = np.zeros(len(values), dtype=bool)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        if v is None or isinstance(v, (bool, np.bool_)):
+            out[i] = bool(v)
+        elif isinstance(v, str):
+            s = v.strip().lower()
+            if s in _TRUE:
+                out[i] = True
+            elif s not in _FALSE:
+                bad[i] = True
+        elif isinstance(v, (int, float)):
+            out[i] = bool(v)
+        else:
+            bad[i] = True
+    return out, bad
+
+
+def _naive_utc(v: datetime) -> datetime:
+    # Columns are naive UTC; mixing aware values in would break comparisons downstream
+    return v.astimezone(timezone.utc).replace(tzinfo=None) if v.tzinfo is not None else v
+
+
+def _to_timestamp(values: List[Any], now: datetime) -> Tuple[np.ndarray, np.ndarray]:
+    out = np.empty(len(values), dtype=object)
+    bad = np.zeros(len(values), dtype=bool)
+    for i, v in enumerate(values):
+        if v is None or v == "":
+            out[i] = now
+        elif isinstance(v, datetime):
+            out[i] = _naive_utc(v)
+        else:
+            try:
+                out[i] = _naive_utc(datetime.fromisoformat(str(v)))
+            except ValueError:
+                bad[i] = True
+    return out, bad
+
+
+def validate_records(records: Sequence[Mapping[str, Any]], now: Optional[datetime] = None) -> Tuple[Columns, List[dict]]:
+    """Validate a batch of SensorItem-shaped mappings.
+
+    Returns ``(columns, rejects)`` where ``columns`` only holds the accepted
+    rows and ``rejects`` is a list of ``{"index", "reason"}`` entries using
+    the position of the row in ``records``.
+    """
+    n = len(records)
+    now = now or datetime.utcnow()
+    reasons: Dict[str, np.ndarray] = {}
+    cols: Columns = {}
+
+    zones = np.array([r.get("zone") for r in records], dtype=object)
+    zone_ok = np.fromiter((isinstance(z, str) and z.strip() != "" for z in zones), dtype=bool, count=n)
+    reasons["zone: missing"] = ~zone_ok
+    cols["zone"] = zones
+
+    for m in METRICS:
+        arr = _to_float([r.get(m) for r in records])
+        reasons[f"{m}: not a finite number"] = ~np.isfinite(arr)
+        cols[m] = arr
+
+    for f in FLAGS:
+        arr, bad = _to_bool([r.get(f) for r in records])
+        reasons[f"{f}: not a boolean"] = bad
+        cols[f] = arr
+
+    ts, bad_ts = _to_timestamp([r.get("timestamp") for r in records], now)
+    reasons["timestamp: not ISO8601"] = bad_ts
+    cols["timestamp"] = ts
+
+    invalid = np.zeros(n, dtype=bool)
+    for mask in reasons.values():
+        invalid |= mask
+
+    rejects: List[dict] = []
+    for i in np.flatnonzero(invalid):
+        why = [label for label, mask in reasons.items() if mask[i]]
+        rejects.append({"index": int(i), "reason": "; ".join(why)})
+
+    keep = ~invalid
+    return {k: v[keep] for k, v in cols.items()}, rejects
+
+
+def column_count(cols: Columns) -> int:
+    return int(len(cols["zone"])) if cols else 0
+
+
+def _copy_rows(db: Session, cols: Columns) -> None:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerows(zip(
+        (t.isoformat() for t in cols["timestamp"]),
+        cols["zone"],
+        *(cols[m].tolist() for m in METRICS),
+        *(cols[f].tolist() for f in FLAGS),
+    ))
+    buf.seek(0)
+    sql = f"COPY {SensorData.__tablename__} ({', '.join(COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = db.connection().connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, buf)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buf.getvalue())
+    finally:
+        cursor.close()
+
+
+def write_columns(db: Session, cols: Columns) -> int:
+    """Insert validated columns inside the session's transaction (caller commits)."""
+    n = column_count(cols)
+    if not n:
+        return 0
+    if db.get_bind().dialect.name == "postgresql":
+        _copy_rows(db, cols)
+    else:
+        lists = {k: (v.tolist() if k != "timestamp" else list(v)) for k, v in cols.items()}
+        rows = [dict(zip(COLUMNS, values)) for values in zip(*(lists[c] for c in COLUMNS))]
+        db.execute(insert(SensorData), rows)
+    return n
@@ -1,25 +1,169 @@
+"""Synthetic sensor data.
+
+:func:`generate_columns` produces N readings in one vectorized call from an
+explicit ``numpy.random.Generator`` (or an integer seed), so the same seed
+always gives the same dataset. Each zone follows a :class:`ZoneProfile`:
+baseline offsets, linear drift, isolated spikes, sensor dropouts (NaN
+metrics) and fire events (flame plus hot and smoky readings, labelled as
+anomalies). Output is available as column arrays, a pandas DataFrame
+(:func:`generate_frame`) or a stream of chunks (:func:`iter_chunks`).
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterator, Mapping, Optional, Tuple, Union
+
 import numpy as np
-from sklearn.ensemble import IsolationForest
-
-def generate_sensor_data(n_samples):
-    zones = ['Salle Serveurs', 'Locaux Electriques', 'Zone Turbines', 'Stockage Combustible', 'Controle Commande']
-    data = []
-    for _ in range(n_samples):
-        zone = np.random.choice(zones)
-        data.append({
-            "zone": zone,
-            "temperature": np.random.normal(25, 5),
-            "pression": np.random.normal(2, 0.5),
-            "vibration": np.random.normal(5, 2),
-            "fumee": np.random.normal(50, 20),
-            "flamme": np.random.random() < 0.05  # 5% de chance d'avoir une flamme
-        })
-    return data
+
+ZONES = ('Salle Serveurs', 'Locaux Electriques', 'Zone Turbines', 'Stockage Combustible', 'Controle Commande')
+METRICS = ('temperature', 'pression', 'vibration', 'fumee')
+MEANS = np.array([25.0, 2.0, 5.0, 50.0])
+STDS = np.array([5.0, 0.5, 2.0, 20.0])
+# Shift applied to injected anomalies (several sigmas above normal operation)
+ANOMALY_SHIFT = np.array([40.0, 4.0, 15.0, 250.0])
+# Shift applied during fire events: hot and smoky, pressure and vibration barely move
+FIRE_SHIFT = np.array([60.0, 0.5, 2.0, 400.0])
+FLAME_RATE = 0.05
+
+Columns = Dict[str, np.ndarray]
+Seed = Union[None, int, np.random.Generator]
+Vector = Tuple[float, float, float, float]  # METRICS order
+
+_ZERO: Vector = (0.0, 0.0, 0.0, 0.0)
+
+
+@dataclass(frozen=True)
+class ZoneProfile:
+    """Behaviour of one zone; every rate is a per-reading probability."""
+    weight: float = 1.0  # relative share of readings
+    offset: Vector = _ZERO  # added to the baseline means
+    drift_per_hour: Vector = _ZERO  # linear drift from the start of the dataset
+    spike_rate: float = 0.0  # one metric jumps by `spike_sigma` standard deviations
+    spike_sigma: float = 6.0
+    dropout_rate: float = 0.0  # all metrics missing (NaN)
+    fire_rate: float = 0.0  # flame, FIRE_SHIFT applied, labelled anomaly
+    flame_rate: float = FLAME_RATE  # flame detector noise outside fire events
+
+
+DEFAULT_PROFILES: Dict[str, ZoneProfile] = {z: ZoneProfile() for z in ZONES}
+
+SCENARIOS: Dict[str, Dict[str, ZoneProfile]] = {
+    "normal": DEFAULT_PROFILES,
+    "drift": {**DEFAULT_PROFILES, 'Zone Turbines': ZoneProfile(drift_per_hour=(0.5, 0.01, 0.2, 1.0))},
+    "noisy": {z: ZoneProfile(spike_rate=0.01, dropout_rate=0.02) for z in ZONES},
+    "fire": {**DEFAULT_PROFILES, 'Stockage Combustible': ZoneProfile(fire_rate=0.02)},
+}
+
+
+def _table(profiles: Mapping[str, ZoneProfile], field: str) -> np.ndarray:
+    return np.array([getattr(p, field) for p in profiles.values()], dtype=np.float64)
+
+
+def generate_columns(
+    n: int,
+    contamination: float = 0.0,
+    rng: Seed = None,
+    end: Optional[datetime] = None,
+    interval_seconds: float = 1.0,
+    profiles: Optional[Mapping[str, ZoneProfile]] = None,
+    origin: Optional[datetime] = None,
+) -> Columns:
+    """Generate ``n`` readings as column arrays.
+
+    The layout matches ``bulk_ingest.validate_records``, so the result can go
+    straight to ``write_columns``. A ``contamination`` share of rows is
+    shifted well above normal operation and labelled ``anomaly=True``, on top
+    of the profiles' fire events. Timestamps are spaced ``interval_seconds``
+    apart and end at ``end`` (default: now). Drift is measured from
+    ``origin`` (default: the first timestamp).
+    """
+    rng = np.random.default_rng(rng)
+    profiles = profiles or DEFAULT_PROFILES
+    names = np.array(list(profiles), dtype=object)
+    weights = _table(profiles, "weight")
+    zi = rng.choice(len(names), size=n, p=weights / weights.sum())
+
+    end64 = np.datetime64(end or datetime.utcnow(), 'us')
+    step = np.timedelta64(int(interval_seconds * 1e6), 'us')
+    ts = end64 - step * np.arange(n - 1, -1, -1)
+    origin64 = np.datetime64(origin, 'us') if origin is not None else (ts[0] if n else end64)
+    hours = (ts - origin64) / np.timedelta64(1, 'h')
+
+    values = rng.normal(MEANS, STDS, size=(n, 4))
+    values += _table(profiles, "offset")[zi]
+    values += _table(profiles, "drift_per_hour")[zi] * hours[:, None]
+
+    spikes = np.flatnonzero(rng.random(n) < _table(profiles, "spike_rate")[zi])
+    metric = rng.integers(0, 4, size=len(spikes))
+    values[spikes, metric] += _table(profiles, "spike_sigma")[zi[spikes]] * STDS[metric]
+
+    anomaly = rng.random(n) < contamination
+    values[anomaly] += rng.normal(ANOMALY_SHIFT, ANOMALY_SHIFT / 4, size=(int(anomaly.sum()), 4))
+
+    fire = rng.random(n) < _table(profiles, "fire_rate")[zi]
+    values[fire] += rng.normal(FIRE_SHIFT, FIRE_SHIFT / 4, size=(int(fire.sum()), 4))
+    flamme = fire | (rng.random(n) < _table(profiles, "flame_rate")[zi])
+
+    values[rng.random(n) < _table(profiles, "dropout_rate")[zi]] = np.nan
+
+    cols: Columns = {
+        "timestamp": ts.astype(object),
+        "zone": names[zi],
+        "flamme": flamme,
+        "anomaly": anomaly | fire,
+    }
+    for i, m in enumerate(METRICS):
+        cols[m] = values[:, i]
+    return cols
+
+
+def iter_chunks(
+    n: int,
+    chunk_size: int = 100_000,
+    contamination: float = 0.0,
+    rng: Seed = None,
+    end: Optional[datetime] = None,
+    interval_seconds: float = 1.0,
+    profiles: Optional[Mapping[str, ZoneProfile]] = None,
+) -> Iterator[Columns]:
+    """Stream ``n`` readings as consecutive chunks with a continuous timeline."""
+    rng = np.random.default_rng(rng)
+    chunk_size = max(1, chunk_size)
+    end64 = np.datetime64(end or datetime.utcnow(), 'us')
+    step = np.timedelta64(int(interval_seconds * 1e6), 'us')
+    origin = (end64 - step * max(n - 1, 0)).astype(datetime)
+    done = 0
+    while done < n:
+        size = min(chunk_size, n - done)
+        # Chunk ends where the next (more recent) one starts
+        chunk_end = (end64 - step * (n - done - size)).astype(datetime)
+        yield generate_columns(size, contamination=contamination, rng=rng, end=chunk_end, interval_seconds=interval_seconds, profiles=profiles, origin=origin)
+        done += size
+
+
+def generate_frame(n: int, **kwargs):
+    """:func:`generate_columns` as a pandas DataFrame (pandas is optional)."""
+    import pandas as pd
+
+    cols = generate_columns(n, **kwargs)
+    frame = pd.DataFrame({k: v for k, v in cols.items() if k != "timestamp"})
+    frame.insert(0, "timestamp", pd.to_datetime(cols["timestamp"].astype('datetime64[us]')))
+    return frame
+
+
+def generate_sensor_data(n_samples, rng: Seed = None, profiles: Optional[Mapping[str, ZoneProfile]] = None):
+    """List-of-dicts form kept for existing callers; prefer :func:`generate_columns`."""
+    cols = generate_columns(n_samples, rng=rng, profiles=profiles)
+    keys = ("zone",) + METRICS + ("flamme",)
+    lists = [cols[k].tolist() for k in keys]
+    return [dict(zip(keys, values)) for values in zip(*lists)]
+
 
 def detect_anomalies(data, contamination=0.1, n_estimators=100):
+    from sklearn.ensemble import IsolationForest
+
     X = np.array([[d["temperature"], d["pression"], d["vibration"], d["fumee"]] for d in data])
     clf = IsolationForest(contamination=contamination, random_state=42, n_estimators=n_estimators)
     predictions = clf.fit_predict(X)
     for i, pred in enumerate(predictions):
         data[i]["anomaly"] = pred == -1
-    return data
\ No newline at end of file
+    return data
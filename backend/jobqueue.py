@@ -0,0 +1,255 @@
+"""Database-backed background job queue with a bounded worker pool.
+
+Jobs are rows in ``jobs``, so they survive restarts and every uvicorn worker
+sees the same list. Each process runs a fixed number of worker threads that
+claim queued jobs with ``SELECT ... FOR UPDATE SKIP LOCKED`` on PostgreSQL (a
+conditional ``UPDATE ... WHERE status = 'queued'`` elsewhere), so two workers
+never run the same job and a flood of requests only grows the table, never
+the thread count. Running jobs are heartbeated; a job whose heartbeat is older
+than ``ZIRIS_JOB_STALE_SECONDS`` (its process died) is re-queued until it
+runs out of attempts. Handlers that raise are retried the same way, except
+for :class:`JobError`, which fails the job immediately.
+"""
+import json
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from .database import Job
+
+JOB_WORKERS = int(os.getenv("ZIRIS_JOB_WORKERS", "2"))
+JOB_MAX_ATTEMPTS = int(os.getenv("ZIRIS_JOB_MAX_ATTEMPTS", "3"))
+POLL_SECONDS = float(os.getenv("ZIRIS_JOB_POLL_SECONDS", "2"))
+HEARTBEAT_SECONDS = float(os.getenv("ZIRIS_JOB_HEARTBEAT_SECONDS", "10"))
+STALE_SECONDS = float(os.getenv("ZIRIS_JOB_STALE_SECONDS", "60"))
+
+STATUSES = ("queued", "running", "completed", "failed")
+
+Handler = Callable[[str, Dict[str, Any]], None]
+
+
+class JobError(Exception):
+    """Permanent failure: the job is marked failed without retrying."""
+
+
+def job_dict(job: Job) -> Dict[str, Any]:
+    return {
+        "id": job.id,
+        "type": job.type,
+        "status": job.status,
+        "progress": job.progress or 0,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at,
+        "params": json.loads(job.params) if job.params else None,
+        "error": job.error,
+        "attempts": job.attempts or 0,
+    }
+
+
+def enqueue(db: Session, type: str, params: Optional[Dict[str, Any]] = None, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    now = datetime.utcnow()
+    job = Job(
+        id=uuid.uuid4().hex,
+        type=type,
+        status="queued",
+        progress=0,
+        params=json.dumps(params) if params is not None else None,
+        attempts=0,
+        max_attempts=max(1, max_attempts),
+        created_at=now,
+        updated_at=now,
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def claim(db: Session, worker: str, types: Optional[List[str]] = None) -> Optional[Job]:
+    """Atomically move the oldest queued job to ``running`` for ``worker``.
+
+    The returned job is detached: it describes this worker's attempt.
+    """
+    q = select(Job.id).where(Job.status == "queued").order_by(Job.created_at).limit(1)
+    if types is not None:
+        q = q.where(Job.type.in_(types))
+    postgres = db.get_bind().dialect.name == "postgresql"
+    if postgres:
+        q = q.with_for_update(skip_locked=True)
+    jid = db.execute(q).scalar()
+    if jid is None:
+        db.rollback()
+        return None
+    now = datetime.utcnow()
+    res = db.execute(
+        update(Job)
+        .where(Job.id == jid, Job.status == "queued")
+        .values(status="running", worker=worker, attempts=Job.attempts + 1, started_at=now, heartbeat_at=now, updated_at=now, error=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if not res.rowcount:
+        return None  # another worker won the race (non-PostgreSQL)
+    job = db.get(Job, jid, populate_existing=True)
+    # Detached, so later commits cannot reload another worker's attempt into it
+    db.expunge(job)
+    return job
+
+
+def update_job(db: Session, jid: str, attempt: Optional[int] = None, **fields: Any) -> Optional[Job]:
+    """Apply ``fields`` and refresh the heartbeat; returns the updated job.
+
+    With ``attempt``, the write only happens while that attempt is still the
+    running one; None means the job was re-queued (and maybe re-claimed) since.
+    """
+    now = datetime.utcnow()
+    status = fields.get("status", Job.status)
+    values: Dict[str, Any] = {**fields, "updated_at": now}
+    if "status" not in fields:
+        values["heartbeat_at"] = case((Job.status == "running", now), else_=Job.heartbeat_at)
+    elif status == "running":
+        values["heartbeat_at"] = now
+    elif status in ("completed", "failed"):
+        values["finished_at"] = func.coalesce(Job.finished_at, now)
+    stmt = update(Job).where(Job.id == jid)
+    if attempt is not None:
+        stmt = stmt.where(Job.status == "running", Job.attempts == attempt)
+    res = db.execute(stmt.values(**values).execution_options(synchronize_session=False))
+    db.commit()
+    if not res.rowcount:
+        return None
+    return db.get(Job, jid, populate_existing=True)
+
+
+def finish(db: Session, job: Job, error: Optional[BaseException]) -> Optional[Job]:
+    """Record the outcome of one attempt, re-queueing retryable failures.
+
+    Returns None without writing when the attempt lost its job to
+    :func:`recover_stale` (another worker may be running it now).
+    """
+    attempt = job.attempts or 0
+    if error is None:
+        return update_job(db, job.id, attempt=attempt, status="completed", progress=100)
+    retry = not isinstance(error, JobError) and attempt < (job.max_attempts or 1)
+    return update_job(db, job.id, attempt=attempt, status="queued" if retry else "failed", error=str(error) or error.__class__.__name__)
+
+
+def heartbeat(db: Session, job_ids: List[str]) -> None:
+    if not job_ids:
+        return
+    now = datetime.utcnow()
+    db.execute(
+        update(Job)
+        .where(Job.id.in_(job_ids), Job.status == "running")
+        .values(heartbeat_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+
+
+def recover_stale(db: Session, stale_seconds: float = STALE_SECONDS, now: Optional[datetime] = None) -> int:
+    """Re-queue (or fail, once out of attempts) running jobs whose heartbeat stopped."""
+    cutoff = (now or datetime.utcnow()) - timedelta(seconds=stale_seconds)
+    stale = db.query(Job).filter(Job.status == "running", Job.heartbeat_at < cutoff).with_for_update(skip_locked=True).all()
+    for job in stale:
+        job.status = "queued" if (job.attempts or 0) < (job.max_attempts or 1) else "failed"
+        job.error = "heartbeat lost"
+        job.updated_at = datetime.utcnow()
+    db.commit()
+    return len(stale)
+
+
+class JobWorkerPool:
+    """Fixed set of worker threads running registered handlers for claimed jobs."""
+
+    def __init__(self, session_factory: Callable[[], Session], workers: int = JOB_WORKERS):
+        self.session_factory = session_factory
+        self.workers = max(1, workers)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers: Dict[str, Handler] = {}
+        self._running: Dict[str, str] = {}  # job id -> worker thread name
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def register(self, type: str, handler: Handler) -> None:
+        self._handlers[type] = handler
+
+    def notify(self) -> None:
+        """Wake idle workers after a local enqueue instead of waiting for the next poll."""
+        self._wake.set()
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, args=(f"{self.name}/{i}",), daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._heartbeat, daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def run_once(self, worker: str) -> bool:
+        """Claim and run one job; returns False when the queue was empty."""
+        db = self.session_factory()
+        try:
+            job = claim(db, worker, types=list(self._handlers))
+            if job is None:
+                return False
+            with self._lock:
+                self._running[job.id] = worker
+            error: Optional[BaseException] = None
+            try:
+                self._handlers[job.type](job.id, json.loads(job.params) if job.params else {})
+            except Exception as e:
+                error = e
+            finally:
+                with self._lock:
+                    self._running.pop(job.id, None)
+            finish(db, job, error)
+            return True
+        finally:
+            db.close()
+
+    def _work(self, worker: str) -> None:
+        while not self._stop.is_set():
+            try:
+                if self.run_once(worker):
+                    continue
+            except Exception:
+                pass
+            self._wake.wait(POLL_SECONDS)
+            self._wake.clear()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(HEARTBEAT_SECONDS):
+            db = self.session_factory()
+            try:
+                with self._lock:
+                    running = list(self._running)
+                heartbeat(db, running)
+                recover_stale(db)
+            except Exception:
+                db.rollback()
+            finally:
+                db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            running = len(self._running)
+        return {"workers": self.workers, "running": running}
@@ -1,16 +1,45 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Header, Path, Response
+from fastapi import FastAPI, Depends, HTTPException, status, Header, Path, Response, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from fastapi import WebSocket, WebSocketDisconnect
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 
 from datetime import datetime, timedelta
 import hmac, hashlib, base64, json, os
-import threading, time, uuid
+import asyncio, threading, time
 import secrets
 
-from .database import SessionLocal, init_db, SensorData, User, Threshold, ThresholdHistory, Suggestion, AuditLog, SurveyResponse
+import numpy as np
+
+from .database import engine, engine_settings, async_engine, SessionLocal, AsyncSessionLocal, init_db, SensorData, User, Threshold, ThresholdProfile, ThresholdHistory, Suggestion, AuditLog, SurveyResponse, ZoneRollup, Job
+from .rollups import record_rows, record_columns, ensure_zone_rollups
+from .bulk_ingest import validate_records, write_columns
+from .stream_ingest import StreamParser, detect_format
+from .partitions import maintain_partitions
+from .threshold_engine import METRICS, PRIORITIES, THRESHOLD_KEYS, ZoneThresholds, columns_from_readings, confusion, evaluate, load_window, reason_labels, rule_k
+from .notifications import hub
+from .threshold_cache import bump_version, thresholds_cache
+from .scoring import scorer, scoring_loop
+from .jobqueue import JOB_WORKERS, JobError, JobWorkerPool, enqueue, job_dict, update_job
+from .seeding import SEED_BATCH, ProgressThrottle, seed
+from .data_generator import SCENARIOS
+from .threshold_suggest import DEFAULT_WINDOW_HOURS, STRATEGIES as SUGGEST_STRATEGIES, suggest
+from .pagination import keyset_page
+from .db_engine import pool_status
+from .profiler import ProfileStore, ProfilerMiddleware, install as install_profiler
+from .metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, MetricsMiddleware, ingest_rejected, ingest_rows, instrument_engine, registry as metrics_registry
+from .token_store import make_store as make_token_store
+from .rate_limit import make_limiter, per_ip
+from .principal_cache import PrincipalCache, TokenMemo
+from .passwords import available as bcrypt_available, hash_password, verify_and_update_async
+from .audit import AuditWriter, entry as audit_entry
+from .audit_export import MEDIA_TYPES as AUDIT_MEDIA_TYPES, check_format, filename as audit_filename, filter_audit, stream_audit
+from .retention import RETENTION_BATCH, RETENTION_DAYS, RETENTION_GRANULARITY, GRANULARITIES, read_trend, run_retention
 
 app = FastAPI(title="Ziris Backend", version="0.1.0")
 
@@ -27,8 +56,40 @@ app.add_middleware(
     ],
     allow_credentials=True,
     allow_methods=["*"],
+    expose_headers=["X-Total-Count", "X-Total-Count-Estimated", "X-Next-Cursor", "X-Prev-Cursor", "X-Ziris-Profile", "X-Ziris-Profile-Id", "Server-Timing"],
     allow_headers=["*"],
 )
+# Per-route request counts, latency and DB queries, served at /metrics
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+if async_engine is not None:
+    instrument_engine(async_engine.sync_engine)
+
+
+def _profile_allowed(authorization: Optional[str]) -> bool:
+    """Only active admins can profile a request (X-Ziris-Profile / ?_profile=)."""
+    try:
+        key = _principal_key(authorization)
+    except HTTPException:
+        return False
+    user = principals.get(key)
+    if user is None:
+        db = SessionLocal()
+        try:
+            user = db.execute(_user_query(key)).scalars().first()
+            if user:
+                principals.put(key, user)
+        finally:
+            db.close()
+    return bool(user and user.is_active and user.role == "admin")
+
+
+# Opt-in SQL profiles of single requests, kept for /debug/profile/{request_id}
+profiles = ProfileStore()
+app.add_middleware(ProfilerMiddleware, store=profiles, authorize=_profile_allowed)
+install_profiler(engine)
+if async_engine is not None:
+    install_profiler(async_engine.sync_engine)
 
 
 def get_db():
@@ -39,15 +100,25 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Async session for the hot read endpoints (needs asyncpg, or aiosqlite for SQLite)."""
+    if AsyncSessionLocal is None:
+        raise HTTPException(status_code=503, detail="Async database driver not installed")
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Audit entries are buffered and written in batches off the request path
+audit_writer = AuditWriter(lambda: SessionLocal())
+
+
 def log_action(db: Session, action: str, user_id: Optional[int] = None, details: Optional[dict] = None) -> None:
+    if audit_writer.running:
+        audit_writer.record(action, user_id=user_id, details=details)
+        return
+    # No writer thread (scripts, tests without startup): write inline on the caller's session
     try:
-        entry = AuditLog(
-            user_id=user_id,
-            action=action,
-            details=json.dumps(details or {}, ensure_ascii=False),
-            ts=datetime.utcnow(),
-        )
-        db.add(entry)
+        db.add(AuditLog(**audit_entry(action, user_id, details)))
         db.commit()
     except Exception:
         db.rollback()
@@ -60,27 +131,54 @@ def on_startup():
     # Ensure default users exist for dev login
     db = SessionLocal()
     try:
-        # helper hashing
-        def _hash(pw: str) -> str:
-            # Prefer bcrypt if available
-            try:
-                from bcrypt import gensalt  # type: ignore
-                return hash_password(pw)
-            except Exception:
-                return hashlib.sha256((pw or "").encode("utf-8")).hexdigest()
-
         demo = db.query(User).filter(User.username == "demo").first()
         if not demo:
-            demo = User(username="demo", hashed_password=_hash("demo"), role="user", is_active=True)
+            demo = User(username="demo", hashed_password=hash_password("demo"), role="user", is_active=True)
             db.add(demo)
 
         admin = db.query(User).filter(User.username == "admin").first()
         if not admin:
-            admin = User(username="admin", hashed_password=_hash("admin"), role="admin", is_active=True)
+            admin = User(username="admin", hashed_password=hash_password("admin"), role="admin", is_active=True)
             db.add(admin)
         db.commit()
+        # Backfill per-zone rollups for databases created before zone_rollups existed
+        try:
+            ensure_zone_rollups(db)
+            db.commit()
+        except Exception:
+            db.rollback()
     finally:
         db.close()
+    # Keep monthly sensor_data partitions ahead of time (no-op unless partitioned)
+    threading.Thread(target=_partition_maintenance_loop, daemon=True).start()
+    # Score newly ingested readings with the persisted IsolationForest
+    threading.Thread(target=scoring_loop, args=(SessionLocal,), kwargs={"on_flagged": _publish_scored_alerts}, daemon=True).start()
+    # Background job workers (bounded; jobs are claimed from the `jobs` table)
+    job_pool.start()
+    audit_writer.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    # Write buffered audit entries before the process exits
+    audit_writer.stop()
+
+
+PARTITION_CHECK_SECONDS = 6 * 3600
+
+
+def _partition_maintenance_loop() -> None:
+    while True:
+        try:
+            maintain_partitions(engine)
+        except Exception:
+            pass
+        time.sleep(PARTITION_CHECK_SECONDS)
+
+
+def _publish_scored_alerts(flagged: Dict[str, int]) -> None:
+    for zone, n in flagged.items():
+        hub.publish("alert", f"{zone} : {n} anomalie(s) détectée(s) par le modèle", zone=zone, anomalies=n, source="model")
 
 
 @app.get("/")
@@ -93,9 +191,53 @@ def health():
     return {"status": "healthy"}
 
 
+METRICS_TOKEN = os.getenv("ZIRIS_METRICS_TOKEN", "")
+
+
+@metrics_registry.collector
+def _runtime_metrics():
+    yield "ziris_websocket_connections", "gauge", "Open notification WebSocket connections.", {}, hub.connections
+    yield "ziris_job_workers_busy", "gauge", "Job workers currently running a job.", {}, job_pool.stats()["running"]
+    rl = rate_limiter.stats()
+    for outcome in ("allowed", "rejected"):
+        for rule, n in rl[outcome].items():
+            yield "ziris_rate_limit_hits_total", "counter", "Rate-limited hits by rule and outcome.", {"rule": rule, "outcome": outcome}, n
+    audit = audit_writer.stats()
+    yield "ziris_audit_buffered", "gauge", "Audit entries waiting in the write buffer.", {}, audit["buffered"]
+    yield "ziris_audit_dropped_total", "counter", "Audit entries dropped because the buffer was full.", {}, audit["dropped"]
+    for name, eng in (("sync", engine), ("async", async_engine.sync_engine if async_engine is not None else None)):
+        pool = pool_status(eng)
+        if pool is None or "size" not in pool:
+            continue
+        labels = {"engine": name}
+        yield "ziris_db_pool_checked_out", "gauge", "Pooled connections in use.", labels, pool["checked_out"]
+        yield "ziris_db_pool_saturation", "gauge", "Checked-out connections over pool size plus overflow.", labels, pool["saturation"] or 0
+        yield "ziris_db_pool_checkout_wait_seconds_total", "counter", "Time spent waiting for a pooled connection.", labels, pool["wait_seconds_total"]
+        yield "ziris_db_pool_timeouts_total", "counter", "Checkouts that timed out waiting for a connection.", labels, pool["timeouts"]
+
+
+@metrics_registry.collector
+def _job_queue_metrics():
+    db = SessionLocal()
+    try:
+        rows = dict(db.query(Job.status, func.count(Job.id)).filter(Job.status.in_(("queued", "running"))).group_by(Job.status).all())
+    finally:
+        db.close()
+    for status_ in ("queued", "running"):
+        yield "ziris_jobs", "gauge", "Background jobs waiting or running, from the jobs table.", {"status": status_}, rows.get(status_, 0)
+
+
+@app.get("/metrics")
+def metrics(authorization: Optional[str] = Header(default=None)):
+    """Prometheus text format for this process. Needs ``Bearer $ZIRIS_METRICS_TOKEN`` when that is set."""
+    if METRICS_TOKEN and not hmac.compare_digest(authorization or "", f"Bearer {METRICS_TOKEN}"):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
+
+
 @app.get("/sensor-data")
-def list_sensor_data(db: Session = Depends(get_db)):
-    rows = db.query(SensorData).order_by(SensorData.id.desc()).limit(100).all()
+async def list_sensor_data(db: AsyncSession = Depends(get_async_db)):
+    rows = (await db.execute(select(SensorData).order_by(SensorData.id.desc()).limit(100))).scalars().all()
     return [
         {
             "id": r.id,
@@ -121,35 +263,16 @@ ALG = "HS256"
 
 # In-memory stores (dev-grade). For production, persist in DB/Redis.
 FAILED_LOGINS: Dict[str, Dict[str, int]] = {}
-RATE_BUCKETS: Dict[str, List[float]] = {}
-REFRESH_TOKENS: Dict[str, Dict[str, Optional[datetime]]] = {}  # user_id -> {token: expires_at}
-BLACKLISTED_REFRESH: set[str] = set()
+# Authenticated users and verified access tokens (backend/principal_cache.py)
+principals = PrincipalCache()
+token_memo = TokenMemo()
+# Sliding-window limits for auth and ingest (ZIRIS_RATE_LIMIT_BACKEND, ZIRIS_RATE_<RULE>)
+rate_limiter = make_limiter()
+# Refresh tokens: keyed by hash, shared across workers (ZIRIS_TOKEN_STORE)
+refresh_store = make_token_store(session_factory=lambda: SessionLocal())
+REFRESH_TTL = timedelta(days=14)
 RESET_TOKENS: Dict[str, Dict[str, Any]] = {}  # token -> {user_id, expires_at}
 
-# Bcrypt hashing helpers
-try:
-    import bcrypt  # type: ignore
-
-    def hash_password(pw: str) -> str:
-        salt = bcrypt.gensalt(rounds=12)
-        return bcrypt.hashpw(pw.encode("utf-8"), salt).decode("utf-8")
-
-    def verify_password(pw: str, hashed: str) -> bool:
-        try:
-            return bcrypt.checkpw(pw.encode("utf-8"), hashed.encode("utf-8"))
-        except Exception:
-            return False
-except Exception:
-    bcrypt = None  # type: ignore
-
-    def hash_password(_pw: str) -> str:
-        # Fallback to SHA-256 with clear error to install bcrypt
-        # This keeps the app running but is not recommended.
-        return hashlib.sha256((_pw or "").encode("utf-8")).hexdigest()
-
-    def verify_password(pw: str, hashed: str) -> bool:
-        return hashlib.sha256(pw.encode("utf-8")).hexdigest() == hashed
-
 def _b64url_encode(data: bytes) -> str:
     return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
 
@@ -169,6 +292,9 @@ def create_token(payload: dict, exp_minutes: int = 60) -> str:
     return f"{header_b64}.{payload_b64}.{sig_b64}"
 
 def decode_token(token: str) -> dict:
+    payload = token_memo.get(token)
+    if payload is not None:
+        return payload
     try:
         header_b64, payload_b64, sig_b64 = token.split('.')
         signing_input = f"{header_b64}.{payload_b64}".encode('utf-8')
@@ -178,42 +304,56 @@ def decode_token(token: str) -> dict:
         payload = json.loads(_b64url_decode(payload_b64).decode('utf-8'))
         if int(payload.get('exp', 0)) < int(datetime.utcnow().timestamp()):
             raise ValueError("Token expired")
+        token_memo.put(token, payload)
         return payload
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
 
 
-# --- Simple rate limiting for auth endpoints (dev) ---
-def _rate_limit(key: str, max_hits: int, per_seconds: int) -> None:
-    now = datetime.utcnow().timestamp()
-    window_start = now - per_seconds
-    hits = RATE_BUCKETS.setdefault(key, [])
-    # drop old
-    RATE_BUCKETS[key] = [t for t in hits if t >= window_start]
-    if len(RATE_BUCKETS[key]) >= max_hits:
-        raise HTTPException(status_code=429, detail="Too many requests")
-    RATE_BUCKETS[key].append(now)
-
-
-def get_current_user(authorization: Optional[str] = Header(default=None), db: Session = Depends(get_db)) -> User:
+def _principal_key(authorization: Optional[str]) -> Any:
+    """Principal cache key for a bearer header: user id, or ("name", username) for legacy dummy tokens."""
     if not authorization or not authorization.lower().startswith("bearer "):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
     token = authorization.split(" ", 1)[1]
     # Back-compat for legacy dummy tokens
     if token.startswith("dummy-"):
-        username = token.split("-", 1)[1]
-        user = db.query(User).filter(User.username == username).first()
-        if not user or not user.is_active:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or unknown user")
-        return user
-    payload = decode_token(token)
-    uid = payload.get("sub")
-    user = db.query(User).filter(User.id == uid).first()
+        return ("name", token.split("-", 1)[1])
+    return decode_token(token).get("sub")
+
+
+def _user_query(key: Any):
+    if isinstance(key, tuple):
+        return select(User).where(User.username == key[1])
+    return select(User).where(User.id == key)
+
+
+def _active_user(user: Optional[User]) -> User:
     if not user or not user.is_active:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Inactive or unknown user")
     return user
 
 
+def get_current_user(authorization: Optional[str] = Header(default=None), db: Session = Depends(get_db)) -> User:
+    key = _principal_key(authorization)
+    user = principals.get(key)
+    if user is None:
+        user = db.execute(_user_query(key)).scalars().first()
+        if user:
+            principals.put(key, user)
+    return _active_user(user)
+
+
+async def get_current_user_async(authorization: Optional[str] = Header(default=None), db: AsyncSession = Depends(get_async_db)) -> User:
+    """get_current_user for async handlers: no threadpool hop, cache misses go through the async engine."""
+    key = _principal_key(authorization)
+    user = principals.get(key)
+    if user is None:
+        user = (await db.execute(_user_query(key))).scalars().first()
+        if user:
+            principals.put(key, user)
+    return _active_user(user)
+
+
 def require_role(*roles: str):
     def _dep(user: User = Depends(get_current_user)) -> User:
         if roles and user.role not in roles:
@@ -222,6 +362,14 @@ def require_role(*roles: str):
     return _dep
 
 
+def require_role_async(*roles: str):
+    async def _dep(user: User = Depends(get_current_user_async)) -> User:
+        if roles and user.role not in roles:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+        return user
+    return _dep
+
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -251,35 +399,30 @@ class ResetConfirmPayload(BaseModel):
     new_password: str
 
 
-@app.post("/auth/login", response_model=TokenResponse)
-def login(payload: LoginPayload, db: Session = Depends(get_db), x_forwarded_for: Optional[str] = Header(default=None)):
-    # rate limit by username and IP (basic)
-    ip = (x_forwarded_for or "").split(",")[0].strip() or "unknown"
-    _rate_limit(f"login:{ip}", max_hits=10, per_seconds=60)
-    _rate_limit(f"login-user:{payload.username}", max_hits=10, per_seconds=60)
-    u = db.query(User).filter(User.username == payload.username).first()
+@app.post("/auth/login", response_model=TokenResponse, dependencies=[Depends(per_ip(rate_limiter, "login"))])
+async def login(payload: LoginPayload, db: Session = Depends(get_db)):
+    # rate limit by username too (the IP limit is the route dependency)
+    rate_limiter.check("login-user", payload.username)
+    u = await run_in_threadpool(lambda: db.query(User).filter(User.username == payload.username).first())
     if not u:
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    if not verify_password(payload.password, u.hashed_password):
-        # Backward-compat: allow legacy SHA-256 hashes and upgrade to bcrypt
-        legacy = hashlib.sha256(payload.password.encode('utf-8')).hexdigest()
-        if legacy != u.hashed_password:
-            raise HTTPException(status_code=401, detail="Invalid credentials")
-        # If bcrypt available, upgrade the stored hash
-        try:
-            if bcrypt is not None:
-                u.hashed_password = hash_password(payload.password)
-                db.commit()
-        except Exception:
-            pass
+    # bcrypt runs on the hashing pool, off the event loop and the request threads
+    ok, new_hash = await verify_and_update_async(payload.password, u.hashed_password or "")
+    if not ok:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
     if not u.is_active:
         raise HTTPException(status_code=403, detail="Account pending approval")
+    return await run_in_threadpool(_complete_login, db, u, new_hash)
+
+
+def _complete_login(db: Session, u: User, new_hash: Optional[str]) -> TokenResponse:
+    if new_hash:
+        # Stored hash used another cost (or legacy SHA-256): upgrade it
+        u.hashed_password = new_hash
     token = create_token({"sub": u.id, "username": u.username, "role": u.role}, exp_minutes=120)
     # issue refresh token (14 days)
     rtoken = secrets.token_urlsafe(48)
-    expires = datetime.utcnow() + timedelta(days=14)
-    store = REFRESH_TOKENS.setdefault(str(u.id), {})
-    store[rtoken] = expires
+    refresh_store.add(rtoken, u.id, datetime.utcnow() + REFRESH_TTL)
     u.last_login_at = datetime.utcnow()
     db.commit()
     try:
@@ -289,17 +432,15 @@ def login(payload: LoginPayload, db: Session = Depends(get_db), x_forwarded_for:
     return TokenResponse(access_token=token, refresh_token=rtoken)
 
 
-@app.post("/auth/register")
-def register(payload: RegisterPayload, db: Session = Depends(get_db), x_forwarded_for: Optional[str] = Header(default=None)):
-    ip = (x_forwarded_for or "").split(",")[0].strip() or "unknown"
-    _rate_limit(f"register:{ip}", max_hits=5, per_seconds=60)
+@app.post("/auth/register", dependencies=[Depends(per_ip(rate_limiter, "register"))])
+def register(payload: RegisterPayload, db: Session = Depends(get_db)):
     if not payload.username or not payload.password:
         raise HTTPException(status_code=400, detail="Missing username or password")
     exists = db.query(User).filter(User.username == payload.username).first()
     if exists:
         raise HTTPException(status_code=400, detail="Username already exists")
     # Require bcrypt for secure hashing
-    if bcrypt is None:
+    if not bcrypt_available:
         raise HTTPException(status_code=500, detail="bcrypt not installed on server. Please install 'bcrypt' package.")
     user = User(username=payload.username, hashed_password=hash_password(payload.password), role="user", is_active=False)
     db.add(user)
@@ -313,30 +454,18 @@ def register(payload: RegisterPayload, db: Session = Depends(get_db), x_forwarde
 
 @app.post("/auth/refresh", response_model=TokenResponse)
 def refresh(payload: RefreshPayload, db: Session = Depends(get_db)):
-    # find refresh token owner
+    # rotate: revoking the old token atomically yields its owner
     token = payload.refresh_token
-    if token in BLACKLISTED_REFRESH:
-        raise HTTPException(status_code=401, detail="Invalid refresh token")
-    owner_id: Optional[str] = None
-    for uid, tokens in REFRESH_TOKENS.items():
-        if token in tokens:
-            owner_id = uid
-            exp = tokens[token]
-            if exp and exp < datetime.utcnow():
-                BLACKLISTED_REFRESH.add(token)
-                del tokens[token]
-                raise HTTPException(status_code=401, detail="Refresh token expired")
-            break
-    if not owner_id:
+    owner_id = refresh_store.consume(token)
+    if owner_id is None:
+        if refresh_store.state(token) == "expired":
+            raise HTTPException(status_code=401, detail="Refresh token expired")
         raise HTTPException(status_code=401, detail="Invalid refresh token")
-    u = db.query(User).filter(User.id == int(owner_id)).first()
+    u = db.query(User).filter(User.id == owner_id).first()
     if not u or not u.is_active:
         raise HTTPException(status_code=401, detail="User inactive")
-    # rotate: blacklist old, issue new refresh
-    BLACKLISTED_REFRESH.add(token)
-    del REFRESH_TOKENS[owner_id][token]
     new_refresh = secrets.token_urlsafe(48)
-    REFRESH_TOKENS.setdefault(owner_id, {})[new_refresh] = datetime.utcnow() + timedelta(days=14)
+    refresh_store.add(new_refresh, u.id, datetime.utcnow() + REFRESH_TTL)
     # new access
     access = create_token({"sub": u.id, "username": u.username, "role": u.role}, exp_minutes=120)
     try:
@@ -348,15 +477,7 @@ def refresh(payload: RefreshPayload, db: Session = Depends(get_db)):
 
 @app.post("/auth/logout")
 def logout(payload: RefreshPayload):
-    tok = payload.refresh_token
-    # blacklist and remove from store
-    BLACKLISTED_REFRESH.add(tok)
-    for uid, tokens in list(REFRESH_TOKENS.items()):
-        if tok in tokens:
-            del tokens[tok]
-            if not tokens:
-                del REFRESH_TOKENS[uid]
-            break
+    refresh_store.revoke(payload.refresh_token)
     return {"status": "logged_out"}
 
 
@@ -386,19 +507,17 @@ def reset_confirm(payload: ResetConfirmPayload, db: Session = Depends(get_db)):
     u = db.query(User).filter(User.id == rec["user_id"]).first()
     if not u:
         raise HTTPException(status_code=404, detail="User not found")
-    if bcrypt is None:
+    if not bcrypt_available:
         raise HTTPException(status_code=500, detail="bcrypt not installed on server. Please install 'bcrypt' package.")
     u.hashed_password = hash_password(payload.new_password)
     db.commit()
+    principals.invalidate(u.id)
     try:
         log_action(db, "reset_confirm", user_id=u.id, details={})
     except Exception:
         pass
     # Invalidate all refresh tokens for the user
-    uid = str(u.id)
-    for t in list(REFRESH_TOKENS.get(uid, {}).keys()):
-        BLACKLISTED_REFRESH.add(t)
-    REFRESH_TOKENS[uid] = {}
+    refresh_store.revoke_user(u.id)
     # cleanup token
     del RESET_TOKENS[payload.token]
     return {"status": "password_updated"}
@@ -416,6 +535,7 @@ def approve_user(user_id: int = Path(..., gt=0), _: User = Depends(require_role(
         raise HTTPException(status_code=404, detail="User not found")
     u.is_active = True
     db.commit()
+    principals.invalidate(u.id)
     try:
         log_action(db, "approve_user", user_id=u.id, details={"approved_user_id": u.id})
     except Exception:
@@ -439,13 +559,26 @@ DEFAULT_THRESHOLDS: Thresholds = Thresholds(temp=80.0, press=8.0, vib=15.0, fume
 CURRENT_THRESHOLDS: Thresholds = Thresholds(**DEFAULT_THRESHOLDS.dict())
 
 
+def _current_thresholds(db: Session) -> Thresholds:
+    """Thresholds used for evaluation: cached DB row, or in-memory defaults if missing."""
+    return _thresholds_of(thresholds_cache.get(db))
+
+
+def _thresholds_of(snap) -> Thresholds:
+    if snap.values is None:
+        return Thresholds(**CURRENT_THRESHOLDS.dict())
+    temp, press, vib, fumee = snap.values
+    return Thresholds(temp=temp, press=press, vib=vib, fumee=fumee)
+
+
+def _zone_thresholds(db: Session) -> ZoneThresholds:
+    """Compiled per-zone lookup; profiles inherit from the global thresholds."""
+    return thresholds_cache.get(db).zones
+
+
 @app.get("/thresholds", response_model=Thresholds)
-def get_thresholds(user: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
-    row = db.query(Threshold).order_by(Threshold.id.asc()).first()
-    if row:
-        return Thresholds(temp=row.temp or 0.0, press=row.press or 0.0, vib=row.vib or 0.0, fumee=row.fumee or 0.0)
-    # fallback to defaults
-    return CURRENT_THRESHOLDS
+async def get_thresholds(user: User = Depends(require_role_async("user", "admin")), db: AsyncSession = Depends(get_async_db)):
+    return _thresholds_of(await thresholds_cache.get_async(db))
 
 
 @app.post("/thresholds", response_model=Thresholds)
@@ -466,9 +599,11 @@ def set_thresholds(payload: Thresholds, user: User = Depends(require_role("admin
         row.vib = vib
         row.fumee = fumee
         row.updated_at = datetime.utcnow()
+        row.version = Threshold.version + 1
     # history
     db.add(ThresholdHistory(temp=temp, press=press, vib=vib, fumee=fumee, changed_at=datetime.utcnow()))
     db.commit()
+    thresholds_cache.invalidate()
     # Keep in-memory thresholds in sync for components that may still reference CURRENT_THRESHOLDS
     try:
         CURRENT_THRESHOLDS.temp = temp
@@ -484,29 +619,142 @@ def set_thresholds(payload: Thresholds, user: User = Depends(require_role("admin
     return Thresholds(temp=temp, press=press, vib=vib, fumee=fumee)
 
 
+class ThresholdProfileIn(BaseModel):
+    zone: str
+    sensor_type: Optional[str] = None  # temperature | pression | vibration | fumee
+    temp: Optional[float] = None
+    press: Optional[float] = None
+    vib: Optional[float] = None
+    fumee: Optional[float] = None
+
+
+class ThresholdProfileOut(ThresholdProfileIn):
+    id: int
+    updated_at: Optional[datetime] = None
+
+
+def _profile_out(p: ThresholdProfile) -> ThresholdProfileOut:
+    return ThresholdProfileOut(id=p.id, zone=p.zone, sensor_type=p.sensor_type, temp=p.temp, press=p.press, vib=p.vib, fumee=p.fumee, updated_at=p.updated_at)
+
+
+@app.get("/thresholds/profiles", response_model=List[ThresholdProfileOut])
+def list_threshold_profiles(user: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
+    rows = db.query(ThresholdProfile).order_by(ThresholdProfile.zone.asc(), ThresholdProfile.id.asc()).all()
+    return [_profile_out(p) for p in rows]
+
+
+@app.put("/thresholds/profiles", response_model=ThresholdProfileOut)
+def put_threshold_profile(payload: ThresholdProfileIn, user: User = Depends(require_role("admin")), db: Session = Depends(get_db)):
+    """Create or replace the profile for (zone, sensor_type); NULL values inherit from the global thresholds."""
+    zone = payload.zone.strip()
+    if not zone:
+        raise HTTPException(status_code=400, detail="zone is required")
+    if payload.sensor_type is not None and payload.sensor_type not in METRICS:
+        raise HTTPException(status_code=400, detail=f"sensor_type must be one of {', '.join(METRICS)}")
+    values = {k: (max(0.0, float(getattr(payload, k))) if getattr(payload, k) is not None else None) for k in THRESHOLD_KEYS}
+    if payload.sensor_type is not None:
+        own = THRESHOLD_KEYS[METRICS.index(payload.sensor_type)]
+        others = [k for k, v in values.items() if k != own and v is not None]
+        if others:
+            raise HTTPException(status_code=400, detail=f"a {payload.sensor_type} profile only sets {own}; got {', '.join(others)}")
+    now = datetime.utcnow()
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        # Atomic upsert: concurrent PUTs for the same (zone, sensor_type) end up in one row
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(ThresholdProfile).values(zone=zone, sensor_type=payload.sensor_type, updated_at=now, **values)
+        if payload.sensor_type is None:
+            stmt = stmt.on_conflict_do_update(index_elements=[ThresholdProfile.zone], index_where=ThresholdProfile.sensor_type.is_(None), set_={**values, "updated_at": now})
+        else:
+            stmt = stmt.on_conflict_do_update(index_elements=[ThresholdProfile.zone, ThresholdProfile.sensor_type], set_={**values, "updated_at": now})
+        pid = db.execute(stmt.returning(ThresholdProfile.id)).scalar()
+        row = db.get(ThresholdProfile, pid, populate_existing=True)
+    else:
+        q = db.query(ThresholdProfile).filter(ThresholdProfile.zone == zone)
+        q = q.filter(ThresholdProfile.sensor_type.is_(None)) if payload.sensor_type is None else q.filter(ThresholdProfile.sensor_type == payload.sensor_type)
+        row = q.first()
+        if not row:
+            row = ThresholdProfile(zone=zone, sensor_type=payload.sensor_type)
+            db.add(row)
+        for k, v in values.items():
+            setattr(row, k, v)
+        row.updated_at = now
+    bump_version(db)
+    db.commit()
+    thresholds_cache.invalidate()
+    try:
+        log_action(db, "set_threshold_profile", user_id=user.id, details={"zone": zone, "sensor_type": payload.sensor_type, **values})
+    except Exception:
+        pass
+    return _profile_out(row)
+
+
+@app.delete("/thresholds/profiles/{profile_id}")
+def delete_threshold_profile(profile_id: int = Path(..., gt=0), user: User = Depends(require_role("admin")), db: Session = Depends(get_db)):
+    row = db.query(ThresholdProfile).filter(ThresholdProfile.id == profile_id).first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    details = {"zone": row.zone, "sensor_type": row.sensor_type}
+    db.delete(row)
+    bump_version(db)
+    db.commit()
+    thresholds_cache.invalidate()
+    try:
+        log_action(db, "delete_threshold_profile", user_id=user.id, details=details)
+    except Exception:
+        pass
+    return {"status": "deleted"}
+
+
+@app.get("/thresholds/zones", response_model=Dict[str, Thresholds])
+def get_zone_thresholds(user: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
+    """Effective thresholds of every zone that has a profile (other zones use GET /thresholds)."""
+    compiled = _zone_thresholds(db)
+    return {zone: Thresholds(**dict(zip(THRESHOLD_KEYS, v.tolist()))) for zone, v in sorted(compiled.zones.items())}
+
+
+def _suggest(db: Session, strategy: str, k: float, q: float, window_hours: float, per_zone: bool) -> Dict[Optional[str], Thresholds]:
+    if strategy not in SUGGEST_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"strategy must be one of {', '.join(SUGGEST_STRATEGIES)}")
+    if not 0.0 < q < 1.0 or k < 0 or window_hours <= 0:
+        raise HTTPException(status_code=400, detail="q must be in (0, 1), k >= 0 and window_hours > 0")
+    out = suggest(db, strategy=strategy, k=k, q=q, window_hours=window_hours, per_zone=per_zone)
+    return {zone: Thresholds(temp=v["temp"], press=v["press"], vib=v["vib"], fumee=v["fumee"]) for zone, v in out.items()}
+
+
 @app.get("/thresholds/suggest", response_model=Thresholds)
-def suggest_thresholds(user: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
-    """Suggests thresholds based on mean + 2*std of recent data."""
-    rows = db.query(SensorData).order_by(SensorData.timestamp.desc()).limit(500).all()
-    import math
+def suggest_thresholds(
+    strategy: str = "mean_ksigma",
+    k: float = 2.0,
+    q: float = 0.99,
+    window_hours: float = DEFAULT_WINDOW_HOURS,
+    user: User = Depends(require_role("user", "admin")),
+    db: Session = Depends(get_db),
+):
+    """Suggests thresholds from readings of the last `window_hours`, aggregated in the database.
+
+    - strategy=mean_ksigma: mean + k*std (default k=2)
+    - strategy=quantile: q-th percentile (default q=0.99)
+    - strategy=mad: median + k*1.4826*MAD
+    """
+    out = _suggest(db, strategy, k, q, window_hours, per_zone=False)
+    return out.get(None) or Thresholds(temp=0.0, press=0.0, vib=0.0, fumee=0.0)
 
-    def stats(values: List[float]) -> float:
-        vals = [float(v) for v in values if v is not None]
-        if not vals:
-            return 0.0
-        n = len(vals)
-        mean = sum(vals) / n
-        var = sum((x - mean) ** 2 for x in vals) / max(n, 1)
-        std = math.sqrt(var)
-        return max(0.0, mean + 2.0 * std)
-
-    sugg = Thresholds(
-        temp=stats([r.temperature or 0.0 for r in rows]),
-        press=stats([r.pression or 0.0 for r in rows]),
-        vib=stats([r.vibration or 0.0 for r in rows]),
-        fumee=stats([r.fumee or 0.0 for r in rows]),
-    )
-    return sugg
+
+@app.get("/thresholds/suggest/zones", response_model=Dict[str, Thresholds])
+def suggest_zone_thresholds(
+    strategy: str = "mean_ksigma",
+    k: float = 2.0,
+    q: float = 0.99,
+    window_hours: float = DEFAULT_WINDOW_HOURS,
+    user: User = Depends(require_role("user", "admin")),
+    db: Session = Depends(get_db),
+):
+    """Same as /thresholds/suggest, computed for every zone in one query."""
+    return _suggest(db, strategy, k, q, window_hours, per_zone=True)
 
 # ----------------------
 # Dashboard data schema
@@ -529,39 +777,30 @@ class DashboardData(BaseModel):
 
 
 @app.get("/dashboard/data", response_model=DashboardData)
-def get_dashboard_data(user: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
-
-    # Aggregate data
-    rows = db.query(SensorData).all()
-    total = len(rows)
-    anomalies = sum(1 for r in rows if r.anomaly)
+async def get_dashboard_data(user: User = Depends(require_role_async("user", "admin")), db: AsyncSession = Depends(get_async_db)):
+    # Aggregate data from the maintained per-zone rollups (one row per zone)
+    rollups = (await db.execute(select(ZoneRollup))).scalars().all()
+    total = 0
+    anomalies = 0
     zones: Dict[str, ZoneData] = {}
     latest_ts: Optional[datetime] = None
 
-    from collections import defaultdict
-
-    agg = defaultdict(lambda: {"count": 0, "anoms": 0, "temp": 0.0, "press": 0.0, "vib": 0.0, "fumee": 0.0})
-    for r in rows:
-        z = r.zone or "Unknown"
-        agg[z]["count"] += 1
-        agg[z]["anoms"] += 1 if r.anomaly else 0
-        agg[z]["temp"] += float(r.temperature or 0.0)
-        agg[z]["press"] += float(r.pression or 0.0)
-        agg[z]["vib"] += float(r.vibration or 0.0)
-        agg[z]["fumee"] += float(r.fumee or 0.0)
-        if r.timestamp and (latest_ts is None or r.timestamp > latest_ts):
-            latest_ts = r.timestamp
-
-    for z, a in agg.items():
-        c = max(a["count"], 1)
-        zones[z] = ZoneData(
-            total=a["count"],
-            anomalies=a["anoms"],
-            temp=a["temp"]/c,
-            press=a["press"]/c,
-            vib=a["vib"]/c,
-            fumee=a["fumee"]/c,
+    for a in rollups:
+        if not a.total:
+            continue
+        c = max(a.total, 1)
+        total += a.total
+        anomalies += a.anomalies or 0
+        zones[a.zone] = ZoneData(
+            total=a.total,
+            anomalies=a.anomalies or 0,
+            temp=(a.sum_temp or 0.0)/c,
+            press=(a.sum_press or 0.0)/c,
+            vib=(a.sum_vib or 0.0)/c,
+            fumee=(a.sum_fumee or 0.0)/c,
         )
+        if a.last_ts and (latest_ts is None or a.last_ts > latest_ts):
+            latest_ts = a.last_ts
 
     return DashboardData(
         total_sensors=total,
@@ -571,6 +810,39 @@ def get_dashboard_data(user: User = Depends(require_role("user", "admin")), db:
     )
 
 
+class MetricStats(BaseModel):
+    min: float
+    max: float
+    mean: float
+
+
+class TrendBucket(BaseModel):
+    zone: str
+    bucket_start: datetime
+    count: int
+    anomalies: int
+    temp: MetricStats
+    press: MetricStats
+    vib: MetricStats
+    fumee: MetricStats
+
+
+@app.get("/sensor-data/trend", response_model=List[TrendBucket])
+def get_sensor_trend(
+    user: User = Depends(require_role("user", "admin")),
+    db: Session = Depends(get_db),
+    hours: int = 24,
+    bucket: str = "hour",  # minute | hour
+    zone: Optional[str] = None,
+):
+    """Per-zone min/max/mean buckets; older ranges come from retention rollups."""
+    if bucket not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"bucket must be one of {', '.join(GRANULARITIES)}")
+    hours = max(1, min(int(hours), 24 * 366))
+    since = datetime.utcnow() - timedelta(hours=hours)
+    return [TrendBucket(**b) for b in read_trend(db, since, granularity=bucket, zone=zone)]
+
+
 # ----------------------
 # Recommendations
 # ----------------------
@@ -586,53 +858,29 @@ class Recommendation(BaseModel):
 
 
 @app.get("/sensor/recommendations", response_model=List[Recommendation])
-def get_recommendations(user: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
-    # load thresholds from DB or defaults
-    thr_row = db.query(Threshold).order_by(Threshold.id.asc()).first()
-    thr = Thresholds(
-        temp=(thr_row.temp if thr_row else CURRENT_THRESHOLDS.temp),
-        press=(thr_row.press if thr_row else CURRENT_THRESHOLDS.press),
-        vib=(thr_row.vib if thr_row else CURRENT_THRESHOLDS.vib),
-        fumee=(thr_row.fumee if thr_row else CURRENT_THRESHOLDS.fumee),
-    )
-    rows = db.query(SensorData).order_by(SensorData.timestamp.desc()).limit(50).all()
+async def get_recommendations(user: User = Depends(require_role_async("user", "admin")), db: AsyncSession = Depends(get_async_db)):
+    cols = await db.run_sync(load_window, 50)
+    # Use dynamic per-zone thresholds (DB-backed), evaluated over the whole window at once
+    zones = (await thresholds_cache.get_async(db)).zones
+    ev = evaluate(cols, zones.for_rows(cols["zone"]))
     recs: List[Recommendation] = []
-    for r in rows:
-        reasons: List[str] = []
-        priority = "normale"
-        # Use dynamic thresholds (DB-backed)
-        if (r.temperature or 0) > thr.temp:
-            reasons.append("Température élevée")
-        if (r.pression or 0) > thr.press:
-            reasons.append("Pression élevée")
-        if (r.vibration or 0) > thr.vib:
-            reasons.append("Vibration élevée")
-        if (r.fumee or 0) > thr.fumee:
-            reasons.append("Fumée élevée")
-        if r.flamme:
-            reasons.append("Présence de flamme")
-        if r.anomaly:
-            reasons.append("Anomalie détectée")
-
-        if any(k in reasons for k in ["Présence de flamme"]):
-            priority = "critique"
-        elif any(k in reasons for k in ["Température élevée", "Pression élevée", "Vibration élevée", "Fumée élevée"]):
-            priority = "élevée"
-
-        if reasons:
-            recs.append(Recommendation(
-                id=r.id,
-                zone=r.zone or "Unknown",
-                risk_area=(r.zone or "Unknown"),
-                timestamp=(r.timestamp.isoformat() if r.timestamp else datetime.utcnow().isoformat()),
-                reasons=reasons,
-                priority=priority,
-                recommendation=(
-                    "Intervention immédiate requise" if priority == "critique" else
-                    "Inspecter la zone dans les 24h" if priority == "élevée" else
-                    "Surveiller"
-                ),
-            ))
+    for i in ev.reasons.nonzero()[0].tolist():
+        priority = PRIORITIES[ev.priority[i]]
+        ts = cols["timestamp"][i]
+        zone = cols["zone"][i] or "Unknown"
+        recs.append(Recommendation(
+            id=int(cols["id"][i]),
+            zone=zone,
+            risk_area=zone,
+            timestamp=(ts.isoformat() if ts else datetime.utcnow().isoformat()),
+            reasons=reason_labels(int(ev.reasons[i])),
+            priority=priority,
+            recommendation=(
+                "Intervention immédiate requise" if priority == "critique" else
+                "Inspecter la zone dans les 24h" if priority == "élevée" else
+                "Surveiller"
+            ),
+        ))
 
     return recs
 
@@ -652,12 +900,35 @@ class SensorItem(BaseModel):
     timestamp: Optional[str] = None  # ISO8601; if absent, use now
 
 
-@app.post("/sensor-data/ingest")
+def _publish_ingest_alerts(db: Session, cols: Dict[str, Any]) -> None:
+    """Push one alert per zone for new anomalies / threshold exceedances in a batch."""
+    if not hub.active or not len(cols["zone"]):
+        return
+    ev = evaluate(cols, _zone_thresholds(db).for_rows(cols["zone"]))
+    zones = np.asarray(cols["zone"], dtype=object)
+    flagged = (ev.counts > 0) | cols["anomaly"] | cols["flamme"]
+    for z in set(zones[flagged].tolist()):
+        in_zone = flagged & (zones == z)
+        n_anom = int(np.count_nonzero(in_zone & cols["anomaly"]))
+        n_exc = int(np.count_nonzero(in_zone & (ev.counts > 0)))
+        priority = PRIORITIES[int(ev.priority[in_zone].max())]
+        hub.publish(
+            "alert",
+            f"{z or 'Unknown'} : {n_anom} anomalie(s), {n_exc} dépassement(s) de seuil (priorité {priority})",
+            zone=z or "Unknown",
+            anomalies=n_anom,
+            exceedances=n_exc,
+            priority=priority,
+        )
+
+
+@app.post("/sensor-data/ingest", dependencies=[Depends(per_ip(rate_limiter, "ingest"))])
 def ingest_sensor_data(payload: List[SensorItem], user: User = Depends(require_role("admin")), db: Session = Depends(get_db)):
     """Ingest explicit sensor rows. Useful to push fresh data during development/tests."""
     from datetime import datetime
 
     inserted = 0
+    rows: List[SensorData] = []
     for p in payload:
         try:
             ts = None
@@ -680,11 +951,16 @@ def ingest_sensor_data(payload: List[SensorItem], user: User = Depends(require_r
                 anomaly=bool(p.anomaly),
             )
             db.add(row)
+            rows.append(row)
             inserted += 1
         except Exception:
             # skip bad row
             continue
+    record_rows(db, rows)
+    cols = columns_from_readings(rows)
     db.commit()
+    ingest_rows.inc(inserted, mode="json")
+    _publish_ingest_alerts(db, cols)
     try:
         log_action(db, "ingest", user_id=user.id, details={"inserted": inserted})
     except Exception:
@@ -692,6 +968,122 @@ def ingest_sensor_data(payload: List[SensorItem], user: User = Depends(require_r
     return {"inserted": inserted}
 
 
+class BulkIngestResponse(BaseModel):
+    inserted: int
+    rejected: int
+    rejects: List[Dict[str, Any]]
+
+
+@app.post("/sensor-data/ingest/bulk", response_model=BulkIngestResponse, dependencies=[Depends(per_ip(rate_limiter, "ingest"))])
+def ingest_sensor_data_bulk(payload: List[Dict[str, Any]], user: User = Depends(require_role("admin")), db: Session = Depends(get_db)):
+    """Bulk ingest of SensorItem-shaped rows.
+
+    The batch is validated column-wise and written with COPY (PostgreSQL) or a
+    single executemany INSERT; invalid rows are returned in `rejects` with
+    their index in the payload instead of failing the whole request.
+    """
+    cols, rejects = validate_records(payload)
+    try:
+        inserted = write_columns(db, cols)
+        record_columns(db, cols)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Bulk insert failed: {e}")
+    ingest_rows.inc(inserted, mode="bulk")
+    ingest_rejected.inc(len(rejects), mode="bulk")
+    _publish_ingest_alerts(db, cols)
+    try:
+        log_action(db, "ingest", user_id=user.id, details={"inserted": inserted, "rejected": len(rejects), "mode": "bulk"})
+    except Exception:
+        pass
+    return BulkIngestResponse(inserted=inserted, rejected=len(rejects), rejects=rejects)
+
+
+class StreamIngestResponse(BaseModel):
+    accepted: int
+    rejected: int
+    chunks: int
+    rejects: List[Dict[str, Any]]  # first MAX_STREAM_REJECTS only
+
+
+MAX_STREAM_REJECTS = 100
+
+
+@app.post("/sensor-data/ingest/stream", response_model=StreamIngestResponse, dependencies=[Depends(per_ip(rate_limiter, "ingest"))])
+async def ingest_sensor_data_stream(
+    request: Request,
+    format: Optional[str] = None,  # ndjson | csv; defaults to Content-Type
+    chunk_size: int = 5000,
+    user: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    """Streamed NDJSON or CSV ingestion (CSV uses the ziris_export.csv layout).
+
+    The body is parsed as it arrives and flushed in chunks of `chunk_size`
+    rows, each committed on its own, so memory does not grow with the upload.
+    Rejected rows are reported by 1-based line number.
+    """
+    fmt = detect_format(request.headers.get("content-type"), format)
+    if not fmt:
+        raise HTTPException(status_code=415, detail="Use Content-Type application/x-ndjson or text/csv (or ?format=ndjson|csv)")
+    chunk_size = max(100, min(int(chunk_size), 50000))
+    parser = StreamParser(fmt)
+    counts = {"accepted": 0, "rejected": 0, "chunks": 0}
+    rejects: List[Dict[str, Any]] = []
+    pending: List[Dict[str, Any]] = []
+    lines: List[int] = []
+
+    def reject(line: int, reason: str) -> None:
+        counts["rejected"] += 1
+        ingest_rejected.inc(mode="stream")
+        if len(rejects) < MAX_STREAM_REJECTS:
+            rejects.append({"line": line, "reason": reason})
+
+    def flush_chunk(records: List[Dict[str, Any]], line_nos: List[int]) -> None:
+        cols, bad = validate_records(records)
+        for b in bad:
+            reject(line_nos[b["index"]], b["reason"])
+        try:
+            written = write_columns(db, cols)
+            record_columns(db, cols)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        counts["accepted"] += written
+        ingest_rows.inc(written, mode="stream")
+        counts["chunks"] += 1
+        _publish_ingest_alerts(db, cols)
+
+    async def drain(items) -> None:
+        nonlocal pending, lines
+        for line_no, rec, err in items:
+            if err:
+                reject(line_no, err)
+                continue
+            pending.append(rec)
+            lines.append(line_no)
+            if len(pending) >= chunk_size:
+                batch, batch_lines = pending, lines
+                pending, lines = [], []
+                await run_in_threadpool(flush_chunk, batch, batch_lines)
+
+    try:
+        async for data in request.stream():
+            await drain(parser.feed(data))
+        await drain(parser.finish())
+        if pending:
+            await run_in_threadpool(flush_chunk, pending, lines)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Stream ingest failed after {counts['accepted']} rows: {e}")
+    try:
+        log_action(db, "ingest", user_id=user.id, details={"inserted": counts["accepted"], "rejected": counts["rejected"], "mode": f"stream-{fmt}"})
+    except Exception:
+        pass
+    return StreamIngestResponse(rejects=rejects, **counts)
+
+
 @app.post("/dev/seed")
 def seed_sensor_data(
     n: int = 50,
@@ -703,15 +1095,8 @@ def seed_sensor_data(
 
     Query params:
     - n: number of rows to generate
-    - contamination: anomaly rate for IsolationForest (0..1)
+    - contamination: share of rows generated as labelled anomalies (0..1)
     """
-    from datetime import datetime
-    try:
-        from .data_generator import generate_sensor_data, detect_anomalies
-    except Exception:
-        # If the generator is unavailable, insert nothing
-        return {"inserted": 0, "detail": "data_generator not available"}
-
     # sanitize inputs
     n = max(1, int(n))
     try:
@@ -720,27 +1105,12 @@ def seed_sensor_data(
         contamination = 0.1
     contamination = max(0.0, min(1.0, contamination))
 
-    data = generate_sensor_data(n)
-    data = detect_anomalies(data, contamination=contamination)
-
-    for d in data:
-        row = SensorData(
-            timestamp=datetime.utcnow(),
-            zone=d.get("zone") or "Unknown",
-            temperature=float(d.get("temperature") or 0.0),
-            pression=float(d.get("pression") or 0.0),
-            vibration=float(d.get("vibration") or 0.0),
-            fumee=float(d.get("fumee") or 0.0),
-            flamme=bool(d.get("flamme") or False),
-            anomaly=bool(d.get("anomaly") or False),
-        )
-        db.add(row)
-    db.commit()
+    result = seed(db, n, contamination=contamination, interval_seconds=0, on_batch=lambda cols: _publish_ingest_alerts(db, cols))
     try:
-        log_action(db, "seed", user_id=user.id, details={"n": len(data)})
+        log_action(db, "seed", user_id=user.id, details={"n": result["inserted"]})
     except Exception:
         pass
-    return {"inserted": len(data)}
+    return {"inserted": result["inserted"]}
 
 
 # ----------------------
@@ -768,8 +1138,8 @@ def get_lstm_metrics(
     rule: str = "any",  # any | k2 | k3 | k4
 ):
 
-    rows = db.query(SensorData).order_by(SensorData.timestamp.desc()).limit(300).all()
-    if not rows:
+    cols = load_window(db, 300)
+    if not len(cols["id"]):
         return LSTMMetrics(
             accuracy=0.9,
             mse=0.05,
@@ -777,61 +1147,18 @@ def get_lstm_metrics(
             tp=0, fp=0, tn=0, fn=0, precision=0.0, recall=0.0, f1=0.0,
         )
 
-    n = len(rows)
-    avg_temp = sum(float(r.temperature or 0) for r in rows) / n
-    avg_press = sum(float(r.pression or 0) for r in rows) / n
-    avg_vib = sum(float(r.vibration or 0) for r in rows) / n
-    avg_fumee = sum(float(r.fumee or 0) for r in rows) / n
+    values = np.column_stack([cols["temperature"], cols["pression"], cols["vibration"], cols["fumee"]])
+    avg_temp, avg_press, avg_vib, avg_fumee = (float(v) for v in values.mean(axis=0))
     # Placeholder metrics derived from variability
-    var = sum(
-        (float(r.temperature or 0) - avg_temp) ** 2 +
-        (float(r.pression or 0) - avg_press) ** 2 +
-        (float(r.vibration or 0) - avg_vib) ** 2 +
-        (float(r.fumee or 0) - avg_fumee) ** 2
-        for r in rows
-    ) / max(n, 1)
+    var = float(values.var(axis=0).sum())
     mse = min(var / 1000.0, 10.0)
     accuracy = max(0.5, 1.0 - mse / 10.0)
 
     # Confusion matrix approximation: predicted anomaly if any metric exceeds current thresholds
-    # Load thresholds from DB (fall back to in-memory defaults if missing)
-    thr_row = db.query(Threshold).order_by(Threshold.id.asc()).first()
-    thr = Thresholds(
-        temp=(thr_row.temp if thr_row else CURRENT_THRESHOLDS.temp),
-        press=(thr_row.press if thr_row else CURRENT_THRESHOLDS.press),
-        vib=(thr_row.vib if thr_row else CURRENT_THRESHOLDS.vib),
-        fumee=(thr_row.fumee if thr_row else CURRENT_THRESHOLDS.fumee),
-    )
-    tp = fp = tn = fn = 0
+    # Per-zone thresholds from DB (fall back to in-memory defaults if missing)
     # map rule to k-of-4 threshold
-    k_req = 1
-    r = (rule or "any").lower()
-    if r == "k2":
-        k_req = 2
-    elif r == "k3":
-        k_req = 3
-    elif r == "k4":
-        k_req = 4
-    for r in rows:
-        c = 0
-        if float(r.temperature or 0.0) > float(thr.temp):
-            c += 1
-        if float(r.pression or 0.0) > float(thr.press):
-            c += 1
-        if float(r.vibration or 0.0) > float(thr.vib):
-            c += 1
-        if float(r.fumee or 0.0) > float(thr.fumee):
-            c += 1
-        pred = (c >= k_req)
-        truth = bool(r.anomaly)
-        if pred and truth:
-            tp += 1
-        elif pred and not truth:
-            fp += 1
-        elif not pred and not truth:
-            tn += 1
-        else:
-            fn += 1
+    ev = evaluate(cols, _zone_thresholds(db).for_rows(cols["zone"]))
+    tp, fp, tn, fn = confusion(ev.predicted(rule_k(rule)), cols["anomaly"])
 
     precision = (tp / (tp + fp)) if (tp + fp) > 0 else 0.0
     recall = (tp / (tp + fn)) if (tp + fn) > 0 else 0.0
@@ -1023,80 +1350,80 @@ class JobInfo(BaseModel):
     updated_at: datetime
     params: Optional[dict] = None
     error: Optional[str] = None
+    attempts: int = 0
 
 
-JOBS: Dict[str, JobInfo] = {}
-JOB_LOCK = threading.Lock()
+# Jobs live in the `jobs` table; a fixed pool of worker threads per process runs them
+job_pool = JobWorkerPool(lambda: SessionLocal(), workers=JOB_WORKERS)
 
 
 def _update_job(jid: str, **fields: Any) -> None:
-    with JOB_LOCK:
-        job = JOBS.get(jid)
+    db = SessionLocal()
+    try:
+        job = update_job(db, jid, **fields)
         if not job:
             return
-        for k, v in fields.items():
-            setattr(job, k, v)
-        job.updated_at = datetime.utcnow()
-        JOBS[jid] = job
+        job = JobInfo(**job_dict(job))
+    finally:
+        db.close()
+    # Progress of one job coalesces for slow WebSocket consumers
+    hub.publish(
+        "job",
+        f"Job {job.type} : {job.status} ({job.progress}%)" + (f" - {job.error}" if job.error else ""),
+        coalesce_key=f"job:{jid}",
+        admin_only=True,
+        job_id=jid,
+        job_type=job.type,
+        status=job.status,
+        progress=job.progress,
+    )
 
 
-def _run_seed_job(jid: str, n: int) -> None:
-    _update_job(jid, status="running", progress=0)
+def _run_seed_job(jid: str, params: Dict[str, Any]) -> None:
     db = SessionLocal()
+    written = [0]
     try:
-        # reuse generator if available to keep logic consistent
+        def progress(done: int, total: int) -> None:
+            _update_job(jid, progress=int((done / max(total, 1)) * 100))
+
+        def committed(cols: Dict[str, Any]) -> None:
+            written[0] += len(cols["zone"])
+
         try:
-            from .data_generator import generate_sensor_data, detect_anomalies  # type: ignore
-            data = generate_sensor_data(max(1, int(n)))
-            data = detect_anomalies(data)
+            result = seed(
+                db,
+                max(1, int(params.get("n", 200))),
+                batch_size=int(params.get("batch_size") or SEED_BATCH),
+                contamination=float(params.get("contamination", 0.1)),
+                profiles=SCENARIOS[params.get("scenario") or "normal"],
+                progress=ProgressThrottle(progress),
+                on_batch=committed,
+            )
+        except Exception as e:
+            # Batches are committed as they go: a retry would insert them again
+            raise JobError(f"{e or e.__class__.__name__} ({written[0]} rows already written)") from e
+        try:
+            log_action(db, "job_seed", user_id=None, details=result)
         except Exception:
-            data = []
+            pass
+    finally:
+        try:
+            db.close()
+        except Exception:
+            pass
 
-        total = len(data) if data else n
-        inserted = 0
-        for i in range(total or 1):
-            try:
-                if data:
-                    d = data[i]
-                    row = SensorData(
-                        timestamp=datetime.utcnow(),
-                        zone=d.get("zone") or "Unknown",
-                        temperature=float(d.get("temperature") or 0.0),
-                        pression=float(d.get("pression") or 0.0),
-                        vibration=float(d.get("vibration") or 0.0),
-                        fumee=float(d.get("fumee") or 0.0),
-                        flamme=bool(d.get("flamme") or False),
-                        anomaly=bool(d.get("anomaly") or False),
-                    )
-                else:
-                    # fallback deterministic data
-                    row = SensorData(
-                        timestamp=datetime.utcnow(),
-                        zone="Z1",
-                        temperature=20.0,
-                        pression=1.0,
-                        vibration=0.5,
-                        fumee=5.0,
-                        flamme=False,
-                        anomaly=False,
-                    )
-                db.add(row)
-                inserted += 1
-            except Exception as e:
-                # best-effort, continue
-                _ = str(e)
-            if (i + 1) % 25 == 0:
-                db.commit()
-            _update_job(jid, progress=int(((i + 1) / max(total, 1)) * 100))
-            time.sleep(0.01)
-        db.commit()
+
+def _run_retrain_job(jid: str, params: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        # Fit on the sliding window; the scoring loop swaps to the new version
+        model = scorer.retrain(db)
+        if model is None:
+            raise JobError("Pas assez de données récentes pour entraîner le modèle")
         try:
-            log_action(db, "job_seed", user_id=None, details={"inserted": inserted})
+            log_action(db, "job_retrain", user_id=None, details=model.meta())
         except Exception:
             pass
-        _update_job(jid, status="completed", progress=100)
-    except Exception as e:
-        _update_job(jid, status="failed", error=str(e))
     finally:
         try:
             db.close()
@@ -1104,21 +1431,20 @@ def _run_seed_job(jid: str, n: int) -> None:
             pass
 
 
-def _run_retrain_job(jid: str) -> None:
-    _update_job(jid, status="running", progress=0)
+def _run_retention_job(jid: str, params: Dict[str, Any]) -> None:
     db = SessionLocal()
     try:
-        steps = 20
-        for i in range(steps):
-            time.sleep(0.1)
-            _update_job(jid, progress=int(((i + 1) / steps) * 100))
+        def progress(done: int, total: int) -> None:
+            _update_job(jid, progress=int((done / max(total, 1)) * 100))
+
+        result = run_retention(db, progress=progress, **params)
         try:
-            log_action(db, "job_retrain", user_id=None, details={})
+            log_action(db, "job_retention", user_id=None, details=result)
         except Exception:
             pass
-        _update_job(jid, status="completed", progress=100)
-    except Exception as e:
-        _update_job(jid, status="failed", error=str(e))
+    except Exception:
+        db.rollback()
+        raise
     finally:
         try:
             db.close()
@@ -1126,31 +1452,72 @@ def _run_retrain_job(jid: str) -> None:
             pass
 
 
+job_pool.register("seed", _run_seed_job)
+job_pool.register("retrain", _run_retrain_job)
+job_pool.register("retention", _run_retention_job)
+
+
+class ScoringStatus(BaseModel):
+    model: Optional[Dict[str, Any]] = None
+    scored: int
+    flagged: int
+    pending: int
+
+
+@app.get("/scoring/status", response_model=ScoringStatus)
+def scoring_status(_: User = Depends(require_role("user", "admin")), db: Session = Depends(get_db)):
+    """Current anomaly model version and readings still waiting to be scored."""
+    pending = db.query(SensorData.id).filter(SensorData.anomaly_score.is_(None)).count()
+    return ScoringStatus(pending=pending, **scorer.stats())
+
+
 class JobStartResponse(BaseModel):
     job_id: str
     status: str
 
 
-@app.post("/jobs/seed", response_model=JobStartResponse)
-def start_seed_job(n: int = 200, _: User = Depends(require_role("admin"))):
-    jid = uuid.uuid4().hex
-    now = datetime.utcnow()
-    with JOB_LOCK:
-        JOBS[jid] = JobInfo(id=jid, type="seed", status="queued", progress=0, created_at=now, updated_at=now, params={"n": n})
-    t = threading.Thread(target=_run_seed_job, args=(jid, n), daemon=True)
-    t.start()
+def _start_job(db: Session, type: str, params: Optional[Dict[str, Any]] = None, **kwargs: Any) -> JobStartResponse:
+    jid = enqueue(db, type, params, **kwargs).id
+    job_pool.notify()
     return JobStartResponse(job_id=jid, status="queued")
 
 
+@app.post("/jobs/seed", response_model=JobStartResponse)
+def start_seed_job(
+    n: int = 200,
+    batch_size: int = SEED_BATCH,
+    contamination: float = 0.1,
+    scenario: str = "normal",
+    _: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    """Insert `n` synthetic readings in batches of `batch_size`; suitable for multi-million-row load tests."""
+    if n < 1 or batch_size < 1 or not 0.0 <= contamination <= 1.0:
+        raise HTTPException(status_code=400, detail="n and batch_size must be >= 1, contamination within [0, 1]")
+    if scenario not in SCENARIOS:
+        raise HTTPException(status_code=400, detail=f"scenario must be one of {', '.join(SCENARIOS)}")
+    # Not retried: batches already committed would be inserted again (also after a lost heartbeat)
+    return _start_job(db, "seed", {"n": n, "batch_size": batch_size, "contamination": contamination, "scenario": scenario}, max_attempts=1)
+
+
 @app.post("/jobs/retrain", response_model=JobStartResponse)
-def start_retrain_job(_: User = Depends(require_role("admin"))):
-    jid = uuid.uuid4().hex
-    now = datetime.utcnow()
-    with JOB_LOCK:
-        JOBS[jid] = JobInfo(id=jid, type="retrain", status="queued", progress=0, created_at=now, updated_at=now)
-    t = threading.Thread(target=_run_retrain_job, args=(jid,), daemon=True)
-    t.start()
-    return JobStartResponse(job_id=jid, status="queued")
+def start_retrain_job(_: User = Depends(require_role("admin")), db: Session = Depends(get_db)):
+    return _start_job(db, "retrain")
+
+
+@app.post("/jobs/retention", response_model=JobStartResponse)
+def start_retention_job(
+    older_than_days: int = RETENTION_DAYS,
+    granularity: str = RETENTION_GRANULARITY,
+    batch_size: int = RETENTION_BATCH,
+    _: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    """Downsample readings older than `older_than_days` into rollups, then purge them."""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+    params = {"older_than_days": older_than_days, "granularity": granularity, "batch_size": batch_size}
+    return _start_job(db, "retention", params)
 
 
 class JobSummary(BaseModel):
@@ -1162,18 +1529,26 @@ class JobSummary(BaseModel):
 
 
 @app.get("/jobs", response_model=List[JobSummary])
-def list_jobs(_: User = Depends(require_role("admin"))):
-    with JOB_LOCK:
-        return [JobSummary(id=j.id, type=j.type, status=j.status, progress=j.progress, updated_at=j.updated_at) for j in JOBS.values()]
+def list_jobs(
+    status: Optional[str] = None,
+    limit: int = 100,
+    _: User = Depends(require_role("admin")),
+    db: Session = Depends(get_db),
+):
+    """Most recent jobs first, optionally filtered by status."""
+    q = db.query(Job)
+    if status:
+        q = q.filter(Job.status == status)
+    rows = q.order_by(Job.created_at.desc()).limit(max(1, min(limit, 1000))).all()
+    return [JobSummary(id=j.id, type=j.type, status=j.status, progress=j.progress or 0, updated_at=j.updated_at) for j in rows]
 
 
 @app.get("/jobs/{job_id}", response_model=JobInfo)
-def get_job(job_id: str, _: User = Depends(require_role("admin"))):
-    with JOB_LOCK:
-        j = JOBS.get(job_id)
-        if not j:
-            raise HTTPException(status_code=404, detail="Job not found")
-        return j
+def get_job(job_id: str, _: User = Depends(require_role("admin")), db: Session = Depends(get_db)):
+    j = db.get(Job, job_id)
+    if not j:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobInfo(**job_dict(j))
 
 
 # ----------------------
@@ -1252,6 +1627,8 @@ def list_suggestions(
     user_id: Optional[int] = None,
     search: Optional[str] = None,
     sort: Optional[str] = "created_at.desc",
+    cursor: Optional[str] = None,
+    count: str = "exact",
 ):
     q = db.query(Suggestion)
     if status:
@@ -1263,24 +1640,20 @@ def list_suggestions(
     if search:
         like = f"%{search}%"
         q = q.filter(Suggestion.text.ilike(like))
-    # sorting
-    if sort == "created_at.asc":
-        q = q.order_by(Suggestion.created_at.asc())
-    elif sort == "updated_at.asc":
-        q = q.order_by(Suggestion.updated_at.asc())
-    elif sort == "updated_at.desc":
-        q = q.order_by(Suggestion.updated_at.desc())
-    else:
-        q = q.order_by(Suggestion.created_at.desc())
-    total = q.count()
+    # sorting (id breaks ties so keyset cursors are stable)
+    sorts = {
+        "created_at.desc": (Suggestion.created_at, True),
+        "created_at.asc": (Suggestion.created_at, False),
+        "updated_at.asc": (Suggestion.updated_at, False),
+        "updated_at.desc": (Suggestion.updated_at, True),
+    }
+    sort = sort if sort in sorts else "created_at.desc"
+    col, desc = sorts[sort]
     page = max(1, int(page))
     page_size = max(1, min(int(page_size), 200))
-    rows = q.offset((page - 1) * page_size).limit(page_size).all()
-    try:
-        if response is not None:
-            response.headers["X-Total-Count"] = str(total)
-    except Exception:
-        pass
+    result = keyset_page(db, q, (col, Suggestion.id), desc, page_size, sort, cursor=cursor, count=count, offset=(page - 1) * page_size)
+    result.apply_headers(response)
+    rows = result.rows
     return [
         SuggestionOut(
             id=r.id,
@@ -1352,6 +1725,8 @@ def list_users(
     role: Optional[str] = None,
     is_active: Optional[bool] = None,
     sort: Optional[str] = "id.asc",
+    cursor: Optional[str] = None,
+    count: str = "exact",
 ):
     q = db.query(User)
     if search:
@@ -1362,23 +1737,19 @@ def list_users(
     if is_active is not None:
         q = q.filter(User.is_active == is_active)
     # sorting
-    if sort == "id.desc":
-        q = q.order_by(User.id.desc())
-    elif sort == "created_at.desc":
-        q = q.order_by(User.created_at.desc())
-    elif sort == "created_at.asc":
-        q = q.order_by(User.created_at.asc())
-    else:
-        q = q.order_by(User.id.asc())
-    total = q.count()
+    sorts = {
+        "id.asc": ((User.id,), False),
+        "id.desc": ((User.id,), True),
+        "created_at.desc": ((User.created_at, User.id), True),
+        "created_at.asc": ((User.created_at, User.id), False),
+    }
+    sort = sort if sort in sorts else "id.asc"
+    cols, desc = sorts[sort]
     page = max(1, int(page))
     page_size = max(1, min(int(page_size), 200))
-    rows = q.offset((page - 1) * page_size).limit(page_size).all()
-    try:
-        if response is not None:
-            response.headers["X-Total-Count"] = str(total)
-    except Exception:
-        pass
+    result = keyset_page(db, q, cols, desc, page_size, sort, cursor=cursor, count=count, offset=(page - 1) * page_size)
+    result.apply_headers(response)
+    rows = result.rows
     return [
         UserOut(
             id=u.id,
@@ -1415,50 +1786,91 @@ def list_audit(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
     sort: Optional[str] = "ts.desc",
+    cursor: Optional[str] = None,
+    count: str = "estimate",
 ):
-    q = db.query(AuditLog)
-    if action:
-        q = q.filter(AuditLog.action == action)
-    if user_id:
-        q = q.filter(AuditLog.user_id == user_id)
-    # date filters (ISO8601)
-    try:
-        if date_from:
-            q = q.filter(AuditLog.ts >= datetime.fromisoformat(date_from))
-        if date_to:
-            q = q.filter(AuditLog.ts <= datetime.fromisoformat(date_to))
-    except Exception:
-        pass
-    # sorting
-    if sort == "ts.asc":
-        q = q.order_by(AuditLog.ts.asc())
-    else:
-        q = q.order_by(AuditLog.ts.desc())
-    total = q.count()
+    q = filter_audit(db.query(AuditLog), action=action, user_id=user_id, date_from=date_from, date_to=date_to)
+    # sorting; the audit log grows without bound, so the total is estimated by default
+    if sort != "ts.asc":
+        sort = "ts.desc"
     page = max(1, int(page))
     page_size = max(1, min(int(page_size), 1000))
-    rows = q.offset((page - 1) * page_size).limit(page_size).all()
-    try:
-        if response is not None:
-            response.headers["X-Total-Count"] = str(total)
-    except Exception:
-        pass
+    result = keyset_page(db, q, (AuditLog.ts, AuditLog.id), sort == "ts.desc", page_size, sort, cursor=cursor, count=count, offset=(page - 1) * page_size)
+    result.apply_headers(response)
+    rows = result.rows
     return [AuditLogOut(id=r.id, ts=r.ts, user_id=r.user_id, action=r.action, details=r.details) for r in rows]
 
 
+@app.get("/admin/rate-limit/status")
+def rate_limit_status(_: User = Depends(require_role("admin"))):
+    """Allowed/rejected hits per rule and tracked keys for this process."""
+    return rate_limiter.stats()
+
+
+@app.get("/admin/db/pool")
+def db_pool_status(_: User = Depends(require_role("admin"))):
+    """Connection pool occupancy and checkout waits of this process's engines."""
+    return {
+        "pgbouncer": engine_settings.pgbouncer,
+        "statement_timeout_ms": engine_settings.statement_timeout_ms,
+        "sync": pool_status(engine),
+        "async": pool_status(async_engine.sync_engine) if async_engine is not None else None,
+    }
+
+
+@app.get("/debug/profile")
+def list_profiles(limit: int = 50, _: User = Depends(require_role("admin"))):
+    """Most recent request profiles of this process, newest first, without statements."""
+    out = []
+    for p in profiles.recent(max(1, min(limit, profiles.keep))):
+        d = p.to_dict()
+        out.append({"id": d["id"], "method": d["method"], "path": d["path"], "status": d["status"], "started_at": d["started_at"], "summary": p.summary()})
+    return out
+
+
+@app.get("/debug/profile/{request_id}")
+def get_profile(request_id: str, _: User = Depends(require_role("admin"))):
+    """Full profile of one request (id from its X-Ziris-Profile-Id header)."""
+    p = profiles.get(request_id)
+    if p is None:
+        raise HTTPException(status_code=404, detail="Profile not found (expired or profiled by another worker)")
+    return p.to_dict()
+
+
+@app.get("/admin/audit/status")
+def audit_status(_: User = Depends(require_role("admin"))):
+    """Buffered audit writer counters for this process."""
+    return audit_writer.stats()
+
+
 @app.get("/admin/audit.csv")
-def export_audit_csv(_: User = Depends(require_role("admin")), db: Session = Depends(get_db), limit: int = 1000):
-    rows = db.query(AuditLog).order_by(AuditLog.ts.desc()).limit(max(1, min(limit, 10000))).all()
-    import csv
-    import io
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-    writer.writerow(["id", "ts", "user_id", "action", "details"]) 
-    for r in rows:
-        writer.writerow([r.id, (r.ts.isoformat() if r.ts else ""), (r.user_id or ""), r.action, (r.details or "")])
-    csv_data = buf.getvalue()
-    headers = {"Content-Disposition": "attachment; filename=audit.csv"}
-    return Response(content=csv_data, media_type="text/csv", headers=headers)
+def export_audit_csv(
+    _: User = Depends(require_role("admin")),
+    format: str = "csv",
+    gzip: bool = False,
+    action: Optional[str] = None,
+    user_id: Optional[int] = None,
+    date_from: Optional[str] = None,
+    date_to: Optional[str] = None,
+    sort: Optional[str] = "ts.desc",
+    limit: Optional[int] = None,
+):
+    """Stream the (filtered) audit log as CSV, NDJSON or Parquet, without a row cap.
+
+    The stream uses its own session: the request's session is closed before
+    the body is sent.
+    """
+    try:
+        check_format(format, gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = stream_audit(
+        lambda: SessionLocal(), fmt=format, gzip=gzip, descending=sort != "ts.asc", limit=max(1, limit) if limit else None,
+        action=action, user_id=user_id, date_from=date_from, date_to=date_to,
+    )
+    media_type = "application/gzip" if gzip else AUDIT_MEDIA_TYPES[format]
+    headers = {"Content-Disposition": f"attachment; filename={audit_filename(format, gzip)}"}
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 
 # ----------------------
@@ -1467,6 +1879,11 @@ def export_audit_csv(_: User = Depends(require_role("admin")), db: Session = Dep
 
 @app.websocket("/ws/notifications")
 async def websocket_notifications(websocket: WebSocket):
+    """Push notifications (alerts, job progress) from the broadcast hub.
+
+    Optional `zones=a,b` query param (or a `{"zones": [...]}` message) limits
+    alerts to those zones; messages without a zone are always delivered.
+    """
     # Authenticate via query param token=?
     token = websocket.query_params.get("token") if hasattr(websocket, "query_params") else None
     if not token:
@@ -1481,14 +1898,42 @@ async def websocket_notifications(websocket: WebSocket):
         await websocket.close(code=1008)
         return
     await websocket.accept()
-    try:
-        # Send a welcome message so the frontend can react
-        await websocket.send_text("connected")
+    zones_param = websocket.query_params.get("zones")
+    zones = [z.strip() for z in zones_param.split(",")] if zones_param else None
+    sub = hub.subscribe(zones, is_admin=payload.get("role") == "admin")
+
+    async def sender() -> None:
         while True:
-            # Keep the connection alive by awaiting messages
-            _ = await websocket.receive_text()
-            # Echo back or notify
-            await websocket.send_text("update")
+            msg = await sub.get()
+            if isinstance(msg, str):
+                await websocket.send_text(msg)
+            else:
+                await websocket.send_json(msg)
+
+    async def receiver() -> None:
+        while True:
+            text = await websocket.receive_text()
+            try:
+                data = json.loads(text)
+            except ValueError:
+                data = None
+            if isinstance(data, dict) and ("zones" in data or "subscribe" in data):
+                wanted = data.get("zones", data.get("subscribe"))
+                hub.set_zones(sub, wanted if isinstance(wanted, list) else None)
+                sub.offer("ack:zones", {"type": "subscribed", "message": "subscribed", "zones": sorted(sub.zones or [])})
+            else:
+                # Legacy behaviour: any other client message gets an "update" back
+                sub.offer("ack:update", "update")
+
+    # Send a welcome message so the frontend can react
+    sub.offer("ack:connected", "connected")
+    tasks = [asyncio.ensure_future(sender()), asyncio.ensure_future(receiver())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
     except WebSocketDisconnect:
         # Client disconnected
         pass
+    finally:
+        for t in tasks:
+            t.cancel()
+        hub.unsubscribe(sub)
@@ -0,0 +1,294 @@
+"""Prometheus metrics, in the text exposition format served at ``GET /metrics``.
+
+A small in-process registry (no ``prometheus_client`` dependency):
+
+- :class:`MetricsMiddleware` (ASGI) counts requests and observes latency per
+  route template and status, and tracks requests in flight. Paths that match
+  no route share the ``unmatched`` label, so scanners cannot blow up label
+  cardinality.
+- :func:`instrument_engine` hooks SQLAlchemy cursor events: query count and
+  duration per statement kind, plus queries per request (a context variable
+  the middleware opens, which FastAPI copies into the threadpool for sync
+  handlers).
+- Collectors registered with :meth:`Registry.collector` are called at scrape
+  time for values owned elsewhere (WebSocket connections, job queue depth,
+  pool occupancy, rate-limiter outcomes).
+
+Everything is per process: with several workers, scrape each one (or sum in
+PromQL). Rates such as ingested rows/s come from ``rate()`` over counters.
+"""
+import abc
+import contextvars
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Labels = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]  # suffix, labels, value
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Labels:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    @abc.abstractmethod
+    def samples(self) -> Iterable[Sample]:
+        """``(suffix, labels, value)`` for every series of the metric."""
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield "_total", dict(zip(self.labelnames, key)), v
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield "", dict(zip(self.labelnames, key)), v
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[Labels, List[float]] = {}  # labels -> per-bucket counts..., count, sum
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            for i, le in enumerate(self.buckets):
+                if value <= le:
+                    state[i] += 1
+                    break
+            state[-2] += 1
+            state[-1] += value
+
+    def count(self, **labels: str) -> int:
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return int(state[-2]) if state else 0
+
+    def samples(self) -> Iterable[Sample]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        for key, state in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0.0
+            for le, n in zip(self.buckets, state):
+                cumulative += n
+                yield "_bucket", {**labels, "le": _fmt_value(le)}, cumulative
+            yield "_bucket", {**labels, "le": "+Inf"}, state[-2]
+            yield "_count", labels, state[-2]
+            yield "_sum", labels, state[-1]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]] = []
+        self._lock = threading.Lock()
+
+    def _add(self, metric: _Metric) -> Any:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def collector(self, fn: Callable[[], Iterable[Tuple[str, str, str, Dict[str, str], float]]]) -> Callable:
+        """Register ``fn`` yielding ``(name, type, help, labels, value)`` at scrape time (decorator)."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            family = m.name + "_total" if m.type == "counter" else m.name
+            lines.append(f"# HELP {family} {m.help}")
+            lines.append(f"# TYPE {family} {m.type}")
+            for suffix, labels, value in m.samples():
+                lines.append(f"{m.name}{suffix}{_fmt_labels(labels)} {_fmt_value(value)}")
+        families: Dict[str, Tuple[str, str, List[str]]] = {}  # samples of one name must be contiguous
+        for fn in self._collectors:
+            try:
+                samples = list(fn())
+            except Exception:
+                continue  # a failing source must not break the scrape
+            for name, type_, help, labels, value in samples:
+                family = families.setdefault(name, (type_, help, []))
+                family[2].append(f"{name}{_fmt_labels(labels)} {_fmt_value(value)}")
+        for name, (type_, help, samples) in families.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {type_}")
+            lines.extend(samples)
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.counter("ziris_http_requests", "HTTP requests by route template, method and status.", ("method", "route", "status"))
+http_latency = registry.histogram("ziris_http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route"))
+http_in_flight = registry.gauge("ziris_http_requests_in_flight", "HTTP requests being served.")
+request_queries = registry.histogram("ziris_http_request_db_queries", "Database queries issued per HTTP request.", ("method", "route"), COUNT_BUCKETS)
+db_queries = registry.counter("ziris_db_queries", "Database statements executed, by statement kind.", ("kind",))
+db_query_latency = registry.histogram("ziris_db_query_duration_seconds", "Database statement duration, by statement kind.", ("kind",), QUERY_BUCKETS)
+ingest_rows = registry.counter("ziris_ingest_rows", "Sensor rows written by the ingest endpoints.", ("mode",))
+ingest_rejected = registry.counter("ziris_ingest_rejected_rows", "Sensor rows rejected by the ingest endpoints.", ("mode",))
+
+_request_stats: "contextvars.ContextVar[Optional[List[float]]]" = contextvars.ContextVar("ziris_request_stats", default=None)
+
+
+def _kind(statement: str) -> str:
+    word = statement.lstrip().split(None, 1)[0].lower() if statement.strip() else ""
+    return word if word in ("select", "insert", "update", "delete", "with") else "other"
+
+
+def instrument_engine(engine: Any) -> None:
+    """Time every cursor execution of ``engine`` (sync ``Engine`` or ``AsyncEngine.sync_engine``)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["ziris_query_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("ziris_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        kind = _kind(statement)
+        db_queries.inc(kind=kind)
+        db_query_latency.observe(elapsed, kind=kind)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats[0] += 1
+            stats[1] += elapsed
+
+
+def request_db_stats() -> Optional[Tuple[int, float]]:
+    """``(queries, seconds)`` spent by the current request so far; None outside a request."""
+    stats = _request_stats.get()
+    return (int(stats[0]), stats[1]) if stats is not None else None
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding the ``ziris_http_*`` metrics."""
+
+    def __init__(self, app: Any, skip_paths: Sequence[str] = ("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+        status = {"code": 500}
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        token = _request_stats.set([0, 0.0])
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests.inc(method=method, route=route, status=str(status["code"]))
+            http_latency.observe(elapsed, method=method, route=route)
+            request_queries.observe(_request_stats.get()[0], method=method, route=route)
+            _request_stats.reset(token)
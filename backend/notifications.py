@@ -0,0 +1,157 @@
+"""Server-side broadcast hub behind /ws/notifications.
+
+Producers (ingestion, threshold checks, background jobs) call
+:meth:`NotificationHub.publish` from any thread; it never blocks. Each
+WebSocket connection owns a bounded per-connection queue drained by its own
+sender task. When a consumer falls behind, messages sharing a coalesce key
+(e.g. progress of one job) replace each other in place, and once the queue is
+full the oldest message is dropped and counted.
+"""
+import asyncio
+import itertools
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Union
+
+Message = Union[str, Dict[str, Any]]
+
+MAX_PENDING = 200
+
+
+class Subscriber:
+    """Per-connection bounded queue with coalescing; only touched on the event loop."""
+
+    def __init__(self, zones: Optional[Set[str]] = None, max_pending: int = MAX_PENDING, is_admin: bool = False):
+        self.zones = zones  # None = every zone
+        self.is_admin = is_admin
+        self.max_pending = max(1, max_pending)
+        self.dropped = 0
+        self.coalesced = 0
+        self._pending: "OrderedDict[str, Message]" = OrderedDict()
+        self._event = asyncio.Event()
+
+    def offer(self, key: str, msg: Message) -> None:
+        if key in self._pending:
+            self._pending[key] = msg
+            self.coalesced += 1
+        else:
+            if len(self._pending) >= self.max_pending:
+                self._pending.popitem(last=False)
+                self.dropped += 1
+            self._pending[key] = msg
+        self._event.set()
+
+    async def get(self) -> Message:
+        while not self._pending:
+            self._event.clear()
+            await self._event.wait()
+        return self._pending.popitem(last=False)[1]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+
+class NotificationHub:
+    def __init__(self, max_pending: int = MAX_PENDING):
+        self.max_pending = max_pending
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._all: Set[Subscriber] = set()
+        self._by_zone: Dict[str, Set[Subscriber]] = {}
+        self._seq = itertools.count()
+        self.published = 0
+
+    def _subscribers(self) -> Set[Subscriber]:
+        return self._all.union(*self._by_zone.values())
+
+    @property
+    def connections(self) -> int:
+        return len(self._subscribers())
+
+    @property
+    def active(self) -> bool:
+        """Cheap check producers can use to skip building messages nobody will read."""
+        return bool(self._all or self._by_zone)
+
+    def subscribe(self, zones: Optional[Iterable[str]] = None, is_admin: bool = False) -> Subscriber:
+        """Register a connection; must be called from the event loop."""
+        self._loop = asyncio.get_running_loop()
+        sub = Subscriber(max_pending=self.max_pending, is_admin=is_admin)
+        self.set_zones(sub, zones)
+        return sub
+
+    def set_zones(self, sub: Subscriber, zones: Optional[Iterable[str]]) -> None:
+        self._detach(sub)
+        wanted = {z for z in zones if z} if zones is not None else set()
+        sub.zones = wanted or None
+        if sub.zones is None:
+            self._all.add(sub)
+        else:
+            for z in sub.zones:
+                self._by_zone.setdefault(z, set()).add(sub)
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self._detach(sub)
+
+    def _detach(self, sub: Subscriber) -> None:
+        self._all.discard(sub)
+        for z in list(sub.zones or ()):
+            subs = self._by_zone.get(z)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._by_zone[z]
+
+    def publish(
+        self,
+        type: str,
+        message: str,
+        zone: Optional[str] = None,
+        coalesce_key: Optional[str] = None,
+        admin_only: bool = False,
+        **fields: Any,
+    ) -> None:
+        """Queue a message for every matching subscriber; safe from any thread, never blocks.
+
+        Messages without a zone go to every subscriber.
+        """
+        loop = self._loop
+        if loop is None or loop.is_closed() or not self.active:
+            return
+        msg = {"type": type, "message": message, "zone": zone, "ts": datetime.utcnow().isoformat(), **fields}
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._fanout(msg, coalesce_key, admin_only)
+        else:
+            try:
+                loop.call_soon_threadsafe(self._fanout, msg, coalesce_key, admin_only)
+            except RuntimeError:
+                pass  # loop shutting down
+
+    def _fanout(self, msg: Dict[str, Any], coalesce_key: Optional[str], admin_only: bool = False) -> None:
+        self.published += 1
+        key = coalesce_key or f"seq:{next(self._seq)}"
+        zone = msg.get("zone")
+        if zone is None:
+            targets = self._subscribers()
+        else:
+            targets = self._all | self._by_zone.get(zone, set())
+        for sub in targets:
+            if admin_only and not sub.is_admin:
+                continue
+            sub.offer(key, msg)
+
+    def stats(self) -> Dict[str, int]:
+        subs = self._subscribers()
+        return {
+            "connections": len(subs),
+            "published": self.published,
+            "pending": sum(len(s) for s in subs),
+            "dropped": sum(s.dropped for s in subs),
+            "coalesced": sum(s.coalesced for s in subs),
+        }
+
+
+hub = NotificationHub()
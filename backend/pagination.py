@@ -0,0 +1,154 @@
+"""Keyset (cursor) pagination for admin listings.
+
+Pages are fetched with ``WHERE (sort_key, id) < (:last_key, :last_id)``
+instead of ``OFFSET``, so every page costs the same however deep it is.
+Cursors are opaque URL-safe tokens that carry the boundary row's key, the
+direction and the sort they were issued for. The total count is optional:
+``exact`` runs ``COUNT(*)``, ``estimate`` reads the planner's row estimate on
+PostgreSQL (exact elsewhere) and ``none`` skips it.
+
+Nullable timestamp keys are compared as ``COALESCE(col, NULL_SORT_TIME)``, so
+legacy rows without a timestamp sort as the oldest instead of falling out of
+every page after the first (a row comparison with NULL is never true).
+"""
+import base64
+import json
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import DateTime, func, literal_column, tuple_
+from sqlalchemy.orm import Query, Session
+
+from .database import NULL_SORT_TIME, NULL_SORT_TIME_SQL
+
+COUNT_MODES = ("exact", "estimate", "none")
+
+
+@dataclass
+class Page:
+    rows: List[Any]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+    total: Optional[int] = None
+    estimated: bool = False
+
+    def apply_headers(self, response: Optional[Response]) -> None:
+        if response is None:
+            return
+        if self.total is not None:
+            response.headers["X-Total-Count"] = str(self.total)
+            if self.estimated:
+                response.headers["X-Total-Count-Estimated"] = "true"
+        if self.next_cursor:
+            response.headers["X-Next-Cursor"] = self.next_cursor
+        if self.prev_cursor:
+            response.headers["X-Prev-Cursor"] = self.prev_cursor
+
+
+def _encode_value(v: Any) -> Any:
+    return {"$dt": v.isoformat()} if isinstance(v, datetime) else v
+
+
+def _decode_value(v: Any) -> Any:
+    return datetime.fromisoformat(v["$dt"]) if isinstance(v, dict) and "$dt" in v else v
+
+
+def encode_cursor(key: Sequence[Any], direction: str, sort: str) -> str:
+    raw = json.dumps({"k": [_encode_value(v) for v in key], "d": direction, "s": sort}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str) -> Tuple[List[Any], str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        key, direction = [_decode_value(v) for v in data["k"]], data["d"]
+        if data.get("s") != sort or direction not in ("next", "prev"):
+            raise ValueError
+        return key, direction
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def estimate_count(db: Session, q: Query) -> Tuple[int, bool]:
+    """Planner row estimate on PostgreSQL; exact ``COUNT(*)`` elsewhere. Returns ``(count, estimated)``."""
+    if db.get_bind().dialect.name != "postgresql":
+        return q.order_by(None).count(), False
+    compiled = q.order_by(None).statement.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"]), True
+
+
+def _sort_expr(col: Any) -> Tuple[Any, bool]:
+    """``(expression to sort on, coalesced)`` for a key column."""
+    column = col.expression
+    if not getattr(column, "nullable", False) or getattr(column, "primary_key", False):
+        return col, False
+    if not isinstance(column.type, DateTime):
+        raise ValueError(f"keyset sort on nullable column {column} has no NULL sort value")
+    return func.coalesce(col, literal_column(NULL_SORT_TIME_SQL, DateTime)), True
+
+
+def keyset_page(
+    db: Session,
+    q: Query,
+    key_cols: Sequence[Any],
+    descending: bool,
+    page_size: int,
+    sort: str,
+    cursor: Optional[str] = None,
+    count: str = "exact",
+    offset: int = 0,
+) -> Page:
+    """Fetch one page of ``q`` (filters applied, no ORDER BY) ordered by ``key_cols``.
+
+    ``key_cols`` must end with a unique column (the primary key) so the order
+    is total; nullable key columns must be timestamps. ``offset`` is only
+    honoured without a cursor, for clients still using page numbers.
+    """
+    if count not in COUNT_MODES:
+        raise HTTPException(status_code=400, detail=f"count must be one of {', '.join(COUNT_MODES)}")
+    total, estimated = None, False
+    if count == "exact":
+        total = q.order_by(None).count()
+    elif count == "estimate":
+        total, estimated = estimate_count(db, q)
+
+    sort_exprs = [_sort_expr(c) for c in key_cols]
+    direction = "next"
+    if cursor:
+        key, direction = decode_cursor(cursor, sort)
+        if len(key) != len(key_cols):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        boundary = tuple_(*(e for e, _ in sort_exprs))
+        # Walking backwards flips both the comparison and the order
+        forward_lt = descending if direction == "next" else not descending
+        q = q.filter(boundary < tuple_(*key) if forward_lt else boundary > tuple_(*key))
+    reverse = direction == "prev"
+    desc = descending != reverse
+    q = q.order_by(*(e.desc() if desc else e.asc() for e, _ in sort_exprs))
+    if offset and not cursor:
+        q = q.offset(offset)
+    rows = q.limit(page_size + 1).all()
+    more = len(rows) > page_size
+    rows = rows[:page_size]
+    if reverse:
+        rows.reverse()
+
+    def key_of(row) -> List[Any]:
+        values = [getattr(row, c.key) for c in key_cols]
+        return [NULL_SORT_TIME if v is None and coalesced else v for v, (_, coalesced) in zip(values, sort_exprs)]
+
+    has_next = more if not reverse else True
+    has_prev = (bool(cursor) or offset > 0) if not reverse else more
+    return Page(
+        rows=rows,
+        next_cursor=encode_cursor(key_of(rows[-1]), "next", sort) if rows and has_next else None,
+        prev_cursor=encode_cursor(key_of(rows[0]), "prev", sort) if rows and has_prev else None,
+        total=total,
+        estimated=estimated,
+    )
@@ -0,0 +1,107 @@
+"""Monthly partition maintenance for a range-partitioned ``sensor_data``.
+
+Partitioning itself is opt-in (migration 0004 with ZIRIS_PARTITION_SENSOR_DATA=1).
+When the table is partitioned, the backend keeps partitions for the current
+month and ``ZIRIS_PARTITION_MONTHS_AHEAD`` months ahead, and the retention job
+can drop whole months once they have been rolled up. On a regular table, or
+another dialect, every helper here is a no-op.
+"""
+import logging
+import os
+import re
+from datetime import date, datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy.engine import Connection, Engine
+
+log = logging.getLogger(__name__)
+
+TABLE = "sensor_data"
+MONTHS_AHEAD = int(os.getenv("ZIRIS_PARTITION_MONTHS_AHEAD", "2"))
+_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.month - 1 + n, 12)
+    return date(d.year + y, m + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(conn: Connection) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    row = conn.exec_driver_sql(
+        "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = %(t)s",
+        {"t": TABLE},
+    ).first()
+    return row is not None
+
+
+def list_month_partitions(conn: Connection) -> List[Tuple[str, date, date]]:
+    """Return ``(name, start, end)`` for every monthly partition, oldest first."""
+    rows = conn.exec_driver_sql(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = %(t)s",
+        {"t": TABLE},
+    ).all()
+    out = []
+    for (name,) in rows:
+        m = _NAME.match(name)
+        if m:
+            start = date(int(m.group(1)), int(m.group(2)), 1)
+            out.append((name, start, _add_months(start, 1)))
+    return sorted(out, key=lambda p: p[1])
+
+
+def ensure_month_partitions(conn: Connection, months_ahead: int = MONTHS_AHEAD, today: Optional[date] = None) -> List[str]:
+    """Create missing partitions from the current month to ``months_ahead``; returns created names."""
+    if not is_partitioned(conn):
+        return []
+    start = _month_start(today or datetime.utcnow().date())
+    existing = {name for name, _, _ in list_month_partitions(conn)}
+    created = []
+    for i in range(months_ahead + 1):
+        month = _month_start(_add_months(start, i))
+        name = partition_name(month)
+        if name in existing:
+            continue
+        try:
+            with conn.begin_nested():
+                conn.exec_driver_sql(
+                    f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {TABLE} '
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+                )
+            created.append(name)
+        except Exception as e:
+            # Typically rows for that month already sit in the default partition
+            log.warning("could not create partition %s: %s", name, e)
+    return created
+
+
+def drop_partitions_before(conn: Connection, cutoff: datetime) -> List[str]:
+    """Drop monthly partitions whose whole range ends on or before ``cutoff``."""
+    if not is_partitioned(conn):
+        return []
+    dropped = []
+    for name, _, end in list_month_partitions(conn):
+        if datetime(end.year, end.month, end.day) <= cutoff:
+            conn.exec_driver_sql(f'DROP TABLE IF EXISTS "{name}"')
+            dropped.append(name)
+    return dropped
+
+
+def maintain_partitions(engine: Engine) -> List[str]:
+    """Open a connection, create upcoming partitions and commit."""
+    if engine.dialect.name != "postgresql":
+        return []
+    with engine.begin() as conn:
+        return ensure_month_partitions(conn)
@@ -0,0 +1,87 @@
+"""Password hashing.
+
+bcrypt cost comes from ``ZIRIS_BCRYPT_ROUNDS`` (default 12). Hashing and
+verification run on a dedicated pool of ``ZIRIS_HASH_WORKERS`` threads
+(bcrypt releases the GIL), so a login storm uses at most that many cores and
+never ties up the event loop or the request thread pool; the async variants
+are what ``/auth/login`` awaits. :func:`verify_and_update` returns a new hash
+when the stored one uses another cost, or is a legacy unsalted SHA-256, so
+hashes follow cost changes as users log in.
+
+Without the ``bcrypt`` package, hashes fall back to SHA-256 (``available``
+is False); endpoints that create passwords refuse to run in that case.
+"""
+import asyncio
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+try:
+    import bcrypt  # type: ignore
+except Exception:  # pragma: no cover - bcrypt is in requirements
+    bcrypt = None  # type: ignore
+
+BCRYPT_ROUNDS = int(os.getenv("ZIRIS_BCRYPT_ROUNDS", "12"))
+HASH_WORKERS = int(os.getenv("ZIRIS_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+available = bcrypt is not None
+_COST = re.compile(r"^\$2[abxy]?\$(\d\d)\$")
+_pool = ThreadPoolExecutor(max_workers=max(1, HASH_WORKERS), thread_name_prefix="ziris-hash")
+
+
+def _legacy(pw: str) -> str:
+    return hashlib.sha256((pw or "").encode("utf-8")).hexdigest()
+
+
+def _hash(pw: str, rounds: int) -> str:
+    if bcrypt is None:
+        return _legacy(pw)
+    return bcrypt.hashpw(pw.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode("utf-8")
+
+
+def _verify(pw: str, hashed: str) -> bool:
+    if bcrypt is not None and _COST.match(hashed or ""):
+        try:
+            return bcrypt.checkpw(pw.encode("utf-8"), hashed.encode("utf-8"))
+        except Exception:
+            return False
+    return _legacy(pw) == hashed
+
+
+def cost(hashed: str) -> Optional[int]:
+    """bcrypt cost of ``hashed``; None for legacy SHA-256 hashes."""
+    m = _COST.match(hashed or "")
+    return int(m.group(1)) if m else None
+
+
+def needs_rehash(hashed: str, rounds: int = BCRYPT_ROUNDS) -> bool:
+    return bcrypt is not None and cost(hashed) != rounds
+
+
+def _verify_and_update(pw: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    if not _verify(pw, hashed):
+        return False, None
+    return True, _hash(pw, rounds) if needs_rehash(hashed, rounds) else None
+
+
+def hash_password(pw: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return _pool.submit(_hash, pw, rounds).result()
+
+
+def verify_password(pw: str, hashed: str) -> bool:
+    return _pool.submit(_verify, pw, hashed).result()
+
+
+def verify_and_update(pw: str, hashed: str, rounds: int = BCRYPT_ROUNDS) -> Tuple[bool, Optional[str]]:
+    """``(ok, new_hash)``; ``new_hash`` is set when the stored hash should be replaced."""
+    return _pool.submit(_verify_and_update, pw, hashed, rounds).result()
+
+
+async def hash_password_async(pw: str, rounds: int = BCRYPT_ROUNDS) -> str:
+    return await asyncio.get_running_loop().run_in_executor(_pool, _hash, pw, rounds)
+
+
+async def verify_and_update_async(pw: str, hashed: str, rounds: int = BCRYPT_ROUNDS) -> Tuple[bool, Optional[str]]:
+    return await asyncio.get_running_loop().run_in_executor(_pool, _verify_and_update, pw, hashed, rounds)
@@ -0,0 +1,104 @@
+"""Per-process caches on the authentication path.
+
+``get_current_user`` used to load the ``users`` row on every authenticated
+request. :class:`PrincipalCache` keeps the fields handlers read (id,
+username, role, active flag) for ``ZIRIS_PRINCIPAL_CACHE_TTL`` seconds
+(default 30) and hands out a fresh detached ``User`` on each hit. Endpoints
+that change those fields (approval, password reset, role changes) call
+:meth:`PrincipalCache.invalidate`, which is immediate in the writing worker;
+other workers converge within one TTL.
+
+:class:`TokenMemo` remembers the payload of access tokens whose signature
+was already verified, so a dashboard polling with the same bearer token
+skips the base64, JSON and HMAC work. Expiry is still checked on every hit.
+Both caches are bounded LRUs.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .database import User
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("ZIRIS_PRINCIPAL_CACHE_TTL", "30"))
+PRINCIPAL_CACHE_SIZE = int(os.getenv("ZIRIS_PRINCIPAL_CACHE_SIZE", "10000"))
+TOKEN_MEMO_SIZE = int(os.getenv("ZIRIS_TOKEN_MEMO_SIZE", "10000"))
+
+Principal = Tuple[int, str, str, bool]  # id, username, role, is_active
+
+
+def principal_of(user: User) -> Principal:
+    return (user.id, user.username, user.role, bool(user.is_active))
+
+
+class PrincipalCache:
+    def __init__(self, ttl: float = PRINCIPAL_CACHE_TTL, max_entries: int = PRINCIPAL_CACHE_SIZE, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Principal]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[User]:
+        """A detached ``User`` for ``key`` (user id, or ``("name", username)``), or None."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= now:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        uid, username, role, active = entry[1]
+        return User(id=uid, username=username, role=role, is_active=active)
+
+    def put(self, key: Hashable, user: User) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl, principal_of(user))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Forget one user (by id and by name) or, without an id, everyone."""
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+                return
+            for key in [k for k, (_, p) in self._entries.items() if p[0] == user_id]:
+                del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class TokenMemo:
+    def __init__(self, max_entries: int = TOKEN_MEMO_SIZE, clock: Callable[[], datetime] = datetime.utcnow):
+        self.max_entries = max(1, max_entries)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._payloads: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """Payload of an already verified, unexpired token (a copy), or None."""
+        with self._lock:
+            payload = self._payloads.get(token)
+            if payload is None:
+                return None
+            if int(payload.get("exp", 0)) < int(self._clock().timestamp()):
+                del self._payloads[token]
+                return None
+            self._payloads.move_to_end(token)
+        return dict(payload)
+
+    def put(self, token: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._payloads[token] = dict(payload)
+            self._payloads.move_to_end(token)
+            while len(self._payloads) > self.max_entries:
+                self._payloads.popitem(last=False)
@@ -0,0 +1,265 @@
+"""Opt-in per-request SQL profiler.
+
+An admin adds ``X-Ziris-Profile: 1`` (or ``?_profile=1``) to a request. Every
+statement the request runs, on either engine, is then recorded with its
+duration and row count, using ``before_cursor_execute`` / ``after_cursor_execute``
+hooks. Parameters are not recorded, since they may hold password hashes or
+tokens. With ``explain`` instead of ``1``, each ``SELECT`` also gets
+``EXPLAIN (ANALYZE, FORMAT JSON)`` on PostgreSQL (the query runs twice,
+inside a savepoint), and sequential scans are listed.
+
+The response carries ``X-Ziris-Profile-Id``, a one-line summary in
+``X-Ziris-Profile`` and ``Server-Timing: db;dur=...``. The full profile stays
+in a bounded in-process :class:`ProfileStore` (``ZIRIS_PROFILE_KEEP``,
+default 200) for ``GET /debug/profile/{request_id}``. Statements run by the
+same request with identical SQL are grouped under ``repeated``, which is how
+N+1 loops show up. For streaming responses the header only covers the
+queries run before the first byte.
+
+Requests without the header only pay one context variable lookup per
+statement.
+"""
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import event
+from starlette.concurrency import run_in_threadpool
+
+PROFILE_KEEP = int(os.getenv("ZIRIS_PROFILE_KEEP", "200"))
+MAX_STATEMENTS = int(os.getenv("ZIRIS_PROFILE_MAX_STATEMENTS", "500"))
+MAX_EXPLAINS = int(os.getenv("ZIRIS_PROFILE_MAX_EXPLAINS", "20"))
+SQL_CHARS = 2000
+HEADER = "x-ziris-profile"
+QUERY_PARAM = "_profile"
+MODES = ("1", "explain")
+
+
+class Profile:
+    def __init__(self, method: str, path: str, explain: bool = False):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.explain = explain
+        self.started_at = time.time()
+        self.total_ms: Optional[float] = None
+        self.status: Optional[int] = None
+        self.statements: List[Dict[str, Any]] = []
+        self.dropped = 0
+        self.explains = 0
+
+    def record(self, statement: str, duration_ms: float, rows: Optional[int], executemany: bool, plan: Optional[Dict[str, Any]] = None) -> None:
+        if len(self.statements) >= MAX_STATEMENTS:
+            self.dropped += 1
+            return
+        entry: Dict[str, Any] = {"sql": statement[:SQL_CHARS], "ms": round(duration_ms, 3), "rows": rows}
+        if executemany:
+            entry["executemany"] = True
+        if plan is not None:
+            entry["plan"] = plan
+        self.statements.append(entry)
+
+    def db_ms(self) -> float:
+        return sum(s["ms"] for s in self.statements)
+
+    def repeated(self) -> List[Dict[str, Any]]:
+        groups: "OrderedDict[str, List[float]]" = OrderedDict()
+        for s in self.statements:
+            groups.setdefault(s["sql"], []).append(s["ms"])
+        out = [{"sql": sql, "count": len(ms), "ms": round(sum(ms), 3)} for sql, ms in groups.items() if len(ms) > 1]
+        return sorted(out, key=lambda g: g["count"], reverse=True)
+
+    def seq_scans(self) -> List[Dict[str, Any]]:
+        return [{"relation": scan, "sql": s["sql"]} for s in self.statements for scan in (s.get("plan") or {}).get("seq_scans", [])]
+
+    def summary(self) -> str:
+        repeated = self.repeated()
+        parts = [
+            f"queries={len(self.statements) + self.dropped}",
+            f"db_ms={self.db_ms():.1f}",
+            f"max_repeat={repeated[0]['count'] if repeated else 1 if self.statements else 0}",
+        ]
+        if self.total_ms is not None:
+            parts.append(f"total_ms={self.total_ms:.1f}")
+        if self.explain:
+            parts.append(f"seq_scans={len(self.seq_scans())}")
+        return ";".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            "queries": len(self.statements) + self.dropped,
+            "db_ms": round(self.db_ms(), 3),
+            "dropped": self.dropped,
+            "repeated": self.repeated(),
+            "seq_scans": self.seq_scans(),
+            "statements": list(self.statements),
+        }
+
+
+class ProfileStore:
+    """Most recent profiles, by id (least recently stored evicted first)."""
+
+    def __init__(self, keep: int = PROFILE_KEEP):
+        self.keep = max(1, keep)
+        self._profiles: "OrderedDict[str, Profile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, profile: Profile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.keep:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        with self._lock:
+            return self._profiles.get(profile_id)
+
+    def recent(self, limit: int = 50) -> List[Profile]:
+        with self._lock:
+            return list(self._profiles.values())[-limit:][::-1]
+
+
+_current: "contextvars.ContextVar[Optional[Profile]]" = contextvars.ContextVar("ziris_profile", default=None)
+
+
+def _plan_summary(plan: Any) -> Dict[str, Any]:
+    root = plan[0] if isinstance(plan, list) else plan
+    scans: List[str] = []
+
+    def walk(node: Dict[str, Any]) -> None:
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node.get("Relation Name", "?"))
+        for child in node.get("Plans", ()):
+            walk(child)
+
+    walk(root.get("Plan", {}))
+    return {
+        "execution_ms": root.get("Execution Time"),
+        "planning_ms": root.get("Planning Time"),
+        "seq_scans": scans,
+        "plan": root.get("Plan"),
+    }
+
+
+def _explain(conn: Any, statement: str, parameters: Any) -> Optional[Dict[str, Any]]:
+    """EXPLAIN ANALYZE ``statement`` on the raw DBAPI connection, so the hooks do not fire again."""
+    cur = conn.connection.dbapi_connection.cursor()
+    try:
+        cur.execute("SAVEPOINT ziris_profile")
+        try:
+            cur.execute("EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters)
+            raw = cur.fetchone()[0]
+            cur.execute("RELEASE SAVEPOINT ziris_profile")
+        except Exception:
+            cur.execute("ROLLBACK TO SAVEPOINT ziris_profile")
+            return None
+        return _plan_summary(json.loads(raw) if isinstance(raw, str) else raw)
+    except Exception:
+        return None
+    finally:
+        cur.close()
+
+
+def install(engine: Any) -> None:
+    """Record statements of profiled requests on ``engine`` (sync ``Engine`` or ``AsyncEngine.sync_engine``)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info["ziris_profile_start"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        profile = _current.get()
+        start = conn.info.pop("ziris_profile_start", None)
+        if profile is None or start is None:
+            return
+        elapsed = (time.perf_counter() - start) * 1000.0
+        rowcount = getattr(cursor, "rowcount", -1)
+        plan = None
+        if (
+            profile.explain
+            and not executemany
+            and conn.dialect.name == "postgresql"
+            and statement.lstrip()[:6].lower() == "select"
+            and profile.explains < MAX_EXPLAINS
+        ):
+            profile.explains += 1
+            plan = _explain(conn, statement, parameters)
+        profile.record(statement, elapsed, rowcount if rowcount is not None and rowcount >= 0 else None, executemany, plan)
+
+
+def requested_mode(scope: Dict[str, Any]) -> Optional[str]:
+    """``"1"`` or ``"explain"`` when the request asks to be profiled."""
+    for name, value in scope.get("headers", ()):
+        if name == HEADER.encode():
+            mode = value.decode("latin-1").strip().lower()
+            return mode if mode in MODES else None
+    query = scope.get("query_string", b"").decode("latin-1")
+    for pair in query.split("&"):
+        key, _, value = pair.partition("=")
+        if key == QUERY_PARAM:
+            mode = (value or "1").lower()
+            return mode if mode in MODES else None
+    return None
+
+
+class ProfilerMiddleware:
+    """Profiles requests that ask for it when ``authorize(authorization_header)`` allows it.
+
+    ``authorize`` is a sync callable (it may hit the database) run on the threadpool.
+    """
+
+    def __init__(self, app: Any, store: ProfileStore, authorize: Callable[[Optional[str]], bool]):
+        self.app = app
+        self.store = store
+        self.authorize = authorize
+
+    async def __call__(self, scope, receive, send):
+        mode = requested_mode(scope) if scope["type"] == "http" else None
+        if mode is None:
+            await self.app(scope, receive, send)
+            return
+        authorization = next((v.decode("latin-1") for k, v in scope.get("headers", ()) if k == b"authorization"), None)
+        try:
+            allowed = await run_in_threadpool(self.authorize, authorization)
+        except Exception:
+            allowed = False
+        if not allowed:
+            await self.app(scope, receive, send)  # ignored for non-admins, as if absent
+            return
+
+        profile = Profile(scope.get("method", ""), scope.get("path", ""), explain=mode == "explain")
+        start = time.perf_counter()
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                profile.total_ms = (time.perf_counter() - start) * 1000.0
+                headers = list(message.get("headers", ()))
+                headers += [
+                    (b"x-ziris-profile-id", profile.id.encode()),
+                    (b"x-ziris-profile", profile.summary().encode()),
+                    (b"server-timing", f"db;dur={profile.db_ms():.1f}".encode()),
+                ]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _current.set(profile)
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            _current.reset(token)
+            profile.total_ms = (time.perf_counter() - start) * 1000.0
+            self.store.put(profile)
@@ -0,0 +1,202 @@
+"""Sliding-window rate limiting.
+
+Each key holds two counters (the current and the previous fixed window); the
+hits in the last ``per_seconds`` are estimated as
+``previous * (1 - elapsed / per_seconds) + current``, so memory is O(1) per
+key whatever the limit. Rejected hits are not counted.
+
+Backends, picked with ``ZIRIS_RATE_LIMIT_BACKEND``:
+
+- ``memory`` (default): per process. Keys idle for two windows are evicted
+  and at most ``ZIRIS_RATE_LIMIT_MAX_KEYS`` are kept (least recently used
+  first), so a burst over many usernames or IPs cannot grow memory without
+  bound.
+- ``redis``: shared by every worker, at ``ZIRIS_REDIS_URL`` (optional
+  ``redis`` package). Window counters expire on their own.
+
+Limits are ``"<hits>/<seconds>"`` strings, overridable per rule through
+``ZIRIS_RATE_<RULE>`` (e.g. ``ZIRIS_RATE_LOGIN=20/60``).
+
+Per-IP rules key on the peer address. ``X-Forwarded-For`` is only read when
+the peer is one of ``ZIRIS_TRUSTED_PROXIES`` (comma-separated addresses or
+CIDRs); the client is then the right-most hop that is not a trusted proxy,
+since anything to its left was written by the client itself.
+"""
+import ipaddress
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+RATE_LIMIT_BACKEND = os.getenv("ZIRIS_RATE_LIMIT_BACKEND", "memory")
+MAX_KEYS = int(os.getenv("ZIRIS_RATE_LIMIT_MAX_KEYS", "100000"))
+REDIS_URL = os.getenv("ZIRIS_REDIS_URL", "redis://localhost:6379/0")
+BACKENDS = ("memory", "redis")
+
+Networks = List[Any]  # ipaddress.IPv4Network | IPv6Network
+
+
+def parse_networks(spec: str) -> Networks:
+    return [ipaddress.ip_network(part.strip(), strict=False) for part in spec.split(",") if part.strip()]
+
+
+TRUSTED_PROXIES = parse_networks(os.getenv("ZIRIS_TRUSTED_PROXIES", ""))
+
+# rule -> default "<hits>/<seconds>"
+DEFAULT_LIMITS = {
+    "login": "10/60",
+    "login-user": "10/60",
+    "register": "5/60",
+    "ingest": "600/60",
+}
+
+Decision = Tuple[bool, float]  # (allowed, retry after in seconds)
+
+
+def parse_limit(spec: str) -> Tuple[int, float]:
+    hits, _, seconds = spec.partition("/")
+    limit, per = int(hits), float(seconds or 60)
+    if limit < 1 or per <= 0:
+        raise ValueError(f"invalid rate limit {spec!r}")
+    return limit, per
+
+
+def limit_for(rule: str) -> Tuple[int, float]:
+    return parse_limit(os.getenv(f"ZIRIS_RATE_{rule.upper().replace('-', '_')}", DEFAULT_LIMITS.get(rule, "60/60")))
+
+
+def _estimate(prev: int, curr: int, now: float, per: float) -> Tuple[float, float]:
+    """Weighted hit count and seconds until the current window rolls over."""
+    elapsed = now - math.floor(now / per) * per
+    return prev * (1.0 - elapsed / per) + curr, per - elapsed
+
+
+class MemoryBackend:
+    def __init__(self, max_keys: int = MAX_KEYS, clock: Callable[[], float] = time.time):
+        self.max_keys = max(1, max_keys)
+        self.clock = clock
+        self.evicted = 0
+        self._keys: "OrderedDict[str, List[Any]]" = OrderedDict()  # key -> [window index, prev, curr, idle deadline]
+        self._lock = threading.Lock()
+
+    def _evict(self, now: float) -> None:
+        # Least recently used first: stop at the first key still in use
+        while self._keys:
+            key, state = next(iter(self._keys.items()))
+            if state[3] > now and len(self._keys) <= self.max_keys:
+                break
+            del self._keys[key]
+            self.evicted += 1
+
+    def hit(self, key: str, limit: int, per: float) -> Decision:
+        now = self.clock()
+        idx = int(now // per)
+        with self._lock:
+            state = self._keys.get(key)
+            if state is None or state[0] < idx - 1:
+                state = [idx, 0, 0, 0.0]
+                self._keys[key] = state
+            elif state[0] == idx - 1:
+                state[:3] = [idx, state[2], 0]
+            self._keys.move_to_end(key)
+            state[3] = now + 2 * per
+            count, retry = _estimate(state[1], state[2], now, per)
+            allowed = count < limit
+            if allowed:
+                state[2] += 1
+            self._evict(now)
+        return allowed, 0.0 if allowed else retry
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"keys": len(self._keys), "evicted": self.evicted}
+
+
+class RedisBackend:
+    def __init__(self, client: Any, prefix: str = "ziris:rl", clock: Callable[[], float] = time.time):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def hit(self, key: str, limit: int, per: float) -> Decision:
+        now = self.clock()
+        idx = int(now // per)
+        curr_key, prev_key = f"{self.prefix}:{key}:{idx}", f"{self.prefix}:{key}:{idx - 1}"
+        pipe = self.client.pipeline()
+        pipe.incr(curr_key)
+        pipe.pexpire(curr_key, int(2 * per * 1000))
+        pipe.get(prev_key)
+        curr, _, prev = pipe.execute()
+        count, retry = _estimate(int(prev or 0), int(curr) - 1, now, per)
+        if count < limit:
+            return True, 0.0
+        self.client.decr(curr_key)
+        return False, retry
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class RateLimiter:
+    """Checks hits against per-rule limits and counts outcomes per rule."""
+
+    def __init__(self, backend: Any):
+        self.backend = backend
+        self.allowed: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def check(self, rule: str, key: str, limit: Optional[int] = None, per_seconds: Optional[float] = None) -> None:
+        """Count one hit of ``key`` under ``rule``; raises 429 with ``Retry-After`` past the limit."""
+        if limit is None or per_seconds is None:
+            limit, per_seconds = limit_for(rule)
+        allowed, retry = self.backend.hit(f"{rule}:{key}", limit, per_seconds)
+        counters = self.allowed if allowed else self.rejected
+        counters[rule] = counters.get(rule, 0) + 1
+        if not allowed:
+            raise HTTPException(status_code=429, detail="Too many requests", headers={"Retry-After": str(max(1, math.ceil(retry)))})
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": type(self.backend).__name__, "allowed": dict(self.allowed), "rejected": dict(self.rejected), **self.backend.stats()}
+
+
+def _in_networks(addr: str, networks: Networks) -> bool:
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return False
+    return any(ip in net for net in networks)
+
+
+def client_ip(request: Request, trusted: Optional[Networks] = None) -> str:
+    """Client address for per-IP limits (see the module docstring for proxies)."""
+    trusted = TRUSTED_PROXIES if trusted is None else trusted
+    peer = request.client.host if request.client else ""
+    if trusted and _in_networks(peer, trusted):
+        hops = [h.strip() for h in request.headers.get("x-forwarded-for", "").split(",") if h.strip()]
+        for hop in reversed(hops):
+            if not _in_networks(hop, trusted):
+                return hop
+    return peer or "unknown"
+
+
+def make_limiter(backend: str = RATE_LIMIT_BACKEND, redis_url: str = REDIS_URL) -> RateLimiter:
+    if backend == "memory":
+        return RateLimiter(MemoryBackend())
+    if backend == "redis":
+        import redis  # optional dependency
+
+        return RateLimiter(RedisBackend(redis.Redis.from_url(redis_url)))
+    raise ValueError(f"ZIRIS_RATE_LIMIT_BACKEND must be one of {', '.join(BACKENDS)}")
+
+
+def per_ip(limiter: RateLimiter, rule: str) -> Callable[[Request], None]:
+    """FastAPI dependency limiting ``rule`` per client IP."""
+
+    def _dep(request: Request) -> None:
+        limiter.check(rule, client_ip(request))
+
+    return _dep
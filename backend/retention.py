@@ -0,0 +1,241 @@
+"""Retention and downsampling of raw sensor readings.
+
+Readings older than the retention age are folded into per-zone minute/hour
+buckets in ``sensor_rollups`` (count, anomaly count, min/max/sum per metric)
+and then deleted from ``sensor_data`` batch by batch, each batch in one
+transaction so a reading is always in exactly one of the two tables.
+:func:`read_trend` merges both sources, so trend queries see the same
+buckets before and after a purge.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import and_, case, func, update
+from sqlalchemy.orm import Session
+
+from .database import SensorData, SensorRollup
+from .partitions import drop_partitions_before, ensure_month_partitions
+
+RETENTION_DAYS = int(os.getenv("ZIRIS_RETENTION_DAYS", "30"))
+RETENTION_GRANULARITY = os.getenv("ZIRIS_RETENTION_GRANULARITY", "hour")
+RETENTION_BATCH = int(os.getenv("ZIRIS_RETENTION_BATCH", "10000"))
+
+GRANULARITIES = ("minute", "hour")
+_UNITS = {"minute": "m", "hour": "h"}
+# rollup column prefix -> SensorData attribute
+METRICS = (("temp", "temperature"), ("press", "pression"), ("vib", "vibration"), ("fumee", "fumee"))
+
+Key = Tuple[str, datetime]
+Bucket = Dict[str, Any]
+
+
+def _floor(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(second=0, microsecond=0)
+
+
+def fold_readings(rows: Sequence[Sequence[Any]], granularity: str) -> Dict[Key, Bucket]:
+    """Aggregate ``(timestamp, zone, temperature, pression, vibration, fumee, anomaly)`` tuples.
+
+    Grouping and min/max/sum use sorted ``reduceat`` passes rather than a
+    per-row Python loop.
+    """
+    if not rows:
+        return {}
+    cols = list(zip(*rows))
+    ts = np.array(cols[0], dtype="datetime64[us]").astype(f"datetime64[{_UNITS[granularity]}]")
+    zones, zinv = np.unique(np.array([z or "Unknown" for z in cols[1]], dtype=str), return_inverse=True)
+    buckets, binv = np.unique(ts, return_inverse=True)
+    key = zinv.astype(np.int64) * len(buckets) + binv
+    order = np.argsort(key, kind="stable")
+    sorted_key = key[order]
+    starts = np.flatnonzero(np.r_[True, sorted_key[1:] != sorted_key[:-1]])
+    counts = np.diff(np.r_[starts, len(sorted_key)])
+    anomalies = np.add.reduceat(np.array(cols[6], dtype=bool)[order].astype(np.int64), starts)
+    stats = {}
+    for i, (prefix, _) in enumerate(METRICS):
+        vals = np.nan_to_num(np.array(cols[2 + i], dtype=np.float64), nan=0.0)[order]
+        stats[prefix] = (np.minimum.reduceat(vals, starts), np.maximum.reduceat(vals, starts), np.add.reduceat(vals, starts))
+    out: Dict[Key, Bucket] = {}
+    for j, s in enumerate(starts.tolist()):
+        k = int(sorted_key[s])
+        zone = str(zones[k // len(buckets)])
+        start = buckets[k % len(buckets)].astype("datetime64[us]").astype(datetime)
+        b: Bucket = {"count": int(counts[j]), "anomalies": int(anomalies[j])}
+        for prefix, (mins, maxs, sums) in stats.items():
+            b[f"{prefix}_min"] = float(mins[j])
+            b[f"{prefix}_max"] = float(maxs[j])
+            b[f"{prefix}_sum"] = float(sums[j])
+        out[(zone, start)] = b
+    return out
+
+
+def _merge(a: Bucket, b: Bucket) -> Bucket:
+    out = {"count": a["count"] + b["count"], "anomalies": a["anomalies"] + b["anomalies"]}
+    for prefix, _ in METRICS:
+        out[f"{prefix}_min"] = min(a[f"{prefix}_min"], b[f"{prefix}_min"])
+        out[f"{prefix}_max"] = max(a[f"{prefix}_max"], b[f"{prefix}_max"])
+        out[f"{prefix}_sum"] = a[f"{prefix}_sum"] + b[f"{prefix}_sum"]
+    return out
+
+
+def _lesser(col, value):
+    return case((col.is_(None), value), (col > value, value), else_=col)
+
+
+def _greater(col, value):
+    return case((col.is_(None), value), (col < value, value), else_=col)
+
+
+def merge_rollups(db: Session, granularity: str, buckets: Dict[Key, Bucket]) -> None:
+    """Upsert buckets into ``sensor_rollups`` (caller commits)."""
+    dialect = db.get_bind().dialect.name
+    for (zone, start), b in buckets.items():
+        values = {"zone": zone, "granularity": granularity, "bucket_start": start, **b}
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            stmt = upsert(SensorRollup).values(**values)
+            ex = stmt.excluded
+            set_ = {"count": SensorRollup.count + ex.count, "anomalies": SensorRollup.anomalies + ex.anomalies}
+            for prefix, _ in METRICS:
+                col_min, col_max, col_sum = (getattr(SensorRollup, f"{prefix}_{s}") for s in ("min", "max", "sum"))
+                set_[f"{prefix}_min"] = _lesser(col_min, getattr(ex, f"{prefix}_min"))
+                set_[f"{prefix}_max"] = _greater(col_max, getattr(ex, f"{prefix}_max"))
+                set_[f"{prefix}_sum"] = col_sum + getattr(ex, f"{prefix}_sum")
+            db.execute(stmt.on_conflict_do_update(index_elements=["zone", "granularity", "bucket_start"], set_=set_))
+            continue
+        where = and_(SensorRollup.zone == zone, SensorRollup.granularity == granularity, SensorRollup.bucket_start == start)
+        set_ = {"count": SensorRollup.count + b["count"], "anomalies": SensorRollup.anomalies + b["anomalies"]}
+        for prefix, _ in METRICS:
+            set_[f"{prefix}_min"] = _lesser(getattr(SensorRollup, f"{prefix}_min"), b[f"{prefix}_min"])
+            set_[f"{prefix}_max"] = _greater(getattr(SensorRollup, f"{prefix}_max"), b[f"{prefix}_max"])
+            set_[f"{prefix}_sum"] = getattr(SensorRollup, f"{prefix}_sum") + b[f"{prefix}_sum"]
+        if not db.execute(update(SensorRollup).where(where).values(**set_)).rowcount:
+            db.add(SensorRollup(**values))
+            db.flush()
+
+
+_RAW_COLUMNS = (SensorData.timestamp, SensorData.zone, SensorData.temperature, SensorData.pression, SensorData.vibration, SensorData.fumee, SensorData.anomaly)
+
+
+def run_retention(
+    db: Session,
+    older_than_days: int = RETENTION_DAYS,
+    granularity: str = RETENTION_GRANULARITY,
+    batch_size: int = RETENTION_BATCH,
+    progress: Optional[Callable[[int, int], None]] = None,
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """Downsample and purge raw rows older than ``older_than_days``.
+
+    Each batch (oldest first) is rolled up, deleted and committed on its own.
+    ``progress(done, total)`` is called after every batch. When ``sensor_data``
+    is partitioned, month partitions that now lie entirely before the cutoff
+    are dropped at the end.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+    cutoff = (now or datetime.utcnow()) - timedelta(days=max(0, int(older_than_days)))
+    batch_size = max(100, int(batch_size))
+    total = db.query(func.count(SensorData.id)).filter(SensorData.timestamp < cutoff).scalar() or 0
+    purged = 0
+    buckets = 0
+    while True:
+        batch = (
+            db.query(SensorData.id, *_RAW_COLUMNS)
+            .filter(SensorData.timestamp < cutoff)
+            .order_by(SensorData.timestamp.asc(), SensorData.id.asc())
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        folded = fold_readings([tuple(r[1:]) for r in batch], granularity)
+        merge_rollups(db, granularity, folded)
+        ids = [r[0] for r in batch]
+        db.query(SensorData).filter(SensorData.timestamp < cutoff, SensorData.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        purged += len(ids)
+        buckets += len(folded)
+        if progress:
+            progress(purged, max(total, purged))
+    dropped: List[str] = []
+    try:
+        conn = db.connection()
+        dropped = drop_partitions_before(conn, cutoff)
+        ensure_month_partitions(conn)
+        db.commit()
+    except Exception:
+        db.rollback()
+    return {"cutoff": cutoff.isoformat(), "purged": purged, "buckets": buckets, "dropped_partitions": dropped}
+
+
+def _bucket_expr(dialect: str, granularity: str):
+    if dialect == "postgresql":
+        return func.date_trunc(granularity, SensorData.timestamp)
+    if dialect == "sqlite":
+        return func.strftime("%Y-%m-%d %H:00:00" if granularity == "hour" else "%Y-%m-%d %H:%M:00", SensorData.timestamp)
+    return None
+
+
+def _raw_buckets(db: Session, since: datetime, until: datetime, granularity: str, zone: Optional[str]) -> Dict[Key, Bucket]:
+    filters = [SensorData.timestamp >= since, SensorData.timestamp < until]
+    if zone:
+        filters.append(SensorData.zone == zone)
+    expr = _bucket_expr(db.get_bind().dialect.name, granularity)
+    if expr is None:
+        rows = db.query(*_RAW_COLUMNS).filter(*filters).all()
+        return fold_readings([tuple(r) for r in rows], granularity)
+    aggs = [func.count(SensorData.id), func.sum(case((SensorData.anomaly.is_(True), 1), else_=0))]
+    for _, attr in METRICS:
+        col = func.coalesce(getattr(SensorData, attr), 0.0)
+        aggs += [func.min(col), func.max(col), func.sum(col)]
+    zone_col = func.coalesce(SensorData.zone, "Unknown")
+    rows = db.query(zone_col, expr, *aggs).filter(*filters).group_by(zone_col, expr).all()
+    out: Dict[Key, Bucket] = {}
+    for r in rows:
+        start = r[1] if isinstance(r[1], datetime) else datetime.fromisoformat(str(r[1]))
+        b: Bucket = {"count": int(r[2]), "anomalies": int(r[3] or 0)}
+        for i, (prefix, _) in enumerate(METRICS):
+            b[f"{prefix}_min"], b[f"{prefix}_max"], b[f"{prefix}_sum"] = (float(v or 0.0) for v in r[4 + 3 * i: 7 + 3 * i])
+        out[(r[0], start)] = b
+    return out
+
+
+def read_trend(db: Session, since: datetime, until: Optional[datetime] = None, granularity: str = "hour", zone: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Per-zone buckets over ``[since, until)`` from rollups (old data) and raw rows (recent data).
+
+    Rollups finer than ``granularity`` are re-bucketed; coarser ones are
+    returned at their own resolution.
+    """
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {GRANULARITIES}")
+    until = until or datetime.utcnow()
+    merged = _raw_buckets(db, since, until, granularity, zone)
+    q = db.query(SensorRollup).filter(SensorRollup.bucket_start >= _floor(since, "hour"), SensorRollup.bucket_start < until)
+    if zone:
+        q = q.filter(SensorRollup.zone == zone)
+    for r in q.all():
+        if r.bucket_start < since and r.granularity == "minute":
+            continue
+        start = _floor(r.bucket_start, granularity) if GRANULARITIES.index(r.granularity) <= GRANULARITIES.index(granularity) else r.bucket_start
+        b: Bucket = {"count": r.count or 0, "anomalies": r.anomalies or 0}
+        for prefix, _ in METRICS:
+            for s in ("min", "max", "sum"):
+                b[f"{prefix}_{s}"] = float(getattr(r, f"{prefix}_{s}") or 0.0)
+        key = (r.zone, start)
+        merged[key] = _merge(merged[key], b) if key in merged else b
+    out = []
+    for (z, start), b in sorted(merged.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+        c = max(b["count"], 1)
+        item: Dict[str, Any] = {"zone": z, "bucket_start": start, "count": b["count"], "anomalies": b["anomalies"]}
+        for prefix, _ in METRICS:
+            item[prefix] = {"min": b[f"{prefix}_min"], "max": b[f"{prefix}_max"], "mean": b[f"{prefix}_sum"] / c}
+        out.append(item)
+    return out
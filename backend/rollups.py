@@ -0,0 +1,183 @@
+"""Per-zone running aggregates backing /dashboard/data.
+
+Every write path folds its new rows into ``zone_rollups`` inside the same
+transaction as the raw inserts, so the dashboard reads one row per zone
+instead of scanning ``sensor_data``.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import case, func, update
+from sqlalchemy.orm import Session
+
+from .database import SensorData, ZoneRollup
+
+UNKNOWN_ZONE = "Unknown"
+
+
+def _empty() -> Dict[str, Any]:
+    return {"total": 0, "anomalies": 0, "sum_temp": 0.0, "sum_press": 0.0, "sum_vib": 0.0, "sum_fumee": 0.0, "last_ts": None}
+
+
+def fold_rows(rows: Iterable[SensorData]) -> Dict[str, Dict[str, Any]]:
+    """Reduce a batch of (pending) SensorData rows to per-zone deltas."""
+    agg: Dict[str, Dict[str, Any]] = defaultdict(_empty)
+    for r in rows:
+        a = agg[r.zone or UNKNOWN_ZONE]
+        a["total"] += 1
+        a["anomalies"] += 1 if r.anomaly else 0
+        a["sum_temp"] += float(r.temperature or 0.0)
+        a["sum_press"] += float(r.pression or 0.0)
+        a["sum_vib"] += float(r.vibration or 0.0)
+        a["sum_fumee"] += float(r.fumee or 0.0)
+        if r.timestamp and (a["last_ts"] is None or r.timestamp > a["last_ts"]):
+            a["last_ts"] = r.timestamp
+    return dict(agg)
+
+
+def fold_columns(cols: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """Vectorized counterpart of :func:`fold_rows` for bulk column batches."""
+    import numpy as np
+
+    zones = cols["zone"]
+    if not len(zones):
+        return {}
+    keys, inv = np.unique(np.asarray(zones, dtype=str), return_inverse=True)
+    k = len(keys)
+
+    def weighted(values) -> Any:
+        return np.bincount(inv, weights=np.asarray(values, dtype=np.float64), minlength=k)
+
+    counts = np.bincount(inv, minlength=k)
+    anoms = weighted(cols["anomaly"])
+    sums = {name: weighted(cols[src]) for name, src in (("sum_temp", "temperature"), ("sum_press", "pression"), ("sum_vib", "vibration"), ("sum_fumee", "fumee"))}
+    last: Dict[int, datetime] = {}
+    for i, ts in zip(inv.tolist(), cols["timestamp"]):
+        if ts is not None and (i not in last or ts > last[i]):
+            last[i] = ts
+    out: Dict[str, Dict[str, Any]] = {}
+    for i, z in enumerate(keys.tolist()):
+        out[z] = {
+            "total": int(counts[i]),
+            "anomalies": int(anoms[i]),
+            **{name: float(s[i]) for name, s in sums.items()},
+            "last_ts": last.get(i),
+        }
+    return out
+
+
+def _latest(col, value: Optional[datetime]):
+    # NULL-safe GREATEST(col, value) that works on every dialect
+    if value is None:
+        return col
+    return case((col.is_(None), value), (col < value, value), else_=col)
+
+
+def apply_deltas(db: Session, deltas: Dict[str, Dict[str, Any]]) -> None:
+    """Add per-zone deltas to ``zone_rollups`` without committing.
+
+    Uses ``INSERT .. ON CONFLICT DO UPDATE`` where the dialect supports it so
+    concurrent writers never lose increments; other dialects fall back to
+    UPDATE-then-INSERT.
+    """
+    if not deltas:
+        return
+    dialect = db.get_bind().dialect.name
+    for zone, d in deltas.items():
+        values = {"zone": zone, **d}
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            stmt = upsert(ZoneRollup).values(**values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ZoneRollup.zone],
+                set_={
+                    "total": ZoneRollup.total + stmt.excluded.total,
+                    "anomalies": ZoneRollup.anomalies + stmt.excluded.anomalies,
+                    "sum_temp": ZoneRollup.sum_temp + stmt.excluded.sum_temp,
+                    "sum_press": ZoneRollup.sum_press + stmt.excluded.sum_press,
+                    "sum_vib": ZoneRollup.sum_vib + stmt.excluded.sum_vib,
+                    "sum_fumee": ZoneRollup.sum_fumee + stmt.excluded.sum_fumee,
+                    "last_ts": _latest(ZoneRollup.last_ts, d["last_ts"]),
+                },
+            )
+            db.execute(stmt)
+            continue
+        res = db.execute(
+            update(ZoneRollup)
+            .where(ZoneRollup.zone == zone)
+            .values(
+                total=ZoneRollup.total + d["total"],
+                anomalies=ZoneRollup.anomalies + d["anomalies"],
+                sum_temp=ZoneRollup.sum_temp + d["sum_temp"],
+                sum_press=ZoneRollup.sum_press + d["sum_press"],
+                sum_vib=ZoneRollup.sum_vib + d["sum_vib"],
+                sum_fumee=ZoneRollup.sum_fumee + d["sum_fumee"],
+                last_ts=_latest(ZoneRollup.last_ts, d["last_ts"]),
+            )
+        )
+        if not res.rowcount:
+            db.add(ZoneRollup(**values))
+            db.flush()
+
+
+def record_rows(db: Session, rows: Iterable[SensorData]) -> None:
+    """Fold freshly added rows into the rollups (caller commits)."""
+    apply_deltas(db, fold_rows(rows))
+
+
+def record_columns(db: Session, cols: Dict[str, Any]) -> None:
+    """Fold a bulk column batch into the rollups (caller commits)."""
+    apply_deltas(db, fold_columns(cols))
+
+
+def record_flagged(db: Session, flagged: Dict[str, int]) -> None:
+    """Count rows flagged as anomalies after insertion, per zone (caller commits)."""
+    apply_deltas(db, {zone: {**_empty(), "anomalies": n} for zone, n in flagged.items() if n})
+
+
+def rebuild_zone_rollups(db: Session) -> int:
+    """Recompute every rollup from ``sensor_data`` with one GROUP BY (caller commits).
+
+    Used to backfill existing databases; returns the number of zones written.
+    """
+    zone = func.coalesce(SensorData.zone, UNKNOWN_ZONE)
+    grouped = (
+        db.query(
+            zone,
+            func.count(SensorData.id),
+            func.sum(case((SensorData.anomaly.is_(True), 1), else_=0)),
+            func.sum(SensorData.temperature),
+            func.sum(SensorData.pression),
+            func.sum(SensorData.vibration),
+            func.sum(SensorData.fumee),
+            func.max(SensorData.timestamp),
+        )
+        .group_by(zone)
+        .all()
+    )
+    db.query(ZoneRollup).delete(synchronize_session=False)
+    for z, total, anoms, st, sp, sv, sf, last_ts in grouped:
+        db.add(ZoneRollup(
+            zone=z,
+            total=int(total or 0),
+            anomalies=int(anoms or 0),
+            sum_temp=float(st or 0.0),
+            sum_press=float(sp or 0.0),
+            sum_vib=float(sv or 0.0),
+            sum_fumee=float(sf or 0.0),
+            last_ts=last_ts,
+        ))
+    return len(grouped)
+
+
+def ensure_zone_rollups(db: Session) -> None:
+    """Backfill rollups once when raw rows exist but no aggregate does (caller commits)."""
+    if db.query(ZoneRollup.zone).first() is not None:
+        return
+    if db.query(SensorData.id).first() is None:
+        return
+    rebuild_zone_rollups(db)
@@ -0,0 +1,342 @@
+"""Persistent IsolationForest anomaly scoring.
+
+A model is trained once on a sample of the recent sliding window, written to
+``ZIRIS_MODEL_DIR`` as ``iforest-v<N>.joblib`` and published by atomically
+replacing ``current.json``. Publishing is serialized across processes by an
+exclusive lock on ``.retrain.lock`` in that directory: model files get a
+unique name, and the pointer is only replaced if it still holds the version
+the new one was numbered from. Readings are then scored incrementally: each pass
+takes a batch of rows whose ``anomaly_score`` is still NULL (a partial index
+keeps that lookup cheap), writes the score back and sets ``anomaly`` on
+outliers, so scoring cost follows the ingestion rate rather than table size.
+Retraining runs off the scoring path and swaps the in-memory model under a
+lock; every worker picks up a newer published version on its next pass.
+When the window is too small to train on, the background loop retries only
+once new readings arrive or ``ZIRIS_SCORING_RETRAIN_SECONDS`` has passed.
+
+scikit-learn is imported lazily so the API keeps running without it.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from .database import SensorData
+from .rollups import UNKNOWN_ZONE, record_flagged
+
+MODEL_DIR = os.getenv("ZIRIS_MODEL_DIR", os.path.join(os.path.dirname(__file__), "models"))
+CONTAMINATION = float(os.getenv("ZIRIS_SCORING_CONTAMINATION", "0.1"))
+TRAIN_SAMPLE = int(os.getenv("ZIRIS_SCORING_SAMPLE", "20000"))
+TRAIN_WINDOW_DAYS = int(os.getenv("ZIRIS_SCORING_WINDOW_DAYS", "7"))
+SCORING_BATCH = int(os.getenv("ZIRIS_SCORING_BATCH", "5000"))
+RETRAIN_SECONDS = int(os.getenv("ZIRIS_SCORING_RETRAIN_SECONDS", str(24 * 3600)))
+MIN_TRAIN_ROWS = 50
+
+FEATURES = (SensorData.temperature, SensorData.pression, SensorData.vibration, SensorData.fumee)
+POINTER = "current.json"
+LOCK_FILE = ".retrain.lock"
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None  # type: ignore
+    import msvcrt
+
+
+@dataclass
+class ScoringModel:
+    version: int
+    trained_at: datetime
+    n_samples: int
+    contamination: float
+    estimator: Any
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """Anomaly score per row; higher is more anomalous, > 0 means outlier."""
+        return -self.estimator.decision_function(X)
+
+    def meta(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "trained_at": self.trained_at.isoformat(),
+            "n_samples": self.n_samples,
+            "contamination": self.contamination,
+        }
+
+
+def _matrix(rows) -> np.ndarray:
+    X = np.array(rows, dtype=np.float64).reshape(-1, len(FEATURES))
+    return np.nan_to_num(X, nan=0.0)
+
+
+def fit(X: np.ndarray, contamination: float = CONTAMINATION, version: int = 1, seed: int = 42) -> ScoringModel:
+    from sklearn.ensemble import IsolationForest
+
+    estimator = IsolationForest(contamination=contamination, random_state=seed, n_estimators=100)
+    estimator.fit(X)
+    return ScoringModel(version=version, trained_at=datetime.utcnow(), n_samples=len(X), contamination=contamination, estimator=estimator)
+
+
+def _read_pointer(model_dir: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(model_dir, POINTER), "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+@contextmanager
+def publish_lock(model_dir: str, wait: bool = True) -> Iterator[bool]:
+    """Exclusive lock shared by every process using ``model_dir``; yields False if busy and ``wait`` is False."""
+    os.makedirs(model_dir, exist_ok=True)
+    with open(os.path.join(model_dir, LOCK_FILE), "a+b") as fh:
+        try:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK if wait else msvcrt.LK_NBLCK, 1)
+        except OSError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+            else:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def save_model(model: ScoringModel, model_dir: str = MODEL_DIR, expected_version: Optional[int] = None) -> Optional[str]:
+    """Write the model file, then publish it by atomically replacing the pointer.
+
+    With ``expected_version``, the pointer is only replaced if it still
+    points at that version (0: no pointer yet); otherwise the file is removed
+    and None is returned. Call it under :func:`publish_lock`.
+    """
+    import joblib
+
+    os.makedirs(model_dir, exist_ok=True)
+    name = f"iforest-v{model.version}-{uuid.uuid4().hex[:8]}.joblib"
+    tmp = os.path.join(model_dir, f".{name}.tmp")
+    joblib.dump(model.estimator, tmp)
+    os.replace(tmp, os.path.join(model_dir, name))
+    if expected_version is not None and int((_read_pointer(model_dir) or {}).get("version", 0)) != expected_version:
+        os.remove(os.path.join(model_dir, name))
+        return None
+    meta = {**model.meta(), "file": name}
+    tmp = os.path.join(model_dir, f".{POINTER}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(meta, fh)
+    os.replace(tmp, os.path.join(model_dir, POINTER))
+    return name
+
+
+def load_model(model_dir: str = MODEL_DIR) -> Optional[ScoringModel]:
+    meta = _read_pointer(model_dir)
+    if not meta:
+        return None
+    import joblib
+
+    estimator = joblib.load(os.path.join(model_dir, meta["file"]))
+    return ScoringModel(
+        version=int(meta["version"]),
+        trained_at=datetime.fromisoformat(meta["trained_at"]),
+        n_samples=int(meta["n_samples"]),
+        contamination=float(meta["contamination"]),
+        estimator=estimator,
+    )
+
+
+def training_sample(db: Session, window_days: int = TRAIN_WINDOW_DAYS, sample: int = TRAIN_SAMPLE, now: Optional[datetime] = None) -> np.ndarray:
+    """Most recent ``sample`` readings of the sliding window (uses the timestamp index)."""
+    since = (now or datetime.utcnow()) - timedelta(days=window_days)
+    q = select(*FEATURES).where(SensorData.timestamp >= since).order_by(SensorData.timestamp.desc()).limit(sample)
+    return _matrix(db.execute(q).all())
+
+
+def _latest_id(db: Session) -> int:
+    return db.execute(select(func.max(SensorData.id))).scalar() or 0
+
+
+class AnomalyScorer:
+    def __init__(self, model_dir: str = MODEL_DIR, contamination: float = CONTAMINATION, clock: Callable[[], float] = time.monotonic):
+        self.model_dir = model_dir
+        self.contamination = contamination
+        self._model: Optional[ScoringModel] = None
+        self._lock = threading.Lock()
+        self._train_lock = threading.Lock()
+        self._clock = clock
+        self._failed_attempt: Optional[Tuple[float, Optional[int]]] = None  # (when, latest reading id)
+        self.scored = 0
+        self.flagged = 0
+
+    @property
+    def model(self) -> Optional[ScoringModel]:
+        return self._model
+
+    def swap(self, model: ScoringModel) -> None:
+        with self._lock:
+            if self._model is None or model.version >= self._model.version:
+                self._model = model
+
+    def refresh(self) -> Optional[ScoringModel]:
+        """Load the published model if it is newer than the one in memory."""
+        meta = _read_pointer(self.model_dir)
+        current = self._model
+        if meta and (current is None or int(meta["version"]) > current.version):
+            model = load_model(self.model_dir)
+            if model is not None:
+                self.swap(model)
+        return self._model
+
+    def retrain(
+        self,
+        db: Session,
+        window_days: int = TRAIN_WINDOW_DAYS,
+        sample: int = TRAIN_SAMPLE,
+        now: Optional[datetime] = None,
+        max_age: Optional[float] = None,
+        wait: bool = True,
+    ) -> Optional[ScoringModel]:
+        """Fit on the sliding window, publish a new version and swap it in.
+
+        Returns None when the window holds fewer than ``MIN_TRAIN_ROWS``
+        readings, or when another process holds the publish lock and ``wait``
+        is False. With ``max_age``, a published model younger than that is
+        loaded instead of training a new one (another worker just did).
+        Scoring keeps using the previous model until the swap.
+        """
+        with self._train_lock, publish_lock(self.model_dir, wait=wait) as locked:
+            if not locked:
+                return None
+            meta = _read_pointer(self.model_dir) or {}
+            published = int(meta.get("version", 0))
+            if max_age is not None and meta and (datetime.utcnow() - datetime.fromisoformat(meta["trained_at"])).total_seconds() < max_age:
+                self._failed_attempt = None
+                return self.refresh()
+            X = training_sample(db, window_days=window_days, sample=sample, now=now)
+            if len(X) < MIN_TRAIN_ROWS:
+                self._failed_attempt = (self._clock(), _latest_id(db))
+                return None
+            version = max(published, self._model.version if self._model else 0) + 1
+            model = fit(X, contamination=self.contamination, version=version)
+            if save_model(model, self.model_dir, expected_version=published) is None:
+                return self.refresh()  # pointer moved under us: keep the published model
+            self._failed_attempt = None
+            self.swap(model)
+            return model
+
+    def retrain_due(self, db: Session, max_age_seconds: int = RETRAIN_SECONDS) -> bool:
+        """Whether the background loop should try to retrain now.
+
+        After a retrain that found too little data, wait for new readings or
+        ``max_age_seconds`` instead of retrying on every pass.
+        """
+        if not self.needs_retrain(max_age_seconds):
+            return False
+        failed = self._failed_attempt
+        if failed is None:
+            return True
+        at, latest = failed
+        # latest is None after an error rather than too little data: time-based retry only
+        return self._clock() - at >= max_age_seconds or (latest is not None and _latest_id(db) != latest)
+
+    def ensure_model(self, db: Session) -> Optional[ScoringModel]:
+        return self.refresh() or self.retrain(db)
+
+    def needs_retrain(self, max_age_seconds: int = RETRAIN_SECONDS) -> bool:
+        model = self._model
+        return model is None or (datetime.utcnow() - model.trained_at).total_seconds() >= max_age_seconds
+
+    def score_pending(self, db: Session, batch_size: int = SCORING_BATCH) -> Tuple[int, Dict[str, int]]:
+        """Score one batch of not-yet-scored readings and commit.
+
+        Rows already flagged (e.g. sent with ``anomaly=true``) stay flagged.
+        Newly flagged rows are added to the per-zone anomaly counts in
+        ``zone_rollups``. Returns ``(rows_scored, {zone: newly_flagged})``.
+        """
+        model = self._model
+        if model is None:
+            return 0, {}
+        q = (
+            select(SensorData.id, SensorData.zone, SensorData.anomaly, *FEATURES)
+            .where(SensorData.anomaly_score.is_(None))
+            .order_by(SensorData.id)
+            .limit(batch_size)
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            # Concurrent workers take disjoint batches
+            q = q.with_for_update(skip_locked=True)
+        rows = db.execute(q).all()
+        if not rows:
+            db.rollback()
+            return 0, {}
+        scores = model.score(_matrix([r[3:] for r in rows]))
+        outlier = scores > 0
+        params = []
+        newly: Dict[str, int] = {}
+        for r, s, out in zip(rows, scores.tolist(), outlier.tolist()):
+            flagged = bool(r.anomaly) or out
+            if flagged and not r.anomaly:
+                z = r.zone or UNKNOWN_ZONE
+                newly[z] = newly.get(z, 0) + 1
+            params.append({"id": r.id, "anomaly_score": s, "anomaly": flagged})
+        db.execute(update(SensorData), params)
+        record_flagged(db, newly)
+        db.commit()
+        self.scored += len(rows)
+        self.flagged += sum(newly.values())
+        return len(rows), newly
+
+    def stats(self) -> Dict[str, Any]:
+        model = self._model
+        return {"model": model.meta() if model else None, "scored": self.scored, "flagged": self.flagged}
+
+
+scorer = AnomalyScorer()
+
+
+def scoring_loop(session_factory, interval: float = 10.0, on_flagged=None) -> None:
+    """Background loop: keep a model loaded, score new rows, retrain when stale."""
+    while True:
+        db = session_factory()
+        try:
+            scorer.refresh()
+            if scorer.retrain_due(db):
+                threading.Thread(target=_retrain_in_background, args=(session_factory,), daemon=True).start()
+            while scorer.model is not None:
+                n, newly = scorer.score_pending(db)
+                if newly and on_flagged is not None:
+                    on_flagged(newly)
+                if n == 0:
+                    break
+        except Exception:
+            db.rollback()
+        finally:
+            db.close()
+        time.sleep(interval)
+
+
+def _retrain_in_background(session_factory) -> None:
+    if scorer._train_lock.locked():
+        return
+    db = session_factory()
+    try:
+        # Another worker may be training (lock busy) or may just have published
+        scorer.retrain(db, max_age=RETRAIN_SECONDS, wait=False)
+    except Exception:
+        scorer._failed_attempt = (scorer._clock(), None)
+    finally:
+        db.close()
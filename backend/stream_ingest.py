@@ -0,0 +1,102 @@
+"""Incremental NDJSON / CSV parsing for streamed sensor uploads.
+
+The request body is consumed as it arrives; complete lines are parsed into
+SensorItem-shaped dicts and handed out in fixed-size chunks, so memory stays
+bounded by the chunk size whatever the upload size.
+"""
+import csv
+import json
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Same layout as backend/ziris_export.csv; `id` is accepted and ignored
+CSV_COLUMNS = ["id", "timestamp", "zone", "temperature", "pression", "vibration", "fumee", "flamme", "anomaly"]
+
+MAX_LINE_BYTES = 64 * 1024
+
+
+def detect_format(content_type: Optional[str], explicit: Optional[str] = None) -> Optional[str]:
+    if explicit:
+        fmt = explicit.lower()
+        return fmt if fmt in ("ndjson", "csv") else None
+    ct = (content_type or "").split(";")[0].strip().lower()
+    if ct in ("application/x-ndjson", "application/ndjson", "application/jsonl", "application/json-seq"):
+        return "ndjson"
+    if ct in ("text/csv", "application/csv"):
+        return "csv"
+    return None
+
+
+class StreamParser:
+    """Feed raw byte chunks, get back ``(line_no, record | None, error)`` tuples.
+
+    ``line_no`` is 1-based over the whole body (CSV header included) so
+    rejects can be located in the original upload.
+    """
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self._pending: List[bytes] = []  # pieces of the current line, joined once it ends
+        self._pending_len = 0
+        self._skipping = False  # inside a line already rejected as too long
+        self._line_no = 0
+        self._header: Optional[List[str]] = None
+
+    def _too_long(self) -> Tuple[int, Optional[Dict[str, Any]], Optional[str]]:
+        self._line_no += 1
+        return self._line_no, None, "line too long"
+
+    def feed(self, data: bytes) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        pos = 0
+        while True:
+            end = data.find(b"\n", pos)
+            if end < 0:
+                if not self._skipping and pos < len(data):
+                    self._pending.append(data[pos:])
+                    self._pending_len += len(data) - pos
+                    if self._pending_len > MAX_LINE_BYTES:
+                        # Refuse to buffer an unbounded line: report it once, drop it up to its newline
+                        self._pending, self._pending_len, self._skipping = [], 0, True
+                        yield self._too_long()
+                return
+            if self._skipping:
+                self._skipping = False
+            else:
+                line = b"".join(self._pending) + data[pos:end] if self._pending else data[pos:end]
+                self._pending, self._pending_len = [], 0
+                out = self._too_long() if len(line) > MAX_LINE_BYTES else self._parse(line)
+                if out is not None:
+                    yield out
+            pos = end + 1
+
+    def finish(self) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        if self._pending and not self._skipping:
+            line = b"".join(self._pending)
+            self._pending, self._pending_len = [], 0
+            out = self._parse(line)
+            if out is not None:
+                yield out
+
+    def _parse(self, raw: bytes) -> Optional[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]:
+        self._line_no += 1
+        line = raw.rstrip(b"\r").decode("utf-8", errors="replace")
+        if not line.strip():
+            return None
+        if self.fmt == "ndjson":
+            try:
+                rec = json.loads(line)
+            except ValueError:
+                return self._line_no, None, "invalid json"
+            if not isinstance(rec, dict):
+                return self._line_no, None, "expected a json object"
+            return self._line_no, rec, None
+        cells = next(csv.reader([line]))
+        if self._header is None:
+            header = [c.strip().lower() for c in cells]
+            if "zone" in header:
+                self._header = header
+                return None
+            # headerless upload: assume the export layout
+            self._header = CSV_COLUMNS
+        if len(cells) != len(self._header):
+            return self._line_no, None, f"expected {len(self._header)} columns, got {len(cells)}"
+        return self._line_no, dict(zip(self._header, cells)), None
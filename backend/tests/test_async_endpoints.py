@@ -0,0 +1,89 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend import main
+from backend.database import Base, SensorData, Threshold, User, ZoneRollup
+from backend.principal_cache import PrincipalCache
+from backend.threshold_cache import ThresholdCache
+
+pytest.importorskip("aiosqlite")
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import NullPool  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    url = f"sqlite:///{tmp_path}/ziris.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    S = sessionmaker(bind=engine)
+    # Each TestClient request runs on its own event loop, so no pooled connections
+    aengine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"), poolclass=NullPool)
+    AS = async_sessionmaker(aengine, expire_on_commit=False)
+
+    async def async_db():
+        async with AS() as db:
+            yield db
+
+    monkeypatch.setitem(main.app.dependency_overrides, main.get_async_db, async_db)
+    monkeypatch.setattr(main, "thresholds_cache", ThresholdCache(ttl=60))
+    monkeypatch.setattr(main, "principals", PrincipalCache(ttl=60))
+
+    db = S()
+    user = User(username="op", hashed_password="x", role="user", is_active=True)
+    db.add_all([
+        user,
+        Threshold(temp=50.0, press=5.0, vib=10.0, fumee=100.0),
+        ZoneRollup(zone="A", total=2, anomalies=1, sum_temp=120.0, sum_press=8.0, sum_vib=6.0, sum_fumee=40.0, last_ts=datetime(2024, 1, 1)),
+        SensorData(zone="A", temperature=70.0, pression=4.0, vibration=3.0, fumee=20.0, timestamp=datetime(2024, 1, 1)),
+        SensorData(zone="A", temperature=50.0, pression=4.0, vibration=3.0, fumee=20.0, timestamp=datetime(2024, 1, 1)),
+    ])
+    db.commit()
+    headers = {"Authorization": f"Bearer {main.create_token({'sub': user.id})}"}
+    yield TestClient(main.app), headers, S
+    asyncio.run(aengine.dispose())
+
+
+def test_async_endpoints_require_auth(app):
+    client, _, _ = app
+    for path in ("/thresholds", "/dashboard/data", "/sensor/recommendations"):
+        assert client.get(path).status_code == 401
+        assert client.get(path, headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert client.get("/sensor-data").status_code == 200  # public
+
+
+def test_async_endpoints_serve_data(app):
+    client, headers, _ = app
+    rows = client.get("/sensor-data").json()
+    assert [r["temperature"] for r in rows] == [50.0, 70.0]
+
+    dash = client.get("/dashboard/data", headers=headers).json()
+    assert (dash["total_sensors"], dash["anomalies"]) == (2, 1)
+    assert dash["zones"]["A"]["temp"] == 60.0
+
+    recs = client.get("/sensor/recommendations", headers=headers).json()
+    assert len(recs) == 1 and recs[0]["zone"] == "A"  # only the 70° reading is over 50°
+
+
+def test_async_endpoints_use_the_caches(app):
+    client, headers, S = app
+    assert client.get("/thresholds", headers=headers).json()["temp"] == 50.0
+    cache = main.thresholds_cache
+    assert (cache.loads, cache.hits) == (1, 0)  # miss
+    assert client.get("/thresholds", headers=headers).json()["temp"] == 50.0
+    client.get("/sensor/recommendations", headers=headers)
+    assert (cache.loads, cache.hits) == (1, 2)  # hits
+    assert (main.principals.misses, main.principals.hits) == (1, 2)
+
+    db = S()
+    db.query(Threshold).update({"temp": 65.0, "version": Threshold.version + 1})
+    db.commit()
+    assert client.get("/thresholds", headers=headers).json()["temp"] == 50.0  # within the TTL
+    cache.invalidate()
+    assert client.get("/thresholds", headers=headers).json()["temp"] == 65.0
+    assert cache.loads == 2
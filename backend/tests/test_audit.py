@@ -0,0 +1,79 @@
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend.audit import AuditWriter
+from backend.database import AuditLog, Base
+
+
+def _sessions():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _count(S):
+    db = S()
+    try:
+        return db.query(AuditLog).count()
+    finally:
+        db.close()
+
+
+def test_record_buffers_until_flush_in_batches():
+    S = _sessions()
+    w = AuditWriter(S, max_buffer=100, batch_size=4)
+    for i in range(10):
+        assert w.record("login", user_id=i, details={"i": i})
+    assert _count(S) == 0
+    assert w.flush() == 10
+    assert (_count(S), w.flushes, w.stats()["buffered"]) == (10, 3, 0)
+    db = S()
+    assert db.query(AuditLog).filter(AuditLog.user_id == 3).one().details == '{"i": 3}'
+
+
+def test_overflow_is_dropped_and_counted():
+    S = _sessions()
+    w = AuditWriter(S, max_buffer=3, batch_size=10)
+    assert [w.record("refresh") for _ in range(5)] == [True, True, True, False, False]
+    w.flush()
+    assert (_count(S), w.dropped) == (3, 2)
+
+
+def test_failed_batch_is_requeued():
+    S = _sessions()
+    down = [True]
+
+    def sessions():
+        if down[0]:
+            raise RuntimeError("db down")
+        return S()
+
+    w = AuditWriter(sessions, max_buffer=3, batch_size=2)
+    for action in ("a", "b", "c"):
+        w.record(action)
+    assert w.flush() == 0
+    assert (w.errors, w.stats()["buffered"]) == (1, 3)
+    down[0] = False
+    assert w.flush() == 3
+    db = S()
+    assert [r.action for r in db.query(AuditLog).order_by(AuditLog.id)] == ["a", "b", "c"]
+
+
+def test_writer_thread_flushes_on_size_and_on_stop():
+    S = _sessions()
+    w = AuditWriter(S, max_buffer=1000, batch_size=5, flush_ms=60_000)
+    w.start()
+    try:
+        for _ in range(5):
+            w.record("login")
+        deadline = time.time() + 5
+        while _count(S) < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        assert _count(S) == 5
+        w.record("logout")
+    finally:
+        w.stop()
+    assert _count(S) == 6 and not w.running
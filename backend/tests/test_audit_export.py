@@ -0,0 +1,60 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.audit_export import check_format, stream_audit
+from backend.database import AuditLog, Base
+
+T0 = datetime(2025, 3, 1)
+
+
+def _sessions(n=25):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    S = sessionmaker(bind=engine)
+    db = S()
+    db.add_all([AuditLog(id=i + 1, ts=T0 + timedelta(hours=i), user_id=i % 3, action="login" if i % 2 else "ingest", details='{"n": %d}' % i) for i in range(n)])
+    db.commit()
+    db.close()
+    return S
+
+
+def _body(S, **kw):
+    return b"".join(stream_audit(S, batch_size=4, **kw))
+
+
+def test_csv_streams_every_row_in_batches():
+    S = _sessions()
+    chunks = list(stream_audit(S, batch_size=4))
+    assert len(chunks) == 7  # one chunk per batch, header included in the first
+    rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+    assert rows[0] == ["id", "ts", "user_id", "action", "details"]
+    assert [int(r[0]) for r in rows[1:]] == list(range(25, 0, -1))
+
+
+def test_filters_sort_and_gzip_ndjson():
+    S = _sessions()
+    body = _body(S, fmt="ndjson", gzip=True, descending=False, action="login", date_from=(T0 + timedelta(hours=10)).isoformat())
+    rows = [json.loads(line) for line in gzip.decompress(body).decode().splitlines()]
+    assert [r["id"] for r in rows] == [12, 14, 16, 18, 20, 22, 24]
+    assert rows[0]["ts"] == "2025-03-01T11:00:00" and rows[0]["details"] == '{"n": 11}'
+
+
+def test_parquet_round_trip():
+    pq = pytest.importorskip("pyarrow.parquet")
+    S = _sessions()
+    table = pq.read_table(io.BytesIO(_body(S, fmt="parquet", limit=10)))
+    assert table.num_rows == 10 and table.column("id").to_pylist()[0] == 25
+
+
+def test_rejects_unknown_format_and_gzipped_parquet():
+    with pytest.raises(ValueError):
+        check_format("xlsx")
+    with pytest.raises(ValueError):
+        check_format("parquet", gzip=True)
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.bulk_ingest import validate_records, write_columns
+from backend.database import Base, SensorData, ZoneRollup
+from backend.rollups import record_columns
+
+
+def _item(**kw):
+    base = {"zone": "A", "temperature": 20.0, "pression": 1.0, "vibration": 2.0, "fumee": 3.0}
+    base.update(kw)
+    return base
+
+
+def test_validate_records_reports_rejects_by_index():
+    records = [
+        _item(),
+        _item(zone=""),
+        _item(temperature="hot"),
+        _item(timestamp="yesterday"),
+        _item(flamme="true", timestamp="2025-01-01T10:00:00"),
+    ]
+    cols, rejects = validate_records(records, now=datetime(2025, 6, 1))
+    assert [r["index"] for r in rejects] == [1, 2, 3]
+    assert "zone" in rejects[0]["reason"]
+    assert "temperature" in rejects[1]["reason"]
+    assert "timestamp" in rejects[2]["reason"]
+    assert len(cols["zone"]) == 2
+    assert cols["flamme"].tolist() == [False, True]
+    assert cols["timestamp"][0] == datetime(2025, 6, 1)
+
+
+def test_write_columns_inserts_accepted_rows():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    cols, _ = validate_records([_item(), _item(zone="B", anomaly=True)])
+    assert write_columns(db, cols) == 2
+    db.commit()
+    assert db.query(SensorData).filter(SensorData.anomaly.is_(True)).count() == 1
+
+
+def test_mixed_offsets_are_stored_as_naive_utc():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    records = [
+        _item(timestamp="2026-01-01T00:00:00"),
+        _item(timestamp="2026-01-01T00:00:00+02:00"),
+        _item(timestamp=datetime(2026, 1, 1, 3, tzinfo=timezone(timedelta(hours=1)))),
+    ]
+    cols, rejects = validate_records(records)
+    assert rejects == []
+    assert cols["timestamp"].tolist() == [datetime(2026, 1, 1), datetime(2025, 12, 31, 22), datetime(2026, 1, 1, 2)]
+    assert write_columns(db, cols) == 3
+    record_columns(db, cols)  # compares timestamps across the batch
+    db.commit()
+    assert db.get(ZoneRollup, "A").last_ts == datetime(2026, 1, 1, 2)
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from backend.data_generator import SCENARIOS, ZoneProfile, generate_columns, generate_sensor_data, iter_chunks
+
+END = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def test_same_seed_same_dataset():
+    a = generate_columns(1000, contamination=0.1, rng=7, end=END, profiles=SCENARIOS["noisy"])
+    b = generate_columns(1000, contamination=0.1, rng=np.random.default_rng(7), end=END, profiles=SCENARIOS["noisy"])
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k])
+
+
+def test_chunks_form_one_continuous_timeline():
+    chunks = list(iter_chunks(2500, chunk_size=1000, rng=1, end=END, interval_seconds=2))
+    assert [len(c["zone"]) for c in chunks] == [1000, 1000, 500]
+    ts = np.concatenate([c["timestamp"] for c in chunks])
+    assert ts[-1] == END
+    assert set(np.diff(ts.astype("datetime64[us]")).tolist()) == {timedelta(seconds=2)}
+
+
+def test_profiles():
+    profiles = {
+        "calm": ZoneProfile(flame_rate=0.0),
+        "fire": ZoneProfile(fire_rate=0.5, flame_rate=0.0),
+        "broken": ZoneProfile(dropout_rate=0.5, flame_rate=0.0),
+        "drifting": ZoneProfile(drift_per_hour=(10.0, 0.0, 0.0, 0.0), flame_rate=0.0),
+    }
+    cols = generate_columns(40_000, rng=3, end=END, interval_seconds=3.6, profiles=profiles)
+    zone = cols["zone"]
+    assert not cols["flamme"][zone == "calm"].any()
+    fire = zone == "fire"
+    assert 0.4 < cols["flamme"][fire].mean() < 0.6
+    assert (cols["anomaly"] == cols["flamme"]).all()
+    assert 0.4 < np.isnan(cols["temperature"][zone == "broken"]).mean() < 0.6
+    drifting = cols["temperature"][zone == "drifting"]
+    # 40k readings 3.6s apart = 40h of drift at 10 degrees/hour
+    assert drifting[-200:].mean() - drifting[:200].mean() > 300
+
+
+def test_legacy_list_of_dicts():
+    rows = generate_sensor_data(5, rng=0)
+    assert len(rows) == 5
+    assert set(rows[0]) == {"zone", "temperature", "pression", "vibration", "fumee", "flamme"}
@@ -0,0 +1,53 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.pool import NullPool
+
+from backend.db_engine import EngineSettings, TimedAsyncQueuePool, TimedQueuePool, async_url, engine_kwargs, pool_status
+
+
+def test_settings_from_env():
+    s = EngineSettings.from_env({
+        "ZIRIS_DATABASE_URL": "postgresql://u@db/ziris",
+        "ZIRIS_DB_POOL_SIZE": "20",
+        "ZIRIS_DB_MAX_OVERFLOW": "0",
+        "ZIRIS_DB_POOL_PRE_PING": "false",
+        "ZIRIS_DB_STATEMENT_TIMEOUT_MS": "5000",
+    })
+    assert (s.url, s.pool_size, s.max_overflow, s.pre_ping, s.statement_timeout_ms, s.pgbouncer) == ("postgresql://u@db/ziris", 20, 0, False, 5000, False)
+    assert EngineSettings.from_env({}) == EngineSettings()
+    assert async_url(s.url) == "postgresql+asyncpg://u@db/ziris"
+
+
+def test_engine_kwargs_direct_and_pgbouncer():
+    direct = EngineSettings(url="postgresql://u@db/ziris", pool_size=8, statement_timeout_ms=2000)
+    kw = engine_kwargs(direct)
+    assert kw["poolclass"] is TimedQueuePool and kw["pool_size"] == 8
+    assert kw["connect_args"] == {"options": "-c statement_timeout=2000"}
+    akw = engine_kwargs(direct, is_async=True)
+    assert akw["poolclass"] is TimedAsyncQueuePool
+    assert akw["connect_args"] == {"server_settings": {"statement_timeout": "2000"}}
+
+    bouncer = EngineSettings(url="postgresql://u@db/ziris", pgbouncer=True, statement_timeout_ms=2000)
+    assert engine_kwargs(bouncer)["poolclass"] is NullPool
+    assert "connect_args" not in engine_kwargs(bouncer)  # SET LOCAL per transaction instead
+    assert engine_kwargs(bouncer, is_async=True)["connect_args"]["statement_cache_size"] == 0
+
+    assert engine_kwargs(EngineSettings(url="sqlite://")) == {"pool_pre_ping": True}
+
+
+def test_timed_pool_records_waits_and_timeouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'p.db'}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    status = pool_status(engine)
+    assert (status["size"], status["checked_out"], status["saturation"]) == (1, 1, 1.0)
+    with pytest.raises(sa_exc.TimeoutError):
+        engine.connect()
+    held.close()
+    with engine.connect():
+        pass
+    status = pool_status(engine)
+    assert status["checkouts"] == 3 and status["timeouts"] == 1
+    assert status["wait_seconds_max"] >= 0.05 and status["saturation"] == 0.0
+    assert pool_status(None) is None
+    engine.dispose()
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, Job
+from backend.jobqueue import JobError, JobWorkerPool, claim, enqueue, finish, recover_stale
+
+
+def _factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def test_claim_is_exclusive_and_fifo():
+    S = _factory()
+    db = S()
+    first = enqueue(db, "seed", {"n": 1}).id
+    second = enqueue(db, "seed").id
+    assert claim(db, "w1").id == first
+    assert claim(S(), "w2").id == second
+    assert claim(db, "w1") is None
+
+
+def test_retries_then_fails_and_job_error_is_permanent():
+    S = _factory()
+    pool = JobWorkerPool(S, workers=1)
+    calls = []
+
+    def flaky(jid, params):
+        calls.append(jid)
+        raise RuntimeError("boom")
+
+    def broken(jid, params):
+        raise JobError("bad input")
+
+    pool.register("flaky", flaky)
+    pool.register("broken", broken)
+    db = S()
+    flaky_id = enqueue(db, "flaky", max_attempts=2).id
+    broken_id = enqueue(db, "broken").id
+    while pool.run_once("w"):
+        pass
+    db.expire_all()
+    assert len(calls) == 2
+    assert (db.get(Job, flaky_id).status, db.get(Job, flaky_id).attempts) == ("failed", 2)
+    assert (db.get(Job, broken_id).status, db.get(Job, broken_id).attempts) == ("failed", 1)
+
+
+def test_completed_job_and_stale_recovery():
+    S = _factory()
+    pool = JobWorkerPool(S, workers=1)
+    pool.register("ok", lambda jid, params: None)
+    db = S()
+    ok = enqueue(db, "ok").id
+    assert pool.run_once("w")
+    db.expire_all()
+    assert (db.get(Job, ok).status, db.get(Job, ok).progress) == ("completed", 100)
+
+    lost = enqueue(db, "ok").id
+    claim(db, "dead-worker")
+    assert recover_stale(db, stale_seconds=60, now=datetime.utcnow() + timedelta(minutes=5)) == 1
+    assert db.get(Job, lost).status == "queued"
+
+
+def test_failed_seed_job_is_not_retried(monkeypatch):
+    from backend import main, seeding
+    from backend.database import SensorData
+
+    S = _factory()
+    monkeypatch.setattr(main, "SessionLocal", S)
+    real_write = seeding.write_columns
+    calls = []
+
+    def fail_second_batch(db, cols):
+        calls.append(len(cols["zone"]))
+        if len(calls) == 2:
+            raise RuntimeError("disk full")
+        return real_write(db, cols)
+
+    monkeypatch.setattr(seeding, "write_columns", fail_second_batch)
+    db = S()
+    jid = main._start_job(db, "seed", {"n": 30, "batch_size": 10, "scenario": "normal"}).job_id  # default attempts: JobError alone stops the retry
+    pool = JobWorkerPool(S, workers=1)
+    pool.register("seed", main._run_seed_job)
+    while pool.run_once("w"):
+        pass
+    db.expire_all()
+    job = db.get(Job, jid)
+    assert (job.status, job.attempts) == ("failed", 1)
+    assert f"({calls[0]} rows already written)" in job.error
+    assert db.query(SensorData).count() == calls[0]
+
+
+def test_stale_worker_does_not_overwrite_the_next_attempt():
+    S = _factory()
+    db = S()
+    jid = enqueue(db, "ok").id
+    stale = claim(db, "slow-worker")
+    assert recover_stale(S(), stale_seconds=60, now=datetime.utcnow() + timedelta(minutes=5)) == 1
+    current = claim(S(), "w2")
+    assert (current.id, current.attempts) == (jid, 2)
+
+    assert finish(db, stale, None) is None  # the slow worker finally returns
+    assert finish(db, stale, RuntimeError("late")) is None
+    db.expire_all()
+    job = db.get(Job, jid)
+    assert (job.status, job.worker, job.error, job.finished_at) == ("running", "w2", None, None)
+    assert finish(db, current, None).status == "completed"
@@ -0,0 +1,56 @@
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from backend.metrics import MetricsMiddleware, Registry, instrument_engine, request_db_stats
+
+
+def test_registry_renders_prometheus_text():
+    reg = Registry()
+    c = reg.counter("t_requests", "Requests.", ("route",))
+    h = reg.histogram("t_latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    c.inc(route='/a"b')
+    c.inc(2, route='/a"b')
+    h.observe(0.05, route="/a")
+    h.observe(0.5, route="/a")
+    h.observe(3.0, route="/a")
+    reg.collector(lambda: [("t_conns", "gauge", "Connections.", {}, 4)])
+    reg.collector(lambda: 1 / 0)  # a broken source is skipped
+    out = reg.render()
+    assert '# TYPE t_requests_total counter\nt_requests_total{route="/a\\"b"} 3' in out
+    assert 't_latency_seconds_bucket{route="/a",le="0.1"} 1' in out
+    assert 't_latency_seconds_bucket{route="/a",le="1"} 2' in out
+    assert 't_latency_seconds_bucket{route="/a",le="+Inf"} 3' in out
+    assert 't_latency_seconds_count{route="/a"} 3' in out and 't_latency_seconds_sum{route="/a"} 3.55' in out
+    assert "# TYPE t_conns gauge\nt_conns 4" in out
+
+
+def test_middleware_labels_route_templates_and_counts_queries():
+    from backend import metrics
+
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    instrument_engine(engine)
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    def conn():
+        with engine.connect() as c:
+            yield c
+
+    @app.get("/items/{item_id}")
+    def item(item_id: int, c=Depends(conn)):  # sync handler: runs on the threadpool
+        c.execute(text("select 1"))
+        c.execute(text("select 2"))
+        return {"db": request_db_stats()[0]}
+
+    client = TestClient(app)
+    before = metrics.request_queries.count(method="GET", route="/items/{item_id}")
+    assert client.get("/items/1").json() == {"db": 2}
+    assert client.get("/items/2").status_code == 200
+    client.get("/nope")
+    assert metrics.http_requests.value(method="GET", route="/items/{item_id}", status="200") >= 2
+    assert metrics.http_requests.value(method="GET", route="unmatched", status="404") >= 1
+    assert metrics.request_queries.count(method="GET", route="/items/{item_id}") == before + 2
+    assert metrics.http_in_flight.value() == 0
+    assert request_db_stats() is None
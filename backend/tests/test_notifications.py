@@ -0,0 +1,47 @@
+import asyncio
+
+from backend.notifications import NotificationHub
+
+
+async def _drain(sub):
+    out = []
+    while len(sub):
+        out.append(await sub.get())
+    return out
+
+
+def test_zone_filter_and_admin_only():
+    async def run():
+        hub = NotificationHub()
+        a = hub.subscribe(["A"])
+        everyone = hub.subscribe(None, is_admin=True)
+        hub.publish("alert", "a", zone="A")
+        hub.publish("alert", "b", zone="B")
+        hub.publish("job", "j", admin_only=True)
+        return [m["message"] for m in await _drain(a)], [m["message"] for m in await _drain(everyone)]
+
+    only_a, everything = asyncio.run(run())
+    assert only_a == ["a"]
+    assert everything == ["a", "b", "j"]
+
+
+def test_slow_consumer_coalesces_then_drops_oldest():
+    async def run():
+        hub = NotificationHub(max_pending=3)
+        sub = hub.subscribe()
+        for p in range(10):
+            hub.publish("job", f"{p}%", coalesce_key="job:1", progress=p)
+        for i in range(3):
+            hub.publish("alert", str(i))
+        return sub, await _drain(sub)
+
+    sub, msgs = asyncio.run(run())
+    assert [m["message"] for m in msgs] == ["0", "1", "2"]
+    assert sub.coalesced == 9
+    assert sub.dropped == 1
+
+
+def test_publish_without_subscribers_is_noop():
+    hub = NotificationHub()
+    hub.publish("alert", "nobody listening", zone="A")
+    assert hub.stats()["published"] == 0
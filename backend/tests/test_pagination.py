@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import AuditLog, Base
+from backend.pagination import encode_cursor, keyset_page
+
+T0 = datetime(2025, 1, 1)
+
+
+def _db(n=25):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    # Pairs of rows share a timestamp so the id tie-breaker matters
+    db.add_all([AuditLog(id=i + 1, ts=T0 + timedelta(seconds=i // 2), action="login") for i in range(n)])
+    db.commit()
+    return db
+
+
+def _page(db, cursor=None, desc=True, **kw):
+    sort = "ts.desc" if desc else "ts.asc"
+    return keyset_page(db, db.query(AuditLog), (AuditLog.ts, AuditLog.id), desc, 10, sort, cursor=cursor, **kw)
+
+
+def test_walks_forward_then_back_without_gaps():
+    db = _db()
+    p1 = _page(db)
+    assert [r.id for r in p1.rows] == list(range(25, 15, -1))
+    assert p1.total == 25 and p1.prev_cursor is None
+    p2 = _page(db, p1.next_cursor)
+    p3 = _page(db, p2.next_cursor)
+    assert [r.id for r in p2.rows + p3.rows] == list(range(15, 0, -1))
+    assert p3.next_cursor is None
+
+    back = _page(db, p3.prev_cursor)
+    assert [r.id for r in back.rows] == [r.id for r in p2.rows]
+    first = _page(db, back.prev_cursor)
+    assert [r.id for r in first.rows] == [r.id for r in p1.rows]
+    assert first.prev_cursor is None and first.next_cursor
+
+
+def test_ascending_offset_and_count_modes():
+    db = _db()
+    p = _page(db, desc=False, offset=20, count="none")
+    assert [r.id for r in p.rows] == [21, 22, 23, 24, 25]
+    assert p.total is None and p.next_cursor is None and p.prev_cursor
+    est = _page(db, count="estimate")
+    assert (est.total, est.estimated) == (25, False)  # exact fallback outside PostgreSQL
+
+
+def test_rejects_foreign_or_garbled_cursors():
+    db = _db()
+    with pytest.raises(HTTPException):
+        _page(db, encode_cursor([T0, 1], "next", "ts.asc"))  # issued for another sort
+    with pytest.raises(HTTPException):
+        _page(db, "not-a-cursor")
+    with pytest.raises(HTTPException):
+        _page(db, count="maybe")
+
+
+def test_null_sort_keys_page_as_oldest():
+    db = _db(6)
+    db.add_all([AuditLog(id=i, action="legacy") for i in (7, 8, 9)])
+    db.commit()
+    db.query(AuditLog).filter(AuditLog.action == "legacy").update({"ts": None})  # rows predating the default
+    ids, cursor = [], None
+    while True:
+        p = keyset_page(db, db.query(AuditLog), (AuditLog.ts, AuditLog.id), True, 4, "ts.desc", cursor=cursor)
+        ids += [r.id for r in p.rows]
+        if not p.next_cursor:
+            break
+        cursor = p.next_cursor
+    assert ids == [6, 5, 4, 3, 2, 1, 9, 8, 7] and p.total == 9
+    back = keyset_page(db, db.query(AuditLog), (AuditLog.ts, AuditLog.id), True, 4, "ts.desc", cursor=p.prev_cursor)
+    assert [r.id for r in back.rows] == [2, 1, 9, 8]  # back across the NULL boundary
+    asc = keyset_page(db, db.query(AuditLog), (AuditLog.ts, AuditLog.id), False, 4, "ts.asc")
+    assert [r.id for r in asc.rows] == [7, 8, 9, 1]
+    assert [r.id for r in keyset_page(db, db.query(AuditLog), (AuditLog.ts, AuditLog.id), False, 4, "ts.asc", cursor=asc.next_cursor).rows] == [2, 3, 4, 5]
@@ -0,0 +1,35 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from backend import passwords
+
+pytestmark = pytest.mark.skipif(not passwords.available, reason="bcrypt not installed")
+
+
+def test_hash_uses_configured_cost_and_verifies():
+    hashed = passwords.hash_password("s3cret", rounds=4)
+    assert passwords.cost(hashed) == 4
+    assert passwords.verify_password("s3cret", hashed)
+    assert not passwords.verify_password("wrong", hashed)
+
+
+def test_verify_and_update_rehashes_on_cost_change_and_legacy():
+    hashed = passwords.hash_password("pw", rounds=4)
+    assert passwords.verify_and_update("pw", hashed, rounds=4) == (True, None)
+    ok, new = passwords.verify_and_update("pw", hashed, rounds=5)
+    assert ok and passwords.cost(new) == 5 and passwords.verify_password("pw", new)
+    assert passwords.verify_and_update("nope", hashed, rounds=5) == (False, None)
+
+    legacy = hashlib.sha256(b"pw").hexdigest()
+    ok, new = passwords.verify_and_update("pw", legacy, rounds=4)
+    assert ok and passwords.cost(new) == 4
+
+
+def test_async_variants_run_on_the_pool():
+    async def go():
+        hashed = await passwords.hash_password_async("pw", rounds=4)
+        return await asyncio.gather(*(passwords.verify_and_update_async("pw", hashed, rounds=4) for _ in range(4)))
+
+    assert asyncio.run(go()) == [(True, None)] * 4
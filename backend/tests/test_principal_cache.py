@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from backend.database import User
+from backend.principal_cache import PrincipalCache, TokenMemo
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_principal_ttl_lru_and_invalidation():
+    clock = Clock()
+    cache = PrincipalCache(ttl=30, max_entries=2, clock=clock)
+    cache.put(1, User(id=1, username="ops", role="user", is_active=False))
+    cache.put(("name", "ops"), User(id=1, username="ops", role="user", is_active=False))
+    hit = cache.get(1)
+    assert (hit.id, hit.username, hit.role, hit.is_active) == (1, "ops", "user", False)
+    assert hit is not cache.get(1)  # fresh detached object per request
+
+    cache.invalidate(1)  # approval: both keys of the user go
+    assert cache.get(1) is None and cache.get(("name", "ops")) is None
+
+    cache.put(2, User(id=2, username="a", role="admin", is_active=True))
+    cache.put(3, User(id=3, username="b", role="user", is_active=True))
+    cache.put(4, User(id=4, username="c", role="user", is_active=True))
+    assert cache.get(2) is None and cache.get(4).role == "user"
+    clock.now = 30.0
+    assert cache.get(4) is None
+    assert cache.stats() == {"entries": 2, "hits": 3, "misses": 4}
+
+
+def test_token_memo_rechecks_expiry():
+    clock = Clock(datetime(2025, 1, 1, 12, 0))
+    memo = TokenMemo(max_entries=1, clock=clock)
+    exp = int(datetime(2025, 1, 1, 13, 0).timestamp())
+    memo.put("t1", {"sub": 1, "exp": exp})
+    got = memo.get("t1")
+    got["sub"] = 99
+    assert memo.get("t1")["sub"] == 1
+    memo.put("t2", {"sub": 2, "exp": exp})
+    assert memo.get("t1") is None
+    clock.now = datetime(2025, 1, 1, 13, 0, 1)
+    assert memo.get("t2") is None
@@ -0,0 +1,63 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from backend.profiler import Profile, ProfilerMiddleware, ProfileStore, _plan_summary, install, requested_mode
+
+
+def _app(store, allowed):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    install(engine)
+    app = FastAPI()
+    app.add_middleware(ProfilerMiddleware, store=store, authorize=lambda authorization: allowed and authorization == "Bearer admin")
+
+    @app.get("/zones")
+    def zones():  # N+1: one query per zone
+        with engine.connect() as c:
+            ids = [r[0] for r in c.execute(text("select 1 union all select 2 union all select 3"))]
+            for i in ids:
+                c.execute(text("select :i"), {"i": i})
+        return {"n": len(ids)}
+
+    return TestClient(app)
+
+
+def test_profiled_request_reports_statements_and_repeats():
+    store = ProfileStore(keep=2)
+    client = _app(store, allowed=True)
+    r = client.get("/zones", headers={"X-Ziris-Profile": "1", "Authorization": "Bearer admin"})
+    assert r.json() == {"n": 3}
+    assert r.headers["x-ziris-profile"].startswith("queries=4;")
+    assert "max_repeat=3" in r.headers["x-ziris-profile"]
+    assert r.headers["server-timing"].startswith("db;dur=")
+    profile = store.get(r.headers["x-ziris-profile-id"]).to_dict()
+    assert profile["status"] == 200 and profile["queries"] == 4
+    assert profile["repeated"][0]["sql"] == "select ?" and profile["repeated"][0]["count"] == 3
+
+    for _ in range(3):
+        client.get("/zones?_profile=1", headers={"Authorization": "Bearer admin"})
+    assert store.get(r.headers["x-ziris-profile-id"]) is None  # bounded
+    assert len(store.recent()) == 2
+
+
+def test_profile_ignored_without_permission():
+    store = ProfileStore()
+    client = _app(store, allowed=True)
+    r = client.get("/zones", headers={"X-Ziris-Profile": "1", "Authorization": "Bearer user"})
+    assert "x-ziris-profile" not in r.headers and store.recent() == []
+    assert "x-ziris-profile" not in client.get("/zones").headers
+
+
+def test_requested_mode_and_plan_summary():
+    assert requested_mode({"headers": [(b"x-ziris-profile", b"EXPLAIN")], "query_string": b""}) == "explain"
+    assert requested_mode({"headers": [], "query_string": b"limit=5&_profile"}) == "1"
+    assert requested_mode({"headers": [], "query_string": b"_profile=yes"}) is None
+    plan = [{"Plan": {"Node Type": "Limit", "Plans": [{"Node Type": "Seq Scan", "Relation Name": "sensor_data"}]}, "Execution Time": 4.2}]
+    summary = _plan_summary(plan)
+    assert summary["seq_scans"] == ["sensor_data"] and summary["execution_ms"] == 4.2
+
+    p = Profile("GET", "/x", explain=True)
+    p.record("SELECT * FROM sensor_data", 5.0, 100, False, summary)
+    assert p.seq_scans() == [{"relation": "sensor_data", "sql": "SELECT * FROM sensor_data"}]
+    assert p.summary() == "queries=1;db_ms=5.0;max_repeat=1;seq_scans=1"
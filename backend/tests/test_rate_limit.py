@@ -0,0 +1,79 @@
+import pytest
+from fastapi import Depends, FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from backend.rate_limit import MemoryBackend, RateLimiter, client_ip, parse_limit, parse_networks, per_ip
+
+
+class Clock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_weights_the_previous_window():
+    clock = Clock(0.0)
+    backend = MemoryBackend(clock=clock)
+    assert all(backend.hit("k", 10, 60)[0] for _ in range(10))
+    allowed, retry = backend.hit("k", 10, 60)
+    assert not allowed and retry == 60
+    clock.now = 90.0  # half-way through the next window: 10 * 0.5 still counted
+    assert [backend.hit("k", 10, 60)[0] for _ in range(6)] == [True] * 5 + [False]
+    clock.now = 240.0  # idle for two windows
+    assert backend.hit("k", 10, 60) == (True, 0.0)
+
+
+def test_idle_and_excess_keys_are_evicted():
+    clock = Clock(0.0)
+    backend = MemoryBackend(max_keys=100, clock=clock)
+    for i in range(1000):
+        backend.hit(f"user{i}", 5, 60)
+    assert backend.stats() == {"keys": 100, "evicted": 900}
+    clock.now = 121.0
+    backend.hit("fresh", 5, 60)
+    assert backend.stats()["keys"] == 1
+
+
+def test_limiter_raises_429_with_retry_after_and_counts():
+    limiter = RateLimiter(MemoryBackend(clock=Clock(30.0)))
+    limiter.check("login", "1.2.3.4", limit=1, per_seconds=60)
+    with pytest.raises(HTTPException) as exc:
+        limiter.check("login", "1.2.3.4", limit=1, per_seconds=60)
+    assert exc.value.status_code == 429 and exc.value.headers == {"Retry-After": "30"}
+    limiter.check("login", "5.6.7.8", limit=1, per_seconds=60)
+    stats = limiter.stats()
+    assert (stats["allowed"], stats["rejected"]) == ({"login": 2}, {"login": 1})
+
+
+def test_parse_limit():
+    assert parse_limit("20/30") == (20, 30.0)
+    with pytest.raises(ValueError):
+        parse_limit("0/60")
+
+
+def _request(peer, forwarded=None):
+    headers = [(b"x-forwarded-for", forwarded.encode())] if forwarded else []
+    return Request({"type": "http", "method": "POST", "path": "/auth/login", "headers": headers, "client": (peer, 1234)})
+
+
+def test_forwarded_for_is_only_trusted_from_proxies():
+    proxies = parse_networks("10.0.0.0/8, 192.168.1.5")
+    assert client_ip(_request("203.0.113.9", "1.1.1.1"), proxies) == "203.0.113.9"
+    assert client_ip(_request("10.1.2.3", "1.1.1.1, 198.51.100.7"), proxies) == "198.51.100.7"
+    assert client_ip(_request("10.1.2.3", "198.51.100.7, 192.168.1.5"), proxies) == "198.51.100.7"
+    assert client_ip(_request("10.1.2.3"), proxies) == "10.1.2.3"
+    assert client_ip(_request("10.1.2.3", "1.1.1.1"), []) == "10.1.2.3"
+
+
+def test_spoofed_forwarded_for_does_not_reset_the_limit():
+    app = FastAPI()
+
+    @app.post("/auth/login", dependencies=[Depends(per_ip(RateLimiter(MemoryBackend()), "login"))])
+    def login():
+        return {}
+
+    client = TestClient(app)
+    codes = [client.post("/auth/login", headers={"X-Forwarded-For": f"10.0.0.{i}"}).status_code for i in range(11)]
+    assert codes == [200] * 10 + [429]
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, SensorData, SensorRollup
+from backend.retention import read_trend, run_retention
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _seed(db):
+    old = NOW - timedelta(days=40)
+    for i, temp in enumerate([10.0, 30.0, 20.0]):
+        db.add(SensorData(timestamp=old + timedelta(minutes=i), zone="A", temperature=temp, pression=1.0, vibration=1.0, fumee=1.0, flamme=False, anomaly=(i == 1)))
+    db.add(SensorData(timestamp=NOW - timedelta(hours=1), zone="A", temperature=50.0, pression=1.0, vibration=1.0, fumee=1.0, flamme=False, anomaly=False))
+    db.commit()
+
+
+def test_retention_rolls_up_then_purges():
+    db = _session()
+    _seed(db)
+    result = run_retention(db, older_than_days=30, granularity="hour", batch_size=100, now=NOW)
+    assert result["purged"] == 3
+    assert db.query(SensorData).count() == 1
+    r = db.query(SensorRollup).one()
+    assert (r.count, r.anomalies, r.temp_min, r.temp_max, r.temp_sum) == (3, 1, 10.0, 30.0, 60.0)
+
+
+def test_trend_is_unchanged_by_purge():
+    db = _session()
+    _seed(db)
+    since = NOW - timedelta(days=60)
+    before = read_trend(db, since, until=NOW, granularity="hour")
+    run_retention(db, older_than_days=30, granularity="minute", batch_size=100, now=NOW)
+    after = read_trend(db, since, until=NOW, granularity="hour")
+    assert after == before
+    assert [b["count"] for b in after] == [3, 1]
+    assert after[0]["temp"] == {"min": 10.0, "max": 30.0, "mean": 20.0}
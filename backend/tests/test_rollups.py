@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, SensorData, ZoneRollup
+from backend.rollups import rebuild_zone_rollups, record_rows
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _row(zone, temp, anomaly=False, ts=None):
+    return SensorData(
+        timestamp=ts or datetime(2025, 1, 1),
+        zone=zone,
+        temperature=temp,
+        pression=1.0,
+        vibration=2.0,
+        fumee=3.0,
+        flamme=False,
+        anomaly=anomaly,
+    )
+
+
+def test_record_rows_accumulates_per_zone():
+    db = _session()
+    t0 = datetime(2025, 1, 1)
+    first = [_row("A", 10.0, ts=t0), _row("A", 20.0, anomaly=True, ts=t0 + timedelta(minutes=1)), _row(None, 5.0)]
+    db.add_all(first)
+    record_rows(db, first)
+    db.commit()
+    second = [_row("A", 30.0, ts=t0 - timedelta(days=1))]
+    db.add_all(second)
+    record_rows(db, second)
+    db.commit()
+
+    a = db.get(ZoneRollup, "A")
+    assert a.total == 3
+    assert a.anomalies == 1
+    assert a.sum_temp == 60.0
+    # an older reading must not move last_ts backwards
+    assert a.last_ts == t0 + timedelta(minutes=1)
+    assert db.get(ZoneRollup, "Unknown").total == 1
+
+
+def test_rebuild_matches_incremental():
+    db = _session()
+    rows = [_row("A", 10.0, anomaly=True), _row("B", 20.0), _row("B", 40.0)]
+    db.add_all(rows)
+    record_rows(db, rows)
+    db.commit()
+    incremental = {z.zone: (z.total, z.anomalies, z.sum_temp) for z in db.query(ZoneRollup).all()}
+
+    assert rebuild_zone_rollups(db) == 2
+    db.commit()
+    rebuilt = {z.zone: (z.total, z.anomalies, z.sum_temp) for z in db.query(ZoneRollup).all()}
+    assert rebuilt == incremental
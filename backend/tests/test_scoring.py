@@ -0,0 +1,119 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+pytest.importorskip("sklearn")
+
+from backend.database import Base, SensorData, ZoneRollup
+from backend.rollups import record_rows
+from backend.scoring import AnomalyScorer
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def _insert(db, n, seed, outliers=0):
+    rng = np.random.default_rng(seed)
+    vals = rng.normal([25, 2, 5, 50], [1, 0.1, 0.5, 2], size=(n, 4))
+    vals[:outliers] = [200, 20, 50, 900]
+    rows = [
+        SensorData(timestamp=NOW - timedelta(minutes=i), zone="A", temperature=t, pression=p, vibration=v, fumee=f, flamme=False, anomaly=False)
+        for i, (t, p, v, f) in enumerate(vals.tolist())
+    ]
+    db.add_all(rows)
+    record_rows(db, rows)
+    db.commit()
+
+
+def test_scores_only_new_rows_and_updates_rollups(tmp_path):
+    db = _session()
+    _insert(db, 300, seed=0)
+    scorer = AnomalyScorer(model_dir=str(tmp_path), contamination=0.01)
+    model = scorer.retrain(db, now=NOW)
+    assert model.version == 1 and (tmp_path / "current.json").exists()
+    while scorer.score_pending(db, batch_size=100)[0]:
+        pass
+    before = db.query(ZoneRollup).one().anomalies
+
+    _insert(db, 20, seed=1, outliers=3)
+    n, newly = scorer.score_pending(db, batch_size=100)
+    assert n == 20
+    assert newly["A"] >= 3
+    assert scorer.score_pending(db)[0] == 0
+    assert db.query(ZoneRollup).one().anomalies == before + newly["A"]
+    assert db.query(SensorData).filter(SensorData.anomaly_score.is_(None)).count() == 0
+
+
+def test_retrain_publishes_new_version_other_workers_pick_up(tmp_path):
+    db = _session()
+    _insert(db, 100, seed=2)
+    a, b = AnomalyScorer(model_dir=str(tmp_path)), AnomalyScorer(model_dir=str(tmp_path))
+    a.retrain(db, now=NOW)
+    assert b.refresh().version == 1
+    a.retrain(db, now=NOW)
+    assert b.model.version == 1
+    assert b.refresh().version == 2
+
+
+def test_not_enough_data(tmp_path):
+    db = _session()
+    _insert(db, 10, seed=3)
+    scorer = AnomalyScorer(model_dir=str(tmp_path))
+    assert scorer.retrain(db, now=NOW) is None
+    assert scorer.score_pending(db) == (0, {})
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_publish_is_serialized_and_compare_and_swap(tmp_path):
+    from backend.scoring import fit, publish_lock, save_model
+
+    db = _session()
+    _insert(db, 100, seed=4)
+    a, b = AnomalyScorer(model_dir=str(tmp_path)), AnomalyScorer(model_dir=str(tmp_path))
+    with publish_lock(str(tmp_path)):
+        assert b.retrain(db, now=NOW, wait=False) is None  # another process is publishing
+    assert not (tmp_path / "current.json").exists()
+
+    assert a.retrain(db, now=NOW).version == 1
+    # b has no model in memory but still numbers from the published pointer
+    assert b.retrain(db, now=NOW).version == 2
+    files = sorted(p.name for p in tmp_path.glob("iforest-v*.joblib"))
+    assert len(files) == 2 and files[0] != files[1]
+
+    stale = fit(np.random.default_rng(0).normal(size=(60, 4)), version=2)
+    assert save_model(stale, str(tmp_path), expected_version=1) is None  # pointer is at 2 now
+    assert a.refresh().version == 2 and len(list(tmp_path.glob("iforest-v*.joblib"))) == 2
+
+    # A fresh published model is loaded instead of trained again
+    c = AnomalyScorer(model_dir=str(tmp_path))
+    assert c.retrain(db, now=NOW, max_age=3600).version == 2
+
+
+def test_retrain_backs_off_until_new_rows(tmp_path):
+    db = _session()
+    _insert(db, 10, seed=5)
+    clock = Clock()
+    scorer = AnomalyScorer(model_dir=str(tmp_path), clock=clock)
+    assert scorer.retrain_due(db)
+    assert scorer.retrain(db, now=NOW) is None
+    assert not scorer.retrain_due(db)
+    clock.now = 24 * 3600
+    assert scorer.retrain_due(db)  # or after RETRAIN_SECONDS
+    clock.now = 0.0
+    _insert(db, 1, seed=6)
+    assert scorer.retrain_due(db)
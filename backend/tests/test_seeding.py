@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, SensorData, ZoneRollup
+from backend.data_generator import SCENARIOS
+from backend.seeding import ProgressThrottle, seed
+
+END = datetime(2025, 6, 1, 12, 0, 0)
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)()
+
+
+def test_seed_in_batches_with_contiguous_timestamps():
+    db = _session()
+    calls = []
+    result = seed(db, 2500, batch_size=1000, contamination=0.2, seed=1, end=END, interval_seconds=2, progress=lambda d, t: calls.append(d))
+    assert result["inserted"] == 2500
+    assert calls == [1000, 2000, 2500]
+    first, last = db.query(func.min(SensorData.timestamp), func.max(SensorData.timestamp)).one()
+    assert last == END
+    assert first == END - timedelta(seconds=2 * 2499)
+    assert db.query(func.sum(ZoneRollup.total)).scalar() == 2500
+    anomalies = db.query(SensorData).filter(SensorData.anomaly.is_(True)).count()
+    assert db.query(func.sum(ZoneRollup.anomalies)).scalar() == anomalies
+    assert 400 < anomalies < 600
+
+
+def test_progress_throttle():
+    now = [0.0]
+    calls = []
+    throttle = ProgressThrottle(lambda d, t: calls.append(d), every_rows=100, every_ms=500, clock=lambda: now[0])
+    for done in range(10, 301, 10):
+        throttle(done, 300)
+    assert calls == [100, 200, 300]
+    throttle = ProgressThrottle(lambda d, t: calls.append(d), every_rows=10_000, every_ms=500, clock=lambda: now[0])
+    now[0] = 0.6
+    throttle(1, 300)
+    assert calls[-1] == 1
+
+
+def test_dropouts_are_not_written():
+    db = _session()
+    result = seed(db, 1000, contamination=0.0, seed=2, end=END, profiles=SCENARIOS["noisy"])
+    assert 900 < result["inserted"] < 1000
+    assert db.query(SensorData).count() == result["inserted"]
+    assert db.query(SensorData).filter(SensorData.temperature.is_(None)).count() == 0
+    assert db.query(func.sum(ZoneRollup.total)).scalar() == result["inserted"]
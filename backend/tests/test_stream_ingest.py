@@ -0,0 +1,44 @@
+from backend.stream_ingest import StreamParser, detect_format
+
+
+def _parse(fmt, chunks):
+    p = StreamParser(fmt)
+    out = []
+    for c in chunks:
+        out.extend(p.feed(c))
+    out.extend(p.finish())
+    return out
+
+
+def test_csv_lines_split_across_chunks():
+    body = b"id,timestamp,zone,temperature,pression,vibration,fumee,flamme,anomaly\n1,2025-07-13 21:39:19,ZoneB,24.7,1.9,5.0,77.0,False,False\n2,2025-07-13 21:39:20,ZoneA,1,2,3,4,True,False"
+    out = _parse("csv", [body[:50], body[50:97], body[97:]])
+    assert [line for line, _, _ in out] == [2, 3]
+    assert out[0][1]["zone"] == "ZoneB"
+    assert out[1][1]["flamme"] == "True"
+
+
+def test_ndjson_reports_bad_lines():
+    out = _parse("ndjson", [b'{"zone": "A"}\n[1]\n{oops\n\n{"zone": "B"}\n'])
+    assert [(line, err) for line, _, err in out] == [(1, None), (2, "expected a json object"), (3, "invalid json"), (5, None)]
+
+
+def test_detect_format():
+    assert detect_format("text/csv; charset=utf-8") == "csv"
+    assert detect_format("application/x-ndjson") == "ndjson"
+    assert detect_format("application/json") is None
+    assert detect_format("application/json", "ndjson") == "ndjson"
+
+
+def test_long_line_split_across_chunks_is_one_reject():
+    long_line = b'{"zone": "' + b"x" * (70 * 1024) + b'"}\n'
+    body = long_line + b'{"ok": 1}\n'
+    chunks = [body[i:i + 16 * 1024] for i in range(0, len(body), 16 * 1024)]
+    out = _parse("ndjson", chunks)
+    assert [(line, rec, err) for line, rec, err in out] == [(1, None, "line too long"), (2, {"ok": 1}, None)]
+
+    header = b"zone," + b"y" * (70 * 1024) + b"\n"
+    row = b"1,2025-07-13 21:39:19,ZoneB,24.7,1.9,5.0,77.0,False,False\n"
+    out = _parse("csv", [header[:40000], header[40000:], row])
+    assert [(line, err) for line, _, err in out] == [(1, "line too long"), (2, None)]
+    assert out[1][1]["zone"] == "ZoneB"  # the header tail was not taken as a header
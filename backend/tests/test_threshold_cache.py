@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, Threshold, ThresholdProfile
+from backend.threshold_cache import ThresholdCache, bump_version
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _sessions():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def _update(db, temp):
+    # What set_thresholds does in another worker
+    row = db.query(Threshold).first()
+    row.temp = temp
+    row.version = Threshold.version + 1
+    db.commit()
+
+
+def test_serves_from_memory_within_ttl_and_converges_after():
+    S = _sessions()
+    writer, reader = S(), S()
+    writer.add(Threshold(temp=80.0, press=8.0, vib=15.0, fumee=200.0))
+    writer.commit()
+    clock = Clock()
+    cache = ThresholdCache(ttl=5, clock=clock)
+    assert cache.get(reader).values[0] == 80.0
+
+    _update(writer, 90.0)
+    clock.now = 4.9
+    assert cache.get(reader).values[0] == 80.0  # stale but within the bound
+    clock.now = 5.0
+    assert cache.get(reader).values[0] == 90.0
+    assert (cache.loads, cache.checks, cache.hits) == (2, 1, 1)
+
+    clock.now = 11.0
+    cache.get(reader)
+    assert (cache.loads, cache.checks) == (2, 2)  # version unchanged, no reload
+
+
+def test_invalidate_and_missing_row():
+    S = _sessions()
+    db = S()
+    cache = ThresholdCache(ttl=60, clock=Clock())
+    assert cache.get(db).values is None
+    db.add(Threshold(temp=1.0, press=2.0, vib=3.0, fumee=4.0))
+    db.commit()
+    assert cache.get(db).values is None
+    cache.invalidate()
+    assert cache.get(db).values == (1.0, 2.0, 3.0, 4.0)
+
+
+def test_profile_change_bumps_version_for_other_workers():
+    S = _sessions()
+    writer, reader = S(), S()
+    clock = Clock()
+    cache = ThresholdCache(ttl=5, clock=clock)
+    assert cache.get(reader).zones.lookup("T").tolist() == [80.0, 8.0, 15.0, 200.0]
+
+    writer.add(ThresholdProfile(zone="T", vib=30.0))
+    bump_version(writer)  # creates the global row with its defaults
+    writer.commit()
+    clock.now = 5.0
+    snap = cache.get(reader)
+    assert snap.version == 1
+    assert snap.zones.lookup("T").tolist() == [80.0, 8.0, 30.0, 200.0]
+
+
+def test_async_get_matches_sync_and_respects_ttl(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    url = f"sqlite:///{tmp_path}/t.db"
+    engine = create_engine(url)
+    Base.metadata.create_all(bind=engine)
+    writer = sessionmaker(bind=engine)()
+    writer.add(Threshold(temp=70.0, press=7.0, vib=14.0, fumee=150.0))
+    writer.commit()
+    clock = Clock()
+    cache = ThresholdCache(ttl=5, clock=clock)
+
+    async def read():
+        aengine = create_async_engine(url.replace("sqlite://", "sqlite+aiosqlite://"))
+        try:
+            async with async_sessionmaker(aengine)() as db:
+                return await cache.get_async(db)
+        finally:
+            await aengine.dispose()
+
+    assert asyncio.run(read()).values == (70.0, 7.0, 14.0, 150.0)
+    _update(writer, 75.0)
+    assert asyncio.run(read()).values[0] == 70.0
+    clock.now = 5.0
+    assert asyncio.run(read()).values[0] == 75.0
+    assert (cache.loads, cache.checks, cache.hits) == (2, 1, 1)
+
+
+def test_async_load_racing_invalidate_is_not_cached():
+    S = _sessions()
+    writer = S()
+    writer.add(Threshold(temp=70.0, press=7.0, vib=14.0, fumee=150.0))
+    writer.commit()
+    cache = ThresholdCache(ttl=60, clock=Clock())
+
+    class SlowSession:
+        # Loads the old values, then lets an admin commit and invalidate before returning
+        async def run_sync(self, fn):
+            snap = fn(S())
+            _update(writer, 90.0)
+            cache.invalidate()
+            return snap
+
+    assert asyncio.run(cache.get_async(SlowSession())).values[0] == 70.0  # served to this caller only
+    assert cache.stats()["version"] is None
+    assert cache.get(S()).values[0] == 90.0
@@ -0,0 +1,76 @@
+import numpy as np
+
+from backend.threshold_engine import PRIORITIES, ZoneThresholds, columns_from_rows, confusion, evaluate, reason_labels, rule_k
+
+THR = (80.0, 8.0, 15.0, 200.0)
+
+
+def _rows(n=500, seed=0):
+    rng = np.random.default_rng(seed)
+    vals = rng.normal([70, 7, 12, 180], [15, 2, 5, 40], size=(n, 4))
+    return [
+        (i, None, "Z", *vals[i].tolist(), bool(rng.random() < 0.05), bool(rng.random() < 0.2))
+        for i in range(n)
+    ]
+
+
+def _reference(row, k):
+    # Row-by-row logic the endpoints used before vectorization
+    _, _, _, t, p, v, f, flamme, anomaly = row
+    reasons = []
+    for val, lim, label in zip((t, p, v, f), THR, ("Température élevée", "Pression élevée", "Vibration élevée", "Fumée élevée")):
+        if val > lim:
+            reasons.append(label)
+    c = len(reasons)
+    if flamme:
+        reasons.append("Présence de flamme")
+    if anomaly:
+        reasons.append("Anomalie détectée")
+    priority = "critique" if flamme else ("élevée" if c else "normale")
+    return reasons, priority, c >= k
+
+
+def test_matches_row_by_row_logic():
+    rows = _rows()
+    cols = columns_from_rows(rows)
+    ev = evaluate(cols, THR)
+    for rule in ("any", "k2", "k3", "k4"):
+        pred = ev.predicted(rule_k(rule))
+        for i, row in enumerate(rows):
+            reasons, priority, expected = _reference(row, rule_k(rule))
+            assert reason_labels(int(ev.reasons[i])) == reasons
+            assert PRIORITIES[ev.priority[i]] == priority
+            assert bool(pred[i]) == expected
+
+
+def test_confusion_counts_sum_to_window():
+    cols = columns_from_rows(_rows(200, seed=3))
+    ev = evaluate(cols, THR)
+    tp, fp, tn, fn = confusion(ev.predicted(1), cols["anomaly"])
+    assert tp + fp + tn + fn == 200
+    assert tp + fn == int(cols["anomaly"].sum())
+
+
+def test_empty_window():
+    cols = columns_from_rows([])
+    ev = evaluate(cols, THR)
+    assert ev.counts.shape == (0,)
+    assert confusion(ev.predicted(1), cols["anomaly"]) == (0, 0, 0, 0)
+
+
+def test_zone_profiles_inherit_and_drive_evaluation():
+    zt = ZoneThresholds.compile(THR, [
+        ("Turbines", None, None, None, 30.0, None),
+        ("Turbines", "temperature", 120.0, None, None, None),
+        ("Serveurs", "vibration", None, None, None, None),  # NULL: inherits
+    ])
+    np.testing.assert_array_equal(zt.lookup("Turbines"), [120.0, 8.0, 30.0, 200.0])
+    np.testing.assert_array_equal(zt.lookup("Serveurs"), THR)
+    rows = [
+        (1, None, "Turbines", 100.0, 1.0, 20.0, 1.0, False, False),
+        (2, None, "Other", 100.0, 1.0, 20.0, 1.0, False, False),
+        (3, None, None, 100.0, 1.0, 20.0, 1.0, False, False),
+    ]
+    cols = columns_from_rows(rows)
+    ev = evaluate(cols, zt.for_rows(cols["zone"]))
+    assert ev.counts.tolist() == [0, 2, 2]
@@ -0,0 +1,50 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import main
+from backend.database import Base, ThresholdProfile, User
+
+
+def _client(monkeypatch):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    S = sessionmaker(bind=engine)
+
+    def db():
+        s = S()
+        try:
+            yield s
+        finally:
+            s.close()
+
+    monkeypatch.setitem(main.app.dependency_overrides, main.get_db, db)
+    monkeypatch.setitem(main.app.dependency_overrides, main.get_current_user, lambda: User(id=1, username="admin", role="admin", is_active=True))
+    return TestClient(main.app), S
+
+
+def test_zone_wide_profile_is_upserted_once(monkeypatch):
+    client, S = _client(monkeypatch)
+    first = client.put("/thresholds/profiles", json={"zone": "A", "temp": 40}).json()
+    second = client.put("/thresholds/profiles", json={"zone": "A", "press": 9}).json()
+    assert second["id"] == first["id"] and (second["temp"], second["press"]) == (None, 9.0)
+    client.put("/thresholds/profiles", json={"zone": "A", "sensor_type": "vibration", "vib": 20})
+    db = S()
+    assert db.query(ThresholdProfile).filter(ThresholdProfile.zone == "A").count() == 2
+
+    # The partial unique index also stops writers that bypass the upsert
+    db.add(ThresholdProfile(zone="A", sensor_type=None, temp=1.0))
+    try:
+        db.commit()
+        raise AssertionError("duplicate zone-wide profile accepted")
+    except IntegrityError:
+        db.rollback()
+
+
+def test_sensor_profile_rejects_other_metrics(monkeypatch):
+    client, _ = _client(monkeypatch)
+    r = client.put("/thresholds/profiles", json={"zone": "A", "sensor_type": "fumee", "fumee": 150, "temp": 30})
+    assert r.status_code == 400 and "temp" in r.json()["detail"]
+    assert client.put("/thresholds/profiles", json={"zone": "A", "sensor_type": "fumee", "fumee": 150}).status_code == 200
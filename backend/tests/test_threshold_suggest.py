@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, SensorData
+from backend.threshold_suggest import suggest
+
+NOW = datetime(2025, 6, 1, 12, 0, 0)
+TEMPS = [10.0, 20.0, 30.0, 40.0, 1000.0]
+
+
+def _session():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    for i, t in enumerate(TEMPS):
+        db.add(SensorData(timestamp=NOW - timedelta(hours=i), zone="A", temperature=t, pression=1.0, vibration=1.0, fumee=1.0, flamme=False, anomaly=False))
+    db.add(SensorData(timestamp=NOW - timedelta(hours=1), zone="B", temperature=5.0, pression=1.0, vibration=1.0, fumee=1.0, flamme=False, anomaly=False))
+    # Outside a 24h window
+    db.add(SensorData(timestamp=NOW - timedelta(days=3), zone="A", temperature=5000.0, pression=1.0, vibration=1.0, fumee=1.0, flamme=False, anomaly=False))
+    db.commit()
+    return db
+
+
+def test_strategies_per_zone():
+    db = _session()
+    a = np.array(TEMPS)
+    ksigma = suggest(db, "mean_ksigma", k=2, window_hours=24, per_zone=True, now=NOW)
+    assert ksigma["A"]["count"] == 5
+    assert ksigma["A"]["temp"] == pytest.approx(a.mean() + 2 * a.std())
+    assert ksigma["B"]["temp"] == 5.0
+    assert suggest(db, "quantile", q=0.5, window_hours=24, per_zone=True, now=NOW)["A"]["temp"] == 30.0
+    # median 30, MAD 10: the 1000 outlier barely moves the robust suggestion
+    assert suggest(db, "mad", k=2, window_hours=24, per_zone=True, now=NOW)["A"]["temp"] == pytest.approx(30 + 2 * 1.4826 * 10)
+
+
+def test_global_window_and_unknown_strategy():
+    db = _session()
+    out = suggest(db, "quantile", q=1.0, window_hours=24 * 7, now=NOW)
+    assert list(out) == [None]
+    assert out[None]["temp"] == 5000.0
+    with pytest.raises(ValueError):
+        suggest(db, "bogus")
+
+
+def test_empty_window_falls_back_to_latest_rows(monkeypatch):
+    db = _session()
+    # A site silent for a month still gets suggestions from its last readings
+    stale = suggest(db, "quantile", q=1.0, window_hours=1, now=NOW + timedelta(days=30))
+    assert stale[None]["count"] == 7 and stale[None]["temp"] == 5000.0
+    monkeypatch.setattr("backend.threshold_suggest.FALLBACK_ROWS", 6)  # drops the 3-day-old reading
+    assert suggest(db, "quantile", q=1.0, window_hours=1, now=NOW + timedelta(days=30))[None]["temp"] == 1000.0
+    db.query(SensorData).delete()
+    assert suggest(db, window_hours=1, now=NOW) == {}
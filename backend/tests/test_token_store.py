@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import Base, RefreshToken
+from backend.token_store import MemoryTokenStore, SqlTokenStore, TokenStore, token_hash
+
+T0 = datetime(2025, 5, 1)
+
+
+class Clock:
+    def __init__(self):
+        self.now = T0
+
+    def __call__(self):
+        return self.now
+
+
+def _sql(clock):
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    S = sessionmaker(bind=engine)
+    return SqlTokenStore(S, clock=clock, purge_seconds=0), S
+
+
+@pytest.fixture(params=["memory", "sql"])
+def stores(request):
+    clock = Clock()
+    return (MemoryTokenStore(clock=clock) if request.param == "memory" else _sql(clock)[0]), clock
+
+
+def test_consume_rotates_exactly_once(stores):
+    store, _ = stores
+    store.add("a", 1, T0 + timedelta(days=14))
+    assert store.state("a") == "live"
+    assert store.consume("a") == 1
+    assert store.consume("a") is None
+    assert store.state("a") == "revoked"
+    assert store.consume("unknown") is None and store.state("unknown") is None
+
+
+def test_expiry_and_revocations(stores):
+    store, clock = stores
+    store.add("old", 1, T0 + timedelta(hours=1))
+    store.add("a", 2, T0 + timedelta(days=14))
+    store.add("b", 2, T0 + timedelta(days=14))
+    store.revoke("a")
+    assert store.revoke_user(2) == 1
+    assert store.consume("b") is None
+    clock.now = T0 + timedelta(hours=2)
+    assert store.state("old") == "expired" and store.consume("old") is None
+    assert store.purge() == 1
+    assert store.state("old") is None and store.state("a") == "revoked"
+
+
+def test_sql_store_keeps_only_the_hash():
+    store, S = _sql(Clock())
+    store.add("secret-token", 7, T0 + timedelta(days=1))
+    row = S().query(RefreshToken).one()
+    assert row.token_hash == token_hash("secret-token") and "secret" not in row.token_hash
+    assert store.stats() == {"backend": "sql", "purge_seconds": 0}
+
+
+def test_incomplete_backend_fails_on_creation():
+    class NoRevokeUser(TokenStore):
+        backend = "partial"
+        add = consume = state = revoke = purge = stats = lambda self, *a: None
+
+    with pytest.raises(TypeError, match="revoke_user"):
+        NoRevokeUser()
+
+
+def test_memory_store_evicts_expired_entries_on_add():
+    clock = Clock()
+    store = MemoryTokenStore(clock=clock)
+    for i in range(100):
+        store.add(f"t{i}", i, T0 + timedelta(minutes=1))
+    clock.now = T0 + timedelta(minutes=2)
+    store.add("fresh", 1, T0 + timedelta(days=1))
+    assert store.stats() == {"backend": "memory", "tokens": 1, "users": 1}
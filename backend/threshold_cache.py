@@ -0,0 +1,147 @@
+"""Per-process cache of the active thresholds and per-zone profiles.
+
+Hot read endpoints (/thresholds, /sensor/recommendations, /lstm/metrics,
+ingestion alerts) used to load the ``thresholds`` row on every request. The
+cache keeps the last snapshot in memory and revalidates it at most every
+``ZIRIS_THRESHOLD_CACHE_TTL`` seconds with a single-column ``SELECT version``;
+the global row and ``threshold_profiles`` are reloaded (and the per-zone
+lookup recompiled) only when the version changed. Writers of either table bump
+``thresholds.version`` in the same transaction as the update, so every uvicorn
+worker converges on new values within one TTL, and the writing worker
+immediately through :meth:`ThresholdCache.invalidate`.
+"""
+import os
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .database import Threshold, ThresholdProfile
+from .threshold_engine import THRESHOLD_KEYS, ZoneThresholds
+
+THRESHOLD_CACHE_TTL = float(os.getenv("ZIRIS_THRESHOLD_CACHE_TTL", "5"))
+
+Values = Tuple[float, float, float, float]  # temp, press, vib, fumee
+# Column defaults of the thresholds table, used until a row exists
+DEFAULT_VALUES: Values = tuple(float(Threshold.__table__.c[k].default.arg) for k in THRESHOLD_KEYS)
+
+
+@dataclass(frozen=True)
+class ThresholdSnapshot:
+    version: int  # 0 when no thresholds row exists yet
+    values: Optional[Values]  # None -> caller falls back to its defaults
+    zones: ZoneThresholds  # global values (or DEFAULT_VALUES) overridden per zone
+
+
+def load_snapshot(db: Session) -> ThresholdSnapshot:
+    row = db.query(Threshold).order_by(Threshold.id.asc()).first()
+    values = (float(row.temp or 0.0), float(row.press or 0.0), float(row.vib or 0.0), float(row.fumee or 0.0)) if row else None
+    profiles = db.execute(
+        select(ThresholdProfile.zone, ThresholdProfile.sensor_type, *(getattr(ThresholdProfile, k) for k in THRESHOLD_KEYS))
+    ).all()
+    zones = ZoneThresholds.compile(values or DEFAULT_VALUES, profiles)
+    return ThresholdSnapshot(version=int(row.version or 0) if row else 0, values=values, zones=zones)
+
+
+def current_version(db: Session) -> int:
+    return int(db.execute(select(Threshold.version).order_by(Threshold.id.asc()).limit(1)).scalar() or 0)
+
+
+def bump_version(db: Session) -> None:
+    """Mark thresholds as changed inside the writer's transaction (caller commits).
+
+    Creates the global row with its defaults if needed, so profile-only
+    changes are versioned too.
+    """
+    row = db.query(Threshold).order_by(Threshold.id.asc()).first()
+    if row is None:
+        db.add(Threshold(updated_at=datetime.utcnow(), version=1))
+    else:
+        row.version = Threshold.version + 1
+
+
+class ThresholdCache:
+    def __init__(self, ttl: float = THRESHOLD_CACHE_TTL, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._snapshot: Optional[ThresholdSnapshot] = None
+        self._checked_at = 0.0
+        self._generation = 0  # bumped by invalidate(); async loads started before it are discarded
+        self.hits = 0
+        self.checks = 0
+        self.loads = 0
+
+    def get(self, db: Session) -> ThresholdSnapshot:
+        now = self._clock()
+        snap = self._snapshot
+        if snap is not None and now - self._checked_at < self.ttl:
+            self.hits += 1
+            return snap
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and now - self._checked_at < self.ttl:
+                self.hits += 1
+                return snap
+            if snap is not None:
+                self.checks += 1
+                if current_version(db) == snap.version:
+                    self._checked_at = now
+                    return snap
+            self.loads += 1
+            snap = load_snapshot(db)
+            self._snapshot = snap
+            self._checked_at = now
+            return snap
+
+    async def get_async(self, db: AsyncSession) -> ThresholdSnapshot:
+        """:meth:`get` for async handlers.
+
+        The lock is not held across awaits (it would block the event loop
+        thread). A load that raced with :meth:`invalidate`, or with a newer
+        load, is returned to its caller but not cached.
+        """
+        now = self._clock()
+        snap = self._snapshot
+        if snap is not None and now - self._checked_at < self.ttl:
+            self.hits += 1
+            return snap
+        generation = self._generation
+        if snap is not None:
+            self.checks += 1
+            if await db.run_sync(current_version) == snap.version:
+                with self._lock:
+                    if self._generation == generation and self._snapshot is snap:
+                        self._checked_at = now
+                return snap
+        self.loads += 1
+        snap = await db.run_sync(load_snapshot)
+        with self._lock:
+            cached = self._snapshot
+            if self._generation == generation and (cached is None or snap.version >= cached.version):
+                self._snapshot = snap
+                self._checked_at = now
+        return snap
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+            self._generation += 1
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "version": snap.version if snap else None,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "checks": self.checks,
+            "loads": self.loads,
+        }
+
+
+thresholds_cache = ThresholdCache()
@@ -0,0 +1,161 @@
+"""Vectorized threshold evaluation over a window of sensor readings.
+
+The recent window is loaded as NumPy column arrays and evaluated in one pass:
+per-metric exceedance masks, k-of-4 counts for the ``rule`` parameter, a
+reason bitmask and a priority code per row. Used by /sensor/recommendations
+and /lstm/metrics.
+"""
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select
+
+from .database import SensorData
+
+# Bit i of the reason mask <=> REASONS[i]; the first four follow METRICS order
+REASONS = ("Température élevée", "Pression élevée", "Vibration élevée", "Fumée élevée", "Présence de flamme", "Anomalie détectée")
+FLAME_BIT = 1 << 4
+ANOMALY_BIT = 1 << 5
+PRIORITIES = ("normale", "élevée", "critique")
+METRICS = ("temperature", "pression", "vibration", "fumee")
+THRESHOLD_KEYS = ("temp", "press", "vib", "fumee")  # Threshold columns, METRICS order
+RULES = {"any": 1, "k2": 2, "k3": 3, "k4": 4}
+
+Columns = Dict[str, np.ndarray]
+
+
+def window_query(limit: int):
+    """Most recent ``limit`` readings, newest first, as plain columns (no ORM objects)."""
+    return (
+        select(SensorData.id, SensorData.timestamp, SensorData.zone, *(getattr(SensorData, m) for m in METRICS), SensorData.flamme, SensorData.anomaly)
+        .order_by(SensorData.timestamp.desc())
+        .limit(limit)
+    )
+
+
+def columns_from_rows(rows: Sequence[Tuple]) -> Columns:
+    """Turn rows of :func:`window_query` into column arrays (NULL metrics -> 0, NULL flags -> False)."""
+    n = len(rows)
+    cols = list(zip(*rows)) if n else [()] * 9
+    out: Columns = {
+        "id": np.array(cols[0], dtype=np.int64),
+        "timestamp": np.array(cols[1], dtype=object),
+        "zone": np.array(cols[2], dtype=object),
+    }
+    for i, m in enumerate(METRICS):
+        out[m] = np.nan_to_num(np.array(cols[3 + i], dtype=np.float64), nan=0.0)
+    out["flamme"] = np.array([bool(v) for v in cols[7]], dtype=bool)
+    out["anomaly"] = np.array([bool(v) for v in cols[8]], dtype=bool)
+    return out
+
+
+def columns_from_readings(rows: Sequence[SensorData]) -> Columns:
+    """Column arrays for freshly added (not yet committed) ORM rows; ``id`` is left at 0."""
+    return columns_from_rows([
+        (0, r.timestamp, r.zone, r.temperature, r.pression, r.vibration, r.fumee, r.flamme, r.anomaly)
+        for r in rows
+    ])
+
+
+def load_window(db, limit: int) -> Columns:
+    return columns_from_rows(db.execute(window_query(limit)).all())
+
+
+def rule_k(rule: str) -> int:
+    return RULES.get((rule or "any").lower(), 1)
+
+
+@dataclass
+class WindowEvaluation:
+    exceed: np.ndarray    # (n, 4) bool, METRICS order
+    counts: np.ndarray    # (n,) number of metrics above threshold
+    reasons: np.ndarray   # (n,) bitmask over REASONS
+    priority: np.ndarray  # (n,) index into PRIORITIES
+
+    def predicted(self, k: int) -> np.ndarray:
+        return self.counts >= k
+
+
+def evaluate(cols: Columns, thresholds) -> WindowEvaluation:
+    """Evaluate a window against ``thresholds``.
+
+    ``thresholds`` is ``(temp, press, vib, fumee)`` or an ``(n, 4)`` array of
+    per-row thresholds; both broadcast against the ``(n, 4)`` value matrix.
+    """
+    values = np.column_stack([cols[m] for m in METRICS]) if len(cols["temperature"]) else np.zeros((0, 4))
+    thr = np.asarray(thresholds, dtype=np.float64)
+    exceed = values > thr
+    counts = exceed.sum(axis=1)
+    bits = exceed.astype(np.uint8) << np.arange(4, dtype=np.uint8)
+    reasons = bits.sum(axis=1).astype(np.uint8)
+    reasons |= np.where(cols["flamme"], FLAME_BIT, 0).astype(np.uint8)
+    reasons |= np.where(cols["anomaly"], ANOMALY_BIT, 0).astype(np.uint8)
+    priority = np.where(cols["flamme"], 2, np.where(counts > 0, 1, 0)).astype(np.int8)
+    return WindowEvaluation(exceed=exceed, counts=counts, reasons=reasons, priority=priority)
+
+
+ProfileRow = Tuple[str, Optional[str], Optional[float], Optional[float], Optional[float], Optional[float]]
+
+
+class ZoneThresholds:
+    """Thresholds resolved per zone, compiled once and looked up per window.
+
+    Resolution for each metric: the zone's row for that sensor type, then the
+    zone's row without sensor type, then the global thresholds. NULL values
+    inherit from the next level.
+    """
+
+    def __init__(self, base: Sequence[float], zones: Optional[Mapping[str, Sequence[float]]] = None):
+        self.base = np.asarray(base, dtype=np.float64)
+        self.zones = {z: np.asarray(v, dtype=np.float64) for z, v in (zones or {}).items()}
+
+    @classmethod
+    def compile(cls, base: Sequence[float], profiles: Iterable[ProfileRow]) -> "ZoneThresholds":
+        """Build from ``(zone, sensor_type, temp, press, vib, fumee)`` rows.
+
+        A row with ``sensor_type`` (one of METRICS) only contributes that metric.
+        """
+        general: Dict[str, List[Optional[float]]] = {}
+        specific: Dict[str, Dict[int, float]] = {}
+        for zone, sensor_type, *values in profiles:
+            if sensor_type is None:
+                general[zone] = list(values)
+            elif sensor_type in METRICS:
+                i = METRICS.index(sensor_type)
+                if values[i] is not None:
+                    specific.setdefault(zone, {})[i] = values[i]
+        zones: Dict[str, np.ndarray] = {}
+        for zone in set(general) | set(specific):
+            v = np.array(base, dtype=np.float64)
+            for i, value in enumerate(general.get(zone, ())):
+                if value is not None:
+                    v[i] = value
+            for i, value in specific.get(zone, {}).items():
+                v[i] = value
+            zones[zone] = v
+        return cls(base, zones)
+
+    def lookup(self, zone: Optional[str]) -> np.ndarray:
+        return self.zones.get(zone, self.base) if zone is not None else self.base
+
+    def for_rows(self, zones: Sequence[Optional[str]]) -> np.ndarray:
+        """``(n, 4)`` thresholds for a window's zone column, for :func:`evaluate`."""
+        zones = np.asarray(zones, dtype=object)
+        if not self.zones or not len(zones):
+            return np.broadcast_to(self.base, (len(zones), 4))
+        keys, inv = np.unique(np.where(zones == None, "", zones).astype(str), return_inverse=True)  # noqa: E711
+        table = np.stack([self.lookup(k) for k in keys.tolist()])
+        return table[inv]
+
+
+def reason_labels(mask: int) -> List[str]:
+    return [label for i, label in enumerate(REASONS) if mask & (1 << i)]
+
+
+def confusion(pred: np.ndarray, truth: np.ndarray) -> Tuple[int, int, int, int]:
+    """Return ``(tp, fp, tn, fn)``."""
+    tp = int(np.count_nonzero(pred & truth))
+    fp = int(np.count_nonzero(pred & ~truth))
+    fn = int(np.count_nonzero(~pred & truth))
+    return tp, fp, len(pred) - tp - fp - fn, fn
@@ -0,0 +1,138 @@
+"""Threshold suggestions aggregated in the database.
+
+Strategies, applied per metric over readings of the last ``window_hours``:
+
+- ``mean_ksigma``: ``avg + k * stddev_pop``
+- ``quantile``: ``percentile_cont(q)``
+- ``mad``: ``median + k * 1.4826 * median(|x - median|)`` (robust to outliers)
+
+On PostgreSQL each strategy is a single aggregate query (grouped by zone when
+``per_zone``), so weeks of data are summarised without shipping rows to the
+app. Other dialects lack these aggregates and fall back to NumPy over the
+window's rows, with the same definitions.
+
+When the window holds no readings (a site that stopped reporting), the
+suggestion falls back to the latest ``FALLBACK_ROWS`` readings, which is what
+suggestions were computed from before the window existed.
+"""
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import func, select, true
+from sqlalchemy.orm import Session
+
+from .database import SensorData
+from .rollups import UNKNOWN_ZONE
+
+STRATEGIES = ("mean_ksigma", "quantile", "mad")
+DEFAULT_WINDOW_HOURS = 24 * 7
+FALLBACK_ROWS = 500
+MAD_SCALE = 1.4826  # MAD -> standard deviation for normally distributed data
+# threshold key -> SensorData column, in Thresholds field order
+METRICS = (("temp", SensorData.temperature), ("press", SensorData.pression), ("vib", SensorData.vibration), ("fumee", SensorData.fumee))
+
+Suggestions = Dict[Optional[str], Dict[str, float]]
+
+
+def _zone():
+    return func.coalesce(SensorData.zone, UNKNOWN_ZONE)
+
+
+def _median(expr):
+    return func.percentile_cont(0.5).within_group(expr)
+
+
+def _sql(db: Session, strategy: str, k: float, q: float, since: datetime, per_zone: bool) -> Suggestions:
+    window = SensorData.timestamp >= since
+    key = [_zone().label("zone")] if per_zone else []
+    if strategy == "mad":
+        med = select(*key, *(_median(col).label(name) for name, col in METRICS)).where(window)
+        if per_zone:
+            med = med.group_by(_zone())
+        med = med.cte("medians")
+        aggs = [
+            (med.c[name] + k * MAD_SCALE * _median(func.abs(col - med.c[name]))).label(name)
+            for name, col in METRICS
+        ]
+        stmt = select(*key, func.count().label("count"), *aggs).select_from(
+            SensorData.__table__.join(med, _zone() == med.c.zone if per_zone else true())
+        ).where(window).group_by(*key, *(med.c[name] for name, _ in METRICS))
+    else:
+        if strategy == "quantile":
+            aggs = [func.percentile_cont(q).within_group(col).label(name) for name, col in METRICS]
+        else:
+            aggs = [(func.avg(col) + k * func.stddev_pop(col)).label(name) for name, col in METRICS]
+        stmt = select(*key, func.count().label("count"), *aggs).where(window)
+        if per_zone:
+            stmt = stmt.group_by(_zone())
+    out: Suggestions = {}
+    for row in db.execute(stmt).mappings():
+        out[row["zone"] if per_zone else None] = {
+            "count": int(row["count"]),
+            **{name: float(row[name] or 0.0) for name, _ in METRICS},
+        }
+    return out
+
+
+def _stat(values: np.ndarray, strategy: str, k: float, q: float) -> float:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return 0.0
+    if strategy == "quantile":
+        return float(np.quantile(values, q))  # linear interpolation, like percentile_cont
+    if strategy == "mad":
+        med = np.median(values)
+        return float(med + k * MAD_SCALE * np.median(np.abs(values - med)))
+    return float(values.mean() + k * values.std())
+
+
+def _numpy(db: Session, strategy: str, k: float, q: float, since: datetime, per_zone: bool) -> Suggestions:
+    rows = db.execute(select(_zone(), *(col for _, col in METRICS)).where(SensorData.timestamp >= since)).all()
+    if not rows:
+        return {}
+    zones = np.array([r[0] for r in rows], dtype=object)
+    values = np.array([r[1:] for r in rows], dtype=np.float64)
+    groups = {z: zones == z for z in sorted(set(zones.tolist()))} if per_zone else {None: np.ones(len(rows), dtype=bool)}
+    return {
+        z: {"count": int(mask.sum()), **{name: _stat(values[mask, i], strategy, k, q) for i, (name, _) in enumerate(METRICS)}}
+        for z, mask in groups.items()
+    }
+
+
+def _fallback_since(db: Session, rows: int) -> Optional[datetime]:
+    """Timestamp of the ``rows``-th latest reading (the oldest one when there are fewer)."""
+    stamped = SensorData.timestamp.is_not(None)
+    since = db.execute(
+        select(SensorData.timestamp).where(stamped).order_by(SensorData.timestamp.desc()).offset(rows - 1).limit(1)
+    ).scalar()
+    return since or db.execute(select(func.min(SensorData.timestamp)).where(stamped)).scalar()
+
+
+def suggest(
+    db: Session,
+    strategy: str = "mean_ksigma",
+    k: float = 2.0,
+    q: float = 0.99,
+    window_hours: float = DEFAULT_WINDOW_HOURS,
+    per_zone: bool = False,
+    now: Optional[datetime] = None,
+) -> Suggestions:
+    """Suggested thresholds keyed by zone (``None`` for the global suggestion).
+
+    Each entry holds ``count`` plus one non-negative value per threshold key.
+    An empty window falls back to the latest ``FALLBACK_ROWS`` readings; only
+    a table without readings yields ``{}``.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"unknown strategy {strategy!r}")
+    since = (now or datetime.utcnow()) - timedelta(hours=window_hours)
+    impl = _sql if db.get_bind().dialect.name == "postgresql" else _numpy
+    out = impl(db, strategy, float(k), float(q), since, per_zone)
+    if not any(v["count"] for v in out.values()):
+        since = _fallback_since(db, FALLBACK_ROWS)
+        out = impl(db, strategy, float(k), float(q), since, per_zone) if since is not None else {}
+    for values in out.values():
+        for name, _ in METRICS:
+            values[name] = max(0.0, values[name])
+    return {z: v for z, v in out.items() if v["count"]}
@@ -0,0 +1,322 @@
+"""Refresh token store.
+
+Tokens are looked up by the SHA-256 of their value (never stored in clear),
+so ``/auth/refresh`` costs one keyed lookup however many sessions are open.
+Revoked tokens are kept until their original expiry, then evicted along with
+expired live ones. Backends, picked with ``ZIRIS_TOKEN_STORE``:
+
+- ``sql`` (default): the ``refresh_tokens`` table, shared by every worker and
+  kept across restarts. Expired rows are purged at most every
+  ``ZIRIS_TOKEN_PURGE_SECONDS``.
+- ``memory``: one process only (tests, single-worker dev). Expiries sit in a
+  heap and are evicted as they pass.
+- ``redis``: any Redis-protocol server at ``ZIRIS_REDIS_URL`` (Redis, Valkey,
+  or a local stand-in in dev); needs the optional ``redis`` package. Keys
+  carry their own expiry.
+
+:meth:`TokenStore.consume` is atomic in every backend: when two requests
+rotate the same token, only one gets the user id back.
+"""
+import abc
+import hashlib
+import heapq
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from .database import RefreshToken
+
+TOKEN_STORE = os.getenv("ZIRIS_TOKEN_STORE", "sql")
+REDIS_URL = os.getenv("ZIRIS_REDIS_URL", "redis://localhost:6379/0")
+PURGE_SECONDS = float(os.getenv("ZIRIS_TOKEN_PURGE_SECONDS", "300"))
+BACKENDS = ("memory", "sql", "redis")
+
+Clock = Callable[[], datetime]
+
+
+def token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenStore(abc.ABC):
+    """Interface shared by the backends."""
+
+    backend: str
+
+    @abc.abstractmethod
+    def add(self, token: str, user_id: int, expires_at: datetime) -> None:
+        ...
+
+    @abc.abstractmethod
+    def consume(self, token: str) -> Optional[int]:
+        """Revoke a live token and return its user id; None if unknown, revoked or expired."""
+
+    @abc.abstractmethod
+    def state(self, token: str) -> Optional[str]:
+        """``live``, ``revoked``, ``expired`` or None when the store does not know the token."""
+
+    @abc.abstractmethod
+    def revoke(self, token: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    def revoke_user(self, user_id: int) -> int:
+        """Revoke every live token of ``user_id``; returns how many were revoked."""
+
+    @abc.abstractmethod
+    def purge(self) -> int:
+        """Evict expired entries (live or revoked); returns how many were removed."""
+
+    @abc.abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.backend}
+
+
+class MemoryTokenStore(TokenStore):
+    backend = "memory"
+
+    def __init__(self, clock: Clock = datetime.utcnow):
+        self.clock = clock
+        self._tokens: Dict[str, List[Any]] = {}  # hash -> [user_id, expires_at, revoked]
+        self._by_user: Dict[int, Set[str]] = {}
+        self._expiries: List[Tuple[datetime, str]] = []
+        self._lock = threading.Lock()
+
+    def _evict(self, now: datetime) -> int:
+        n = 0
+        while self._expiries and self._expiries[0][0] <= now:
+            exp, h = heapq.heappop(self._expiries)
+            rec = self._tokens.get(h)
+            if rec is not None and rec[1] == exp:
+                del self._tokens[h]
+                users = self._by_user.get(rec[0])
+                if users is not None:
+                    users.discard(h)
+                    if not users:
+                        del self._by_user[rec[0]]
+                n += 1
+        return n
+
+    def add(self, token: str, user_id: int, expires_at: datetime) -> None:
+        h = token_hash(token)
+        with self._lock:
+            self._evict(self.clock())
+            self._tokens[h] = [user_id, expires_at, False]
+            self._by_user.setdefault(user_id, set()).add(h)
+            heapq.heappush(self._expiries, (expires_at, h))
+
+    def consume(self, token: str) -> Optional[int]:
+        with self._lock:
+            rec = self._tokens.get(token_hash(token))
+            if rec is None or rec[2] or rec[1] <= self.clock():
+                return None
+            rec[2] = True
+            return rec[0]
+
+    def state(self, token: str) -> Optional[str]:
+        with self._lock:
+            rec = self._tokens.get(token_hash(token))
+        if rec is None:
+            return None
+        if rec[1] <= self.clock():
+            return "expired"
+        return "revoked" if rec[2] else "live"
+
+    def revoke(self, token: str) -> None:
+        with self._lock:
+            rec = self._tokens.get(token_hash(token))
+            if rec is not None:
+                rec[2] = True
+
+    def revoke_user(self, user_id: int) -> int:
+        n = 0
+        with self._lock:
+            for h in self._by_user.get(user_id, ()):
+                rec = self._tokens[h]
+                if not rec[2]:
+                    rec[2] = True
+                    n += 1
+        return n
+
+    def purge(self) -> int:
+        with self._lock:
+            return self._evict(self.clock())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.backend, "tokens": len(self._tokens), "users": len(self._by_user)}
+
+
+class SqlTokenStore(TokenStore):
+    backend = "sql"
+
+    def __init__(self, session_factory: Callable[[], Session], clock: Clock = datetime.utcnow, purge_seconds: float = PURGE_SECONDS):
+        self.session_factory = session_factory
+        self.clock = clock
+        self.purge_seconds = purge_seconds
+        self._next_purge = 0.0
+
+    def _maybe_purge(self) -> None:
+        if time.monotonic() >= self._next_purge:
+            self._next_purge = time.monotonic() + self.purge_seconds
+            try:
+                self.purge()
+            except Exception:
+                pass
+
+    def add(self, token: str, user_id: int, expires_at: datetime) -> None:
+        self._maybe_purge()
+        db = self.session_factory()
+        try:
+            db.add(RefreshToken(token_hash=token_hash(token), user_id=user_id, expires_at=expires_at, revoked=False))
+            db.commit()
+        finally:
+            db.close()
+
+    def consume(self, token: str) -> Optional[int]:
+        h = token_hash(token)
+        db = self.session_factory()
+        try:
+            # The row lock makes a concurrent consume of the same token see revoked=True
+            res = db.execute(
+                update(RefreshToken)
+                .where(RefreshToken.token_hash == h, RefreshToken.revoked.is_(False), RefreshToken.expires_at > self.clock())
+                .values(revoked=True)
+                .execution_options(synchronize_session=False)
+            )
+            if res.rowcount != 1:
+                db.rollback()
+                return None
+            uid = db.execute(select(RefreshToken.user_id).where(RefreshToken.token_hash == h)).scalar()
+            db.commit()
+            return uid
+        finally:
+            db.close()
+
+    def state(self, token: str) -> Optional[str]:
+        db = self.session_factory()
+        try:
+            row = db.execute(select(RefreshToken.expires_at, RefreshToken.revoked).where(RefreshToken.token_hash == token_hash(token))).first()
+        finally:
+            db.close()
+        if row is None:
+            return None
+        if row.expires_at <= self.clock():
+            return "expired"
+        return "revoked" if row.revoked else "live"
+
+    def _revoke_where(self, *conds) -> int:
+        db = self.session_factory()
+        try:
+            res = db.execute(
+                update(RefreshToken).where(RefreshToken.revoked.is_(False), *conds).values(revoked=True).execution_options(synchronize_session=False)
+            )
+            db.commit()
+            return res.rowcount or 0
+        finally:
+            db.close()
+
+    def revoke(self, token: str) -> None:
+        self._revoke_where(RefreshToken.token_hash == token_hash(token))
+
+    def revoke_user(self, user_id: int) -> int:
+        return self._revoke_where(RefreshToken.user_id == user_id)
+
+    def purge(self) -> int:
+        db = self.session_factory()
+        try:
+            res = db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= self.clock()).execution_options(synchronize_session=False))
+            db.commit()
+            return res.rowcount or 0
+        finally:
+            db.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "purge_seconds": self.purge_seconds}
+
+
+class RedisTokenStore(TokenStore):
+    """Live tokens are ``<prefix>:<hash>`` -> user id; consuming one is a single ``GETDEL``."""
+
+    backend = "redis"
+
+    def __init__(self, client: Any, prefix: str = "ziris:rt", clock: Clock = datetime.utcnow):
+        self.client = client
+        self.prefix = prefix
+        self.clock = clock
+
+    def _keys(self, token: str) -> Tuple[str, str]:
+        h = token_hash(token)
+        return f"{self.prefix}:{h}", f"{self.prefix}:revoked:{h}"
+
+    def _ttl_ms(self, expires_at: datetime) -> int:
+        return int((expires_at - self.clock()).total_seconds() * 1000)
+
+    def add(self, token: str, user_id: int, expires_at: datetime) -> None:
+        ttl = self._ttl_ms(expires_at)
+        if ttl <= 0:
+            return
+        live, _ = self._keys(token)
+        user_key = f"{self.prefix}:user:{user_id}"
+        pipe = self.client.pipeline()
+        pipe.set(live, str(user_id), px=ttl)
+        pipe.sadd(user_key, live)
+        pipe.pexpire(user_key, ttl)  # tokens share one lifetime, so the newest expires last
+        pipe.execute()
+
+    def consume(self, token: str) -> Optional[int]:
+        live, revoked = self._keys(token)
+        ttl = self.client.pttl(live)
+        uid = self.client.getdel(live)
+        if uid is None:
+            return None
+        if ttl and ttl > 0:
+            self.client.set(revoked, uid, px=ttl)
+        return int(uid)
+
+    def state(self, token: str) -> Optional[str]:
+        live, revoked = self._keys(token)
+        if self.client.exists(live):
+            return "live"
+        return "revoked" if self.client.exists(revoked) else None
+
+    def revoke(self, token: str) -> None:
+        self.consume(token)
+
+    def revoke_user(self, user_id: int) -> int:
+        user_key = f"{self.prefix}:user:{user_id}"
+        n = 0
+        for key in self.client.smembers(user_key):
+            key = key.decode() if isinstance(key, bytes) else key
+            ttl = self.client.pttl(key)
+            if self.client.getdel(key) is not None:
+                n += 1
+                if ttl and ttl > 0:
+                    self.client.set(key.replace(f"{self.prefix}:", f"{self.prefix}:revoked:", 1), str(user_id), px=ttl)
+        self.client.delete(user_key)
+        return n
+
+    def purge(self) -> int:
+        return 0  # keys expire on their own
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "prefix": self.prefix}
+
+
+def make_store(backend: str = TOKEN_STORE, session_factory: Optional[Callable[[], Session]] = None, redis_url: str = REDIS_URL) -> TokenStore:
+    if backend == "memory":
+        return MemoryTokenStore()
+    if backend == "sql":
+        if session_factory is None:
+            raise ValueError("the sql token store needs a session factory")
+        return SqlTokenStore(session_factory)
+    if backend == "redis":
+        import redis  # optional dependency
+
+        return RedisTokenStore(redis.Redis.from_url(redis_url))
+    raise ValueError(f"ZIRIS_TOKEN_STORE must be one of {', '.join(BACKENDS)}")